@@ -0,0 +1,122 @@
+"""
+Throughput and peak memory of ingest.py against the notebook's load-everything-then-split.
+
+    python bench_ingest.py --docs ../docs
+    python bench_ingest.py --sample 40          # generated PDFs, text, markdown and CSV
+
+Each mode runs in its own process so peak RSS isn't shared: the notebook approach, a cold
+streaming run, a re-run with nothing changed and a re-run after one file changed.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = (
+    "attention model encoder decoder layer head query key value sequence token position "
+    "training translation softmax residual dropout embedding output input weight vector"
+).split()
+
+
+def paragraph(rng, words=80):
+    return " ".join(rng.choices(WORDS, k=words)).capitalize() + "."
+
+
+def write_pdf(path, pages):
+    """
+    Minimal PDF with one Helvetica text line per entry of each page; enough for pypdf.
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        text = "".join(f"({line}) Tj T* " for line in lines)
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {text}ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = "%PDF-1.4\n", []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(out)
+
+
+def sample_docs(directory, files, seed=0):
+    """
+    `files` documents, mostly attention.pdf-sized PDFs (15 pages, ~40k characters).
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for i in range(files):
+        kind = ("pdf", "pdf", "txt", "md", "csv")[i % 5]
+        path = os.path.join(directory, f"doc-{i:03d}.{kind}")
+        if kind == "pdf":
+            pages = [[" ".join(rng.choices(WORDS, k=12)) for _ in range(60)] for _ in range(15)]
+            write_pdf(path, pages)
+            continue
+        with open(path, "wt") as f:
+            if kind == "csv":
+                f.write("id,label,description\n")
+                f.writelines(f"{row},{rng.choice(WORDS)},{paragraph(rng, 20)}\n" for row in range(500))
+            else:
+                heading = "# " if kind == "md" else ""
+                for section in range(30):
+                    f.write(f"{heading}Section {section}\n\n" + "\n\n".join(paragraph(rng) for _ in range(3)) + "\n\n")
+    return directory
+
+
+def run(name, *args):
+    result = subprocess.run(
+        [sys.executable, os.path.join(HERE, "ingest.py"), *args],
+        capture_output=True, text=True, check=True, cwd=HERE,
+    )
+    print(f"{name:>22}: " + result.stdout.strip().replace("\n", "\n" + " " * 24))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", help="directory to ingest (default: generated sample)")
+    parser.add_argument("--sample", type=int, default=40, help="generated files when --docs isn't given")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = args.docs or sample_docs(os.path.join(tmp, "docs"), args.sample)
+        manifest = os.path.join(tmp, "manifest.json")
+        workers = ["--workers", str(args.workers)]
+
+        run("load all, then split", docs, "--eager")
+        run("streaming, cold", docs, "--manifest", manifest, *workers)
+        run("streaming, unchanged", docs, "--manifest", manifest, *workers)
+
+        changed = next(os.path.join(root, name) for root, _, names in os.walk(docs) for name in sorted(names))
+        if args.docs:
+            # Don't modify the user's files: drop the entry so the file counts as changed
+            import json
+            with open(manifest) as f:
+                state = json.load(f)
+            state["files"].pop(changed, None)
+            with open(manifest, "w") as f:
+                json.dump(state, f)
+        else:
+            with open(changed, "ab") as f:
+                f.write(b"\n")
+        run("streaming, one changed", docs, "--manifest", manifest, *workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+token_splitter.TokenSplitter against the LangChain splitters from 03-chunking.ipynb.
+
+    python bench_splitter.py --pdf ../docs/attention.pdf
+    python bench_splitter.py --scale 10        # generated text, 10x attention.pdf
+
+Reports time per document, peak allocation (tracemalloc) and the largest chunk in tokens,
+which only the token-sized splitters keep under the budget. TokenSplitter is timed returning
+offset chunks; their text is sliced only for the token check.
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+import tracemalloc
+
+from langchain_text_splitters import CharacterTextSplitter, RecursiveCharacterTextSplitter, TokenTextSplitter
+
+from bench_ingest import WORDS
+from token_splitter import ENCODING, TokenSplitter, get_tokenizer
+
+# attention.pdf: 15 pages, ~40k characters of extracted text
+PDF_CHARACTERS = 40_000
+
+
+def sample_text(characters, seed=0):
+    """
+    Text shaped like PyPDFLoader output: short lines, blank lines between paragraphs.
+    """
+    rng = random.Random(seed)
+    paragraphs, size = [], 0
+    while size < characters:
+        lines = [" ".join(rng.choices(WORDS, k=rng.randint(8, 14))) for _ in range(rng.randint(2, 12))]
+        paragraphs.append("\n".join(lines))
+        size += sum(map(len, lines))
+    return "\n\n".join(paragraphs)
+
+
+def load_pdf(path):
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return "\n\n".join(page.page_content for page in PyPDFLoader(path).lazy_load())
+
+
+def measure(name, split, text, repeat):
+    encoding, _ = get_tokenizer(ENCODING)
+    chunks = [getattr(chunk, "text", chunk) for chunk in split(text)]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        split(text)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    split(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    largest = max(len(encoding.encode_ordinary(chunk)) for chunk in chunks)
+    print(f"{name:>34}: {statistics.median(timings) * 1000:8.2f} ms, peak {peak / 1e6:6.2f} MB, "
+          f"{len(chunks):5d} chunks, largest {largest:4d} tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="PDF to split (default: generated text)")
+    parser.add_argument("--scale", type=float, default=1.0, help="generated text size in attention.pdfs")
+    parser.add_argument("--chunk-tokens", type=int, default=128)
+    parser.add_argument("--overlap-tokens", type=int, default=16)
+    parser.add_argument("--chunk-chars", type=int, default=500)
+    parser.add_argument("--overlap-chars", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = load_pdf(args.pdf) if args.pdf else sample_text(int(PDF_CHARACTERS * args.scale))
+    get_tokenizer(ENCODING)  # loading the tokenizer isn't part of splitting
+    # CharacterTextSplitter warns for every chunk over chunk_size; the largest chunk column says it
+    logging.getLogger("langchain_text_splitters").setLevel(logging.ERROR)
+    print(f"{len(text)} characters")
+
+    chars, tokens = (args.chunk_chars, args.overlap_chars), (args.chunk_tokens, args.overlap_tokens)
+    splitters = {
+        f"CharacterTextSplitter {chars[0]} chars": CharacterTextSplitter(
+            separator="\n\n", chunk_size=chars[0], chunk_overlap=chars[1]).split_text,
+        f"RecursiveCharacter {chars[0]} chars": RecursiveCharacterTextSplitter(
+            chunk_size=chars[0], chunk_overlap=chars[1]).split_text,
+        f"RecursiveCharacter {tokens[0]} tokens": RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name=ENCODING, chunk_size=tokens[0], chunk_overlap=tokens[1]).split_text,
+        f"TokenTextSplitter {tokens[0]} tokens": TokenTextSplitter(
+            encoding_name=ENCODING, chunk_size=tokens[0], chunk_overlap=tokens[1]).split_text,
+        f"TokenSplitter {tokens[0]} tokens": TokenSplitter(tokens[0], tokens[1]).split,
+    }
+    for name, split in splitters.items():
+        measure(name, split, text, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
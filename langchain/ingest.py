@@ -0,0 +1,374 @@
+"""
+Streaming ingestion for a directory of documents, the pipeline behind 03-chunking.ipynb.
+
+    from ingest import VectorStoreSink, ingest, iter_chunks
+
+    for batch in iter_chunks("../docs"):               # chunks of one file at a time
+        print(batch.path, len(batch.chunks))
+
+    stats = ingest("../docs", VectorStoreSink(vector_store), manifest_path=".cache/ingest.json")
+
+    python ingest.py ../docs --manifest .cache/ingest.json
+    python ingest.py ../docs --eager                     # the notebook way, for comparison
+
+Files are loaded and split a few at a time, in a process pool when there is more than one
+worker, so memory holds only the files in flight instead of the whole corpus. With a
+manifest, files whose content hash and chunk settings are unchanged since the last run are
+skipped, and the chunks of changed or deleted files are replaced in the sink.
+
+A cold run is not faster than loading everything: the time goes to the loaders (PDF text
+extraction), and every pool worker first imports them, about a second. On one core,
+`bench_ingest.py --sample 12` takes about 2.1s streaming against 1.9s eager. The pipeline
+pays off in peak memory, on several cores, and on re-runs: unchanged files are skipped in
+milliseconds, one changed file takes under a second.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Extension -> (loader in langchain_community.document_loaders, keyword arguments)
+LOADERS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    ".pdf": ("PyPDFLoader", {}),
+    ".txt": ("TextLoader", {"encoding": "utf-8"}),
+    ".md": ("TextLoader", {"encoding": "utf-8"}),
+    ".csv": ("CSVLoader", {"encoding": "utf-8"}),
+    ".doc": ("UnstructuredWordDocumentLoader", {}),
+    ".docx": ("UnstructuredWordDocumentLoader", {}),
+    ".xls": ("UnstructuredExcelLoader", {}),
+    ".xlsx": ("UnstructuredExcelLoader", {}),
+    ".ppt": ("UnstructuredPowerPointLoader", {}),
+    ".pptx": ("UnstructuredPowerPointLoader", {}),
+}
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+SEPARATORS = ["\n\n", "\n", " ", ""]
+
+# Files being loaded per worker; bounds how many files' chunks are in memory at once
+IN_FLIGHT_PER_WORKER = 2
+
+
+@dataclass
+class FileChunks:
+    path: str
+    sha256: str
+    chunks: List[Document]
+
+    @property
+    def ids(self) -> List[str]:
+        return chunk_ids(self.path, len(self.chunks))
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    loaded: int = 0
+    skipped: int = 0
+    removed: int = 0
+    chunks: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        rate = self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+        return (
+            f"{self.files} files: {self.loaded} loaded, {self.skipped} unchanged, {self.removed} removed, "
+            f"{len(self.failed)} failed; {self.chunks} chunks in {self.seconds:.2f}s "
+            f"({rate:.2f} MB/s, {self.chunks / self.seconds if self.seconds else 0.0:.0f} chunks/s)"
+        )
+
+
+def chunk_ids(path: str, count: int) -> List[str]:
+    return [f"{path}#{i}" for i in range(count)]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_files(directory: str) -> List[str]:
+    """
+    Absolute paths of the files under `directory` that have a loader, in a stable order.
+    """
+    paths = []
+    for root, dirs, files in os.walk(os.path.abspath(directory)):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in LOADERS:
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def _is_under(path: str, root: str) -> bool:
+    try:
+        return os.path.commonpath([os.path.abspath(path), root]) == root
+    except ValueError:
+        # Different drives on Windows
+        return False
+
+
+def make_loader(path: str):
+    import langchain_community.document_loaders as loaders
+
+    name, kwargs = LOADERS[os.path.splitext(path)[1].lower()]
+    return getattr(loaders, name)(path, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def _splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=SEPARATORS)
+
+
+def load_and_split(path: str, sha256: str, chunk_size: int = CHUNK_SIZE,
+                   chunk_overlap: int = CHUNK_OVERLAP) -> FileChunks:
+    """
+    Load one file and split it. Runs in a worker process, so only the chunks travel back.
+    """
+    splitter = _splitter(chunk_size, chunk_overlap)
+    chunks = []
+    # Pages (or rows) are split as they are read; the loaded document is never held whole
+    for doc in make_loader(path).lazy_load():
+        for chunk in splitter.split_documents([doc]):
+            chunk.metadata.update(source=path, sha256=sha256, chunk=len(chunks))
+            chunks.append(chunk)
+    return FileChunks(path, sha256, chunks)
+
+
+class Manifest:
+    """
+    Content hash, chunk settings and chunk count of every ingested file, stored as JSON between runs.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, "rt") as f:
+                self.files = json.load(f)["files"]
+
+    def unchanged(self, path: str, sha256: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> bool:
+        # Other chunk settings make other chunks, the file is re-split as if it had changed
+        entry = self.files.get(path, {})
+        return (entry.get("sha256") == sha256 and entry.get("chunk_size") == chunk_size
+                and entry.get("chunk_overlap") == chunk_overlap)
+
+    def record(self, batch: FileChunks, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+        self.files[batch.path] = {"sha256": batch.sha256, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                                  "chunks": len(batch.chunks)}
+
+    def stale_ids(self, path: str) -> List[str]:
+        return chunk_ids(path, self.files.get(path, {}).get("chunks", 0))
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wt") as f:
+            json.dump({"files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def iter_chunks(
+    directory: str,
+    manifest: Optional[Manifest] = None,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    max_workers: Optional[int] = None,
+    stats: Optional[IngestStats] = None) -> Iterator[FileChunks]:
+    """
+    Yield the chunks of each new or changed file under `directory`, one file at a time, in
+    completion order. Files that fail to load are recorded in `stats.failed` and skipped.
+    """
+    stats = stats if stats is not None else IngestStats()
+    manifest = manifest or Manifest()
+    max_workers = max_workers or os.cpu_count() or 1
+
+    def changed_files() -> Iterator[Tuple[str, str]]:
+        for path in find_files(directory):
+            stats.files += 1
+            sha256 = file_sha256(path)
+            if manifest.unchanged(path, sha256, chunk_size, chunk_overlap):
+                stats.skipped += 1
+                continue
+            yield path, sha256
+
+    def loaded(path: str, batch: FileChunks) -> FileChunks:
+        stats.loaded += 1
+        stats.bytes += os.path.getsize(path)
+        stats.chunks += len(batch.chunks)
+        return batch
+
+    if max_workers == 1:
+        # A pool of one only adds a process start and pickling every chunk back
+        for path, sha256 in changed_files():
+            try:
+                batch = load_and_split(path, sha256, chunk_size, chunk_overlap)
+            except Exception as e:
+                stats.failed[path] = str(e) or type(e).__name__
+                continue
+            yield loaded(path, batch)
+        return
+
+    pending = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+
+        def drain(block: bool) -> Iterator[FileChunks]:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED, timeout=None if block else 0)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    batch = future.result()
+                except Exception as e:
+                    stats.failed[path] = str(e) or type(e).__name__
+                    continue
+                yield loaded(path, batch)
+
+        for path, sha256 in changed_files():
+            pending[pool.submit(load_and_split, path, sha256, chunk_size, chunk_overlap)] = path
+            while len(pending) >= max_workers * IN_FLIGHT_PER_WORKER:
+                yield from drain(block=True)
+        while pending:
+            yield from drain(block=True)
+
+
+class VectorStoreSink:
+    """
+    Writes chunks to a LangChain vector store, `batch_size` at a time.
+    """
+
+    def __init__(self, vector_store, batch_size: int = 256):
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+
+    def add(self, chunks: List[Document], ids: List[str]):
+        for i in range(0, len(chunks), self.batch_size):
+            self.vector_store.add_documents(chunks[i:i + self.batch_size], ids=ids[i:i + self.batch_size])
+
+    def delete(self, ids: List[str]):
+        if ids:
+            self.vector_store.delete(ids=ids)
+
+
+class CountingSink:
+    """
+    Keeps only chunk counts, for measuring the pipeline without an index.
+    """
+
+    def __init__(self):
+        self.chunks = 0
+
+    def add(self, chunks: List[Document], ids: List[str]):
+        self.chunks += len(chunks)
+
+    def delete(self, ids: List[str]):
+        self.chunks -= len(ids)
+
+
+def ingest(
+    directory: str,
+    sink,
+    manifest_path: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    max_workers: Optional[int] = None) -> IngestStats:
+    """
+    Bring `sink` up to date with `directory`. Each file's chunks are added as soon as it is
+    split, after its chunks from a previous run are deleted; chunks of files that no longer
+    exist are deleted. The manifest is saved even if the run is interrupted.
+    """
+    stats = IngestStats()
+    manifest = Manifest(manifest_path)
+    start = time.perf_counter()
+    try:
+        for batch in iter_chunks(directory, manifest, chunk_size, chunk_overlap, max_workers, stats):
+            sink.delete(manifest.stale_ids(batch.path))
+            sink.add(batch.chunks, batch.ids)
+            manifest.record(batch, chunk_size, chunk_overlap)
+
+        # Manifest keys are absolute, so "docs", "./docs" and "/.../docs" are the same files and
+        # "docs2" isn't inside "docs"
+        root = os.path.abspath(directory)
+        present = set(find_files(root))
+        inside = [p for p in manifest.files if _is_under(p, root)]
+        for path in [p for p in inside if p not in present]:
+            sink.delete(manifest.stale_ids(path))
+            del manifest.files[path]
+            stats.removed += 1
+    finally:
+        stats.seconds = time.perf_counter() - start
+        manifest.save()
+    return stats
+
+
+def ingest_eager(directory: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> IngestStats:
+    """
+    The notebook's approach: load every file, then split_documents over all of them.
+    """
+    stats = IngestStats()
+    start = time.perf_counter()
+    documents = []
+    for path in find_files(directory):
+        stats.files += 1
+        try:
+            documents.extend(make_loader(path).load())
+        except Exception as e:
+            stats.failed[path] = str(e) or type(e).__name__
+            continue
+        stats.loaded += 1
+        stats.bytes += os.path.getsize(path)
+    stats.chunks = len(_splitter(chunk_size, chunk_overlap).split_documents(documents))
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def peak_memory() -> str:
+    try:
+        import resource
+    except ImportError:
+        # Windows has no getrusage
+        return "peak RSS unavailable on this platform"
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1e6
+    worker = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 1e6
+    return f"peak RSS {parent:.0f} MB" + (f", largest worker {worker:.0f} MB" if worker else "")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", default="../docs")
+    parser.add_argument("--manifest", help="JSON manifest for incremental runs")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--eager", action="store_true", help="load everything, then split (no pool, no manifest)")
+    args = parser.parse_args(argv)
+
+    if args.eager:
+        stats = ingest_eager(args.directory, args.chunk_size, args.chunk_overlap)
+    else:
+        stats = ingest(args.directory, CountingSink(), args.manifest, args.chunk_size, args.chunk_overlap, args.workers)
+    print(stats.summary())
+    print(peak_memory())
+    for path, error in stats.failed.items():
+        print(f"failed: {path}: {error}")
+
+
+if __name__ == "__main__":
+    main()
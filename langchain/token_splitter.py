@@ -0,0 +1,237 @@
+"""
+Token-sized text splitter that works on offsets into the source text.
+
+    from token_splitter import TokenSplitter
+
+    splitter = TokenSplitter(chunk_size=256, chunk_overlap=32)   # sizes in cl100k_base tokens
+    chunks = splitter.split(text)          # Chunk(start, end, tokens); chunk.text slices on demand
+    docs = splitter.split_documents(documents)                    # drop-in for the LangChain splitters
+
+Splits where RecursiveCharacterTextSplitter would, at the coarsest separator that keeps the
+chunk within `chunk_size`, but in one pass: the text is tokenized once, separators are found
+with vectorized comparisons over its code points, and each chunk is a couple of binary
+searches over those positions. A chunk's text on its own can take more tokens than its slice
+of the document did, but only at its edges: cl100k never merges across a space or tab that
+follows a non-space, so between the first and last such point the document's tokens are the
+chunk's, and only the few characters outside them are encoded again.
+Overlap is a start offset moved back to a word boundary, so no text is copied until a
+chunk's text is asked for.
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import tiktoken
+from langchain_core.documents import Document
+
+ENCODING = "cl100k_base"
+SEPARATORS = ["\n\n", "\n", " ", ""]
+# Code points of every character str.isspace() accepts
+WHITESPACE = np.array([c for c in range(0x3001) if chr(c).isspace()])
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(encoding_name: str = ENCODING) -> Tuple[tiktoken.Encoding, np.ndarray]:
+    """
+    The tiktoken encoding and the byte length of every token id, built once per process.
+    """
+    encoding = tiktoken.get_encoding(encoding_name)
+    lengths = np.zeros(encoding.n_vocab, dtype=np.int64)
+    for token in range(encoding.n_vocab):
+        try:
+            lengths[token] = len(encoding.decode_single_token_bytes(token))
+        except KeyError:
+            # Gaps in the vocabulary and special tokens, which encode_ordinary never produces
+            pass
+    return encoding, lengths
+
+
+def token_offsets(text: str, encoding_name: str = ENCODING) -> np.ndarray:
+    """
+    Character offset where each token of `text` starts, plus len(text) at the end.
+    """
+    encoding, lengths = get_tokenizer(encoding_name)
+    tokens = np.array(encoding.encode_ordinary(text), dtype=np.int64)
+    byte_starts = np.concatenate(([0], np.cumsum(lengths[tokens])))
+    data = text.encode("utf-8")
+    if len(data) != len(text):
+        # Map byte offsets to characters: count the bytes that start a character
+        raw = np.frombuffer(data, dtype=np.uint8)
+        char_of_byte = np.cumsum((raw & 0xC0) != 0x80) - 1
+        starts = char_of_byte[np.minimum(byte_starts[:-1], len(data) - 1)]
+        return np.append(starts, len(text))
+    return byte_starts
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """
+    `source[start:end]`, `tokens` long when encoded on its own. Holds a reference to the source, not a copy.
+    """
+    start: int
+    end: int
+    tokens: int
+    source: str = field(repr=False, compare=False)
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start:self.end]
+
+
+class TokenSplitter:
+    """
+    Splits text into chunks of at most `chunk_size` tokens, with about `chunk_overlap` tokens
+    repeated between neighbours. `separators` are tried in order as for RecursiveCharacterTextSplitter.
+    """
+
+    def __init__(self, chunk_size: int = 256, chunk_overlap: int = 32, separators: Optional[Sequence[str]] = None,
+                 encoding_name: str = ENCODING, strip_whitespace: bool = True):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(SEPARATORS if separators is None else separators)
+        self.encoding_name = encoding_name
+        self.strip_whitespace = strip_whitespace
+        # "" means any token boundary; it is the fallback, not something to search for
+        self._levels = [s for s in self.separators if s]
+        self._anywhere = "" in self.separators
+
+    def _boundaries(self, text: str, offsets: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Token indices where each separator starts, per separator, and all of them merged. Last, the
+        tokens that start with a space or tab after a non-space, which no token of the text merges across.
+        """
+        data = text.encode("utf-8")
+        # One byte per character for ASCII text, UTF-32 code points otherwise
+        codec, dtype = ("utf-8", np.uint8) if len(data) == len(text) else ("utf-32-le", np.uint32)
+        codes = np.frombuffer(data if codec == "utf-8" else text.encode(codec), dtype=dtype)
+        positions = np.flatnonzero((codes[1:] == 0x20) | (codes[1:] == 0x09)) + 1
+        positions = positions[~np.isin(codes[positions - 1], WHITESPACE)]
+        tokens = np.searchsorted(offsets, positions)
+        # A space is a whole character, but it only counts where a token starts with it
+        cuts = tokens[offsets[tokens] == positions]
+        levels = []
+        for separator in self._levels:
+            sep = np.frombuffer(separator.encode(codec), dtype=dtype)
+            n = len(codes) - len(sep) + 1
+            if n <= 0:
+                levels.append(np.zeros(0, np.int64))
+                continue
+            match = codes[:n] == sep[0]
+            for k in range(1, len(sep)):
+                match &= codes[k:k + n] == sep[k]
+            tokens = np.searchsorted(offsets, np.flatnonzero(match))
+            # Sorted already; drop separators that fall in the same token
+            levels.append(tokens[np.concatenate(([True], tokens[1:] != tokens[:-1]))] if len(tokens) else tokens)
+        merged = np.zeros(len(offsets), dtype=bool)
+        for tokens in levels:
+            merged[tokens] = True
+        return levels, np.flatnonzero(merged), cuts
+
+    def _end(self, start: int, floor: int, size: int, num_tokens: int, levels: List[np.ndarray],
+             merged: np.ndarray) -> int:
+        limit = start + size
+        if limit >= num_tokens:
+            return num_tokens
+        # Coarsest separator inside the window, as late as possible, past the previous chunk
+        for boundaries in levels:
+            i = np.searchsorted(boundaries, limit, side="right") - 1
+            if i >= 0 and boundaries[i] > floor:
+                return int(boundaries[i])
+        if self._anywhere:
+            return limit
+        # No separator fits: run on to the next one, like the LangChain splitters do
+        i = np.searchsorted(merged, limit, side="right")
+        return int(merged[i]) if i < len(merged) else num_tokens
+
+    def _next_start(self, start: int, end: int, merged: np.ndarray) -> int:
+        if not self.chunk_overlap:
+            return end
+        target = end - self.chunk_overlap
+        i = np.searchsorted(merged, target, side="left")
+        if i < len(merged) and merged[i] < end:
+            candidate = int(merged[i])
+        else:
+            candidate = target if self._anywhere else end
+        return candidate if candidate > start else end
+
+    def _step_back(self, start: int, end: int, merged: np.ndarray) -> int:
+        """
+        The boundary before `end`, or `end` when there is none left past `start`.
+        """
+        i = np.searchsorted(merged, end, side="left") - 1
+        if i >= 0 and merged[i] > start:
+            return int(merged[i])
+        return end - 1 if self._anywhere and end - 1 > start else end
+
+    def _span(self, text: str, lo: int, hi: int) -> Tuple[int, int]:
+        if self.strip_whitespace:
+            while lo < hi and text[lo].isspace():
+                lo += 1
+            while hi > lo and text[hi - 1].isspace():
+                hi -= 1
+        return lo, hi
+
+    def _count(self, text: str, lo: int, hi: int, cuts: np.ndarray, cut_offsets: np.ndarray) -> int:
+        """
+        Tokens in `text[lo:hi]` encoded on its own: the document's tokens between the outermost cuts
+        inside it, and the characters before and after them encoded again.
+        """
+        encoding, _ = get_tokenizer(self.encoding_name)
+        first = np.searchsorted(cut_offsets, lo, side="left")
+        last = np.searchsorted(cut_offsets, hi, side="right") - 1
+        if first >= last:
+            return len(encoding.encode_ordinary(text[lo:hi]))
+        head, tail = text[lo:cut_offsets[first]], text[cut_offsets[last]:hi]
+        return (int(cuts[last] - cuts[first]) + (len(encoding.encode_ordinary(head)) if head else 0)
+                + (len(encoding.encode_ordinary(tail)) if tail else 0))
+
+    def split(self, text: str) -> List[Chunk]:
+        offsets = token_offsets(text, self.encoding_name)
+        num_tokens = len(offsets) - 1
+        levels, merged, cuts = self._boundaries(text, offsets)
+        cut_offsets = offsets[cuts]
+
+        chunks = []
+        start = end = 0
+        while start < num_tokens:
+            size = self.chunk_size
+            if self.strip_whitespace and start and text[offsets[start]].isspace():
+                # " residual" is one token, "residual" two: leave room for stripping the space
+                size -= 1
+            end = self._end(start, max(start, end), size, num_tokens, levels, merged)
+            while True:
+                lo, hi = self._span(text, int(offsets[start]), int(offsets[end]))
+                # The chunk's text on its own can tokenize longer than its slice of the
+                # document's tokens (stripped spaces, characters split across tokens)
+                tokens = self._count(text, lo, hi, cuts, cut_offsets)
+                if tokens <= self.chunk_size:
+                    break
+                previous = self._step_back(start, end, merged)
+                if previous == end:
+                    break
+                end = previous
+            if hi > lo:
+                chunks.append(Chunk(lo, hi, tokens, text))
+            if end >= num_tokens:
+                break
+            start = self._next_start(start, end, merged)
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk.text for chunk in self.split(text)]
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """
+        Same as the LangChain splitters, with the offsets in the metadata.
+        """
+        return [
+            Document(
+                page_content=chunk.text,
+                metadata={**doc.metadata, "start_index": chunk.start, "end_index": chunk.end, "tokens": chunk.tokens},
+            )
+            for doc in documents
+            for chunk in self.split(doc.page_content)
+        ]
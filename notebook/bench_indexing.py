@@ -0,0 +1,84 @@
+"""
+Indexing throughput, one es.index call per document (as in the notebook) versus bulk ingestion.
+
+    python bench_indexing.py --documents documents.json --url http://localhost:9200
+    python bench_indexing.py --synthetic 2000 --latency 0.002    # in-process fake_es, no docker
+
+Without --url the benchmark starts fake_es.py, whose per-request latency stands in for the
+round trip to a real node. Each run indexes into a fresh index, which is deleted afterwards.
+"""
+import argparse
+import random
+import time
+
+from fake_es import FakeElasticsearch
+from retrieval import CHUNK_SIZE, THREAD_COUNT, create_index, get_client, index_documents, load_documents
+
+WORDS = (
+    "course docker postgres kafka spark homework deadline module airflow terraform bigquery "
+    "install error port password container image python notebook certificate video week"
+).split()
+
+
+def synthetic_documents(n, seed=0, words=WORDS):
+    rng = random.Random(seed)
+    return [
+        {
+            "course": rng.choice(["data-engineering-zoomcamp", "machine-learning-zoomcamp", "mlops-zoomcamp"]),
+            "section": f"Module {rng.randint(1, 6)}: " + " ".join(rng.choices(words, k=2)),
+            "question": " ".join(rng.choices(words, k=8)) + "?",
+            "text": " ".join(rng.choices(words, k=rng.randint(30, 120))) + f" ({i})",
+        }
+        for i in range(n)
+    ]
+
+
+def per_document(es, index_name, documents):
+    create_index(index_name, es)
+    for doc in documents:
+        es.index(index=index_name, document=doc)
+    es.indices.refresh(index=index_name)
+
+
+def bulk(es, index_name, documents, chunk_size, thread_count):
+    index_documents(documents, index_name, es=es, chunk_size=chunk_size, thread_count=thread_count)
+
+
+def timed(name, func, es, index_name, documents):
+    es.options(ignore_status=404).indices.delete(index=index_name)
+    start = time.perf_counter()
+    func(es, index_name, documents)
+    elapsed = time.perf_counter() - start
+    count = es.count(index=index_name)["count"]
+    es.indices.delete(index=index_name)
+    print(f"{name:>28}: {len(documents) / elapsed:9.0f} docs/s, {elapsed:6.2f}s, {count} indexed")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", help="documents.json to index (default: synthetic documents)")
+    parser.add_argument("--synthetic", type=int, default=2000, help="synthetic documents when --documents isn't given")
+    parser.add_argument("--url", help="Elasticsearch to benchmark against (default: in-process fake)")
+    parser.add_argument("--latency", type=float, default=0.002, help="fake per-request latency in seconds")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--thread-count", type=int, default=THREAD_COUNT)
+    args = parser.parse_args()
+
+    documents = load_documents(args.documents) if args.documents else synthetic_documents(args.synthetic)
+    url = args.url or FakeElasticsearch(latency=args.latency).start().url
+    es = get_client(url)
+    index_name = "bench-course-questions"
+    print(f"{len(documents)} documents -> {url}")
+
+    single = timed("es.index per document", per_document, es, index_name, documents)
+    parallel = timed(
+        f"bulk {args.chunk_size} x {args.thread_count} threads",
+        lambda es, index, docs: bulk(es, index, docs, args.chunk_size, args.thread_count),
+        es, index_name, documents,
+    )
+    print(f"speedup {single / parallel:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
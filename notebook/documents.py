@@ -0,0 +1,19 @@
+"""
+Loading the course FAQ (documents.json from the llm-rag-workshop repo) shared by the retrieval modules.
+"""
+import json
+from typing import Any, Dict, List
+
+
+def load_documents(path: str = "documents.json") -> List[Dict[str, Any]]:
+    """
+    Flatten documents.json into one list, with the course name on every document.
+    """
+    with open(path, "rt") as f_in:
+        documents_file = json.load(f_in)
+
+    documents = []
+    for course in documents_file:
+        for doc in course["documents"]:
+            documents.append({**doc, "course": course["course"]})
+    return documents
@@ -0,0 +1,305 @@
+"""
+In-process BM25 and vector search over the course FAQ, a drop-in for the Elasticsearch index
+in elastic-search-rag.ipynb when the corpus fits in memory.
+
+    python embedded_index.py build documents.json .cache/faq-index
+    python embedded_index.py query .cache/faq-index "How do I join the course after it has started?"
+
+    from embedded_index import EmbeddedIndex, retrieve_documents
+    index = EmbeddedIndex.load(".cache/faq-index")
+    retrieve_documents("How do I join the course after it has started?", index)
+
+Text fields are scored like an Elasticsearch `multi_match` of type `best_fields`: Lucene's BM25
+per field, times the field boost, and the best field wins. Keyword fields are exact-match
+filters. Vectors (optional) are cosine top-k over one float32 matrix.
+
+An index saves to a directory of .npy arrays plus a small meta.json. Loading memory-maps the
+arrays, so it is fast regardless of corpus size and the pages are shared between processes.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from documents import load_documents
+
+DEFAULT_TEXT_FIELDS = {"question": 3.0, "text": 1.0, "section": 1.0}
+DEFAULT_KEYWORD_FIELDS = ("course",)
+DEFAULT_COURSE = "data-engineering-zoomcamp"
+
+# Lucene / Elasticsearch BM25 defaults
+K1 = 1.2
+B = 0.75
+
+FORMAT_VERSION = 1
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: Any) -> List[str]:
+    # Close to Elasticsearch's standard analyzer: lowercase word tokens, no stemming or stopwords
+    return TOKEN.findall(str(text or "").lower())
+
+
+class FieldPostings:
+    """
+    Inverted index of one text field: for term id t, the documents and term frequencies are
+    docs[offsets[t]:offsets[t + 1]] and tfs[offsets[t]:offsets[t + 1]].
+    """
+
+    def __init__(self, vocab: Dict[str, int], offsets: np.ndarray, docs: np.ndarray, tfs: np.ndarray,
+                 lengths: np.ndarray, k1: float = K1, b: float = B):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.lengths = lengths
+        avgdl = float(lengths.mean()) if len(lengths) else 0.0
+        # Length normalization of every document, computed once instead of per query term
+        self.norms = (k1 * (1 - b + b * lengths / avgdl)).astype(np.float32) if avgdl else np.full(len(lengths), k1, np.float32)
+
+    @classmethod
+    def build(cls, texts: Sequence[Any], k1: float = K1, b: float = B) -> "FieldPostings":
+        vocab: Dict[str, int] = {}
+        postings: List[List[Tuple[int, int]]] = []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_id = vocab.setdefault(term, len(vocab))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((doc_id, tf))
+
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings])
+        docs = np.fromiter((d for p in postings for d, _ in p), dtype=np.int32, count=int(offsets[-1]))
+        tfs = np.fromiter((tf for p in postings for _, tf in p), dtype=np.float32, count=int(offsets[-1]))
+        return cls(vocab, offsets, docs, tfs, lengths, k1, b)
+
+    def scores(self, terms: Iterable[str], num_docs: int) -> np.ndarray:
+        scores = np.zeros(num_docs, dtype=np.float32)
+        for term in terms:
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs, tfs = self.docs[start:end], self.tfs[start:end]
+            idf = math.log(1 + (num_docs - (end - start) + 0.5) / ((end - start) + 0.5))
+            # Each document appears once per term, so plain fancy-index addition is safe
+            scores[docs] += idf * tfs / (tfs + self.norms[docs])
+        return scores
+
+
+class EmbeddedIndex:
+    """
+    BM25 over boosted text fields, exact-match keyword filters and optional dense vectors.
+    """
+
+    def __init__(self, text_fields: Dict[str, float], keyword_fields: Sequence[str], postings: Dict[str, FieldPostings],
+                 keywords: Dict[str, Tuple[List[str], np.ndarray]], doc_blob, doc_offsets: np.ndarray,
+                 vectors: Optional[np.ndarray] = None):
+        self.text_fields = dict(text_fields)
+        self.keyword_fields = tuple(keyword_fields)
+        self.postings = postings
+        self.keywords = keywords            # field -> (distinct values, value code per document)
+        self.doc_blob = doc_blob            # concatenated UTF-8 JSON of every document
+        self.doc_offsets = doc_offsets
+        self.vectors = vectors              # (num_docs, dim) float32, rows L2-normalized
+
+    def __len__(self) -> int:
+        return len(self.doc_offsets) - 1
+
+    @classmethod
+    def build(
+        cls,
+        documents: Sequence[Dict[str, Any]],
+        text_fields: Dict[str, float] = DEFAULT_TEXT_FIELDS,
+        keyword_fields: Sequence[str] = DEFAULT_KEYWORD_FIELDS,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None) -> "EmbeddedIndex":
+        """
+        Index `documents`. With `embed` (texts -> array of vectors), each document's question and
+        text are embedded for `vector_search`.
+        """
+        postings = {field: FieldPostings.build([doc.get(field) for doc in documents]) for field in text_fields}
+
+        keywords = {}
+        for field in keyword_fields:
+            values = sorted({str(doc[field]) for doc in documents if doc.get(field) is not None})
+            code_of = {value: code for code, value in enumerate(values)}
+            codes = np.array([code_of.get(str(doc.get(field)), -1) for doc in documents], dtype=np.int32)
+            keywords[field] = (values, codes)
+
+        encoded = [json.dumps(doc, ensure_ascii=False).encode("utf-8") for doc in documents]
+        doc_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        doc_offsets[1:] = np.cumsum([len(e) for e in encoded])
+        doc_blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        index = cls(text_fields, keyword_fields, postings, keywords, doc_blob, doc_offsets)
+        if embed is not None:
+            index.set_vectors(embed([f"{doc.get('question', '')}\n{doc.get('text', '')}" for doc in documents]))
+        return index
+
+    def set_vectors(self, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[0] != len(self):
+            raise ValueError(f"Got {vectors.shape[0]} vectors for {len(self)} documents")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = vectors / np.where(norms == 0, 1, norms)
+
+    def document(self, doc_id: int) -> Dict[str, Any]:
+        start, end = self.doc_offsets[doc_id], self.doc_offsets[doc_id + 1]
+        return json.loads(self.doc_blob[start:end].tobytes())
+
+    def _mask(self, filter_dict: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not filter_dict:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        for field, value in filter_dict.items():
+            if field not in self.keywords:
+                raise KeyError(f"'{field}' is not a keyword field, known: {list(self.keywords)}")
+            values, codes = self.keywords[field]
+            try:
+                mask &= codes == values.index(str(value))
+            except ValueError:
+                return np.zeros(len(self), dtype=bool)
+        return mask
+
+    @staticmethod
+    def _top(scores: np.ndarray, num_results: int) -> List[Tuple[int, float]]:
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > num_results:
+            candidates = np.sort(candidates[np.argpartition(-scores[candidates], num_results - 1)[:num_results]])
+        # Ties keep index order, like Elasticsearch's doc id tie-break
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i])) for i in order]
+
+    def rank(self, query: str, filter_dict: Optional[Dict[str, Any]] = None, num_results: int = 5) -> List[Tuple[int, float]]:
+        """
+        (document id, score) of the best BM25 matches, best first.
+        """
+        terms = tokenize(query)
+        best = np.zeros(len(self), dtype=np.float32)
+        for field, boost in self.text_fields.items():
+            np.maximum(best, boost * self.postings[field].scores(terms, len(self)), out=best)
+
+        mask = self._mask(filter_dict)
+        if mask is not None:
+            best[~mask] = 0
+        return self._top(best, num_results)
+
+    def vector_rank(self, vector: np.ndarray, filter_dict: Optional[Dict[str, Any]] = None,
+                    num_results: int = 5) -> List[Tuple[int, float]]:
+        """
+        (document id, cosine similarity) of the nearest documents, nearest first.
+        """
+        if self.vectors is None:
+            raise ValueError("This index has no vectors, build it with embed= or call set_vectors()")
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        # Shift to [0, 2] so that _top's "score > 0" only drops filtered-out documents
+        scores = self.vectors @ query + 1
+
+        mask = self._mask(filter_dict)
+        if mask is not None:
+            scores[~mask] = 0
+        return [(i, score - 1) for i, score in self._top(scores, num_results)]
+
+    def search(self, query: str, filter_dict: Optional[Dict[str, Any]] = None, num_results: int = 5) -> List[Dict[str, Any]]:
+        return [self.document(i) for i, _ in self.rank(query, filter_dict, num_results)]
+
+    def vector_search(self, vector: np.ndarray, filter_dict: Optional[Dict[str, Any]] = None,
+                      num_results: int = 5) -> List[Dict[str, Any]]:
+        return [self.document(i) for i, _ in self.vector_rank(vector, filter_dict, num_results)]
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        meta = {
+            "version": FORMAT_VERSION,
+            "text_fields": self.text_fields,
+            "keyword_fields": list(self.keyword_fields),
+            "vocab": {field: p.vocab for field, p in self.postings.items()},
+            "keyword_values": {field: values for field, (values, _) in self.keywords.items()},
+            "has_vectors": self.vectors is not None,
+        }
+        for field, p in self.postings.items():
+            for name in ("offsets", "docs", "tfs", "lengths"):
+                np.save(os.path.join(path, f"{field}.{name}.npy"), getattr(p, name))
+        for field, (_, codes) in self.keywords.items():
+            np.save(os.path.join(path, f"{field}.codes.npy"), codes)
+        np.save(os.path.join(path, "docs.offsets.npy"), self.doc_offsets)
+        np.save(os.path.join(path, "docs.blob.npy"), self.doc_blob)
+        if self.vectors is not None:
+            np.save(os.path.join(path, "vectors.npy"), self.vectors)
+        # Written last, a directory without it is an incomplete save
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddedIndex":
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Index format {meta['version']} at {path}, expected {FORMAT_VERSION}, rebuild it")
+
+        def array(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        postings = {
+            field: FieldPostings(vocab, array(f"{field}.offsets"), array(f"{field}.docs"), array(f"{field}.tfs"),
+                                 np.asarray(array(f"{field}.lengths")))
+            for field, vocab in meta["vocab"].items()
+        }
+        keywords = {field: (values, array(f"{field}.codes")) for field, values in meta["keyword_values"].items()}
+        vectors = array("vectors") if meta["has_vectors"] else None
+        return cls(meta["text_fields"], meta["keyword_fields"], postings, keywords,
+                   array("docs.blob"), array("docs.offsets"), vectors)
+
+
+def retrieve_documents(query: str, index: EmbeddedIndex, max_results: int = 5,
+                       course: Optional[str] = DEFAULT_COURSE) -> List[Dict[str, Any]]:
+    """
+    Same results shape as retrieval.retrieve_documents: the top FAQ documents within `course`.
+    """
+    return index.search(query, {"course": course} if course else None, max_results)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="index documents.json into a directory")
+    build.add_argument("documents")
+    build.add_argument("path")
+    query = subparsers.add_parser("query", help="search a saved index")
+    query.add_argument("path")
+    query.add_argument("query")
+    query.add_argument("--course", default=DEFAULT_COURSE, help="empty for every course")
+    query.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = EmbeddedIndex.build(load_documents(args.documents))
+        index.save(args.path)
+        print(f"indexed {len(index)} documents into {args.path} in {time.perf_counter() - start:.2f}s")
+        return
+
+    start = time.perf_counter()
+    index = EmbeddedIndex.load(args.path)
+    loaded = time.perf_counter()
+    results = retrieve_documents(args.query, index, args.k, args.course or None)
+    searched = time.perf_counter()
+    for doc in results:
+        print(f"Section: {doc['section']}\nQuestion: {doc['question']}\nAnswer: {doc['text'][:200]}\n")
+    print(f"load {(loaded - start) * 1000:.1f} ms, search {(searched - loaded) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Recall and latency of BM25, vector and hybrid (RRF) retrieval on the course FAQ.
+
+    python eval_hybrid.py --documents documents.json --sample 500
+    python eval_hybrid.py --documents documents.json --embedder openai
+    python eval_hybrid.py --synthetic 2000              # no documents.json at hand
+
+Each sampled document's question, rewritten the way users ask (words dropped, one typo), is
+the query and that document the only relevant result, searched within its course like the
+notebook does. Reports hit rate and MRR at k, single-query latency cold and cached, and the
+per-query cost of the batched API.
+"""
+import argparse
+import random
+import string
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from bench_indexing import synthetic_documents
+from documents import load_documents
+from embedded_index import EmbeddedIndex
+from hybrid_search import HashingEmbedder, HybridRetriever, TTLCache, openai_embedder
+
+
+def pseudo_words(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    consonants, vowels = "bcdfghklmnprstvz", "aeiou"
+    return ["".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(2, 4))) for _ in range(n)]
+
+
+def as_user_query(question: str, rng: random.Random) -> str:
+    words = question.rstrip("?").split()
+    kept = [w for w in words if rng.random() < 0.6] or words[:1]
+    i = rng.randrange(len(kept))
+    if len(kept[i]) > 3:
+        # Swap two neighbouring letters
+        j = rng.randrange(len(kept[i]) - 1)
+        kept[i] = kept[i][:j] + kept[i][j + 1] + kept[i][j] + kept[i][j + 2:]
+    return " ".join(kept).strip(string.punctuation + " ")
+
+
+def percentiles(samples: List[float]) -> str:
+    p50, p95 = np.percentile(np.array(samples) * 1000, [50, 95])
+    return f"p50 {p50:7.3f} ms, p95 {p95:7.3f} ms"
+
+
+def evaluate(name: str, rank: Callable[[str, str], List[int]], queries, k: int):
+    hits, reciprocal, timings = 0, 0.0, []
+    for query, course, relevant in queries:
+        start = time.perf_counter()
+        ranked = rank(query, course)[:k]
+        timings.append(time.perf_counter() - start)
+        if relevant in ranked:
+            hits += 1
+            reciprocal += 1 / (ranked.index(relevant) + 1)
+    print(f"{name:>16}: hit rate@{k} {hits / len(queries):.3f}, MRR@{k} {reciprocal / len(queries):.3f}, {percentiles(timings)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", help="documents.json (default: synthetic documents)")
+    parser.add_argument("--synthetic", type=int, default=2000)
+    parser.add_argument("--sample", type=int, default=500, help="documents turned into queries")
+    parser.add_argument("--embedder", choices=["hashing", "openai"], default="hashing")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.documents:
+        documents = load_documents(args.documents)
+    else:
+        documents = synthetic_documents(args.synthetic, words=pseudo_words(3000))
+    embed = openai_embedder() if args.embedder == "openai" else HashingEmbedder()
+
+    start = time.perf_counter()
+    index = EmbeddedIndex.build(documents, embed=embed)
+    print(f"{len(documents)} documents indexed with {args.embedder} vectors in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(args.seed)
+    sample = rng.sample(range(len(documents)), min(args.sample, len(documents)))
+    queries = [(as_user_query(documents[i]["question"], rng), documents[i]["course"], i) for i in sample]
+    k = args.k
+
+    evaluate("bm25", lambda q, c: [i for i, _ in index.rank(q, {"course": c}, k)], queries, k)
+    evaluate("vector", lambda q, c: [i for i, _ in index.vector_rank(embed([q])[0], {"course": c}, k)], queries, k)
+
+    retriever = HybridRetriever(index, embed, cache=TTLCache())
+    evaluate("hybrid (cold)", lambda q, c: retriever.rank(q, c, k), queries, k)
+    evaluate("hybrid (cached)", lambda q, c: retriever.rank(q, c, k), queries, k)
+
+    # Batched: one embedding call per course instead of one per query
+    retriever.cache.clear()
+    by_course = {}
+    for query, course, _ in queries:
+        by_course.setdefault(course, []).append(query)
+    start = time.perf_counter()
+    for course, course_queries in by_course.items():
+        retriever.rank_many(course_queries, course, k)
+    elapsed = time.perf_counter() - start
+    print(f"{'hybrid (batch)':>16}: {elapsed / len(queries) * 1000:.3f} ms per query over {len(queries)} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Minimal in-memory stand-in for a single-node Elasticsearch, for benchmarking the indexing
+and retrieval code without docker.
+
+    python fake_es.py --port 9200 --latency 0.002
+
+Handles the calls retrieval.py makes: index create/exists/delete, settings, refresh, single
+document index, _bulk, _search and _msearch. Every request sleeps `latency` seconds, standing
+in for the network round trip and request overhead of a real cluster. Search scores by
+boosted term overlap, good enough to check results, not a BM25 implementation.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokens(text):
+    return set(TOKEN.findall(str(text).lower()))
+
+
+class FakeElasticsearch(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0):
+        super().__init__(address, FakeElasticsearchHandler)
+        self.latency = latency
+        self.indices = {}    # name -> {"settings": {...}, "mappings": {...}, "docs": {id: source}}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def search(self, index, body):
+        docs = self.indices.get(index, {}).get("docs", {})
+        query = body.get("query", {})
+        must = query.get("bool", {}).get("must", query)
+        match = must.get("multi_match", {})
+        filters = query.get("bool", {}).get("filter", [])
+        filters = filters if isinstance(filters, list) else [filters]
+
+        terms = tokens(match.get("query", ""))
+        fields = []
+        for field in match.get("fields", []):
+            name, _, boost = field.partition("^")
+            fields.append((name, float(boost or 1)))
+
+        hits = []
+        for doc_id, source in docs.items():
+            if any(source.get(k) != v for f in filters for k, v in f.get("term", {}).items()):
+                continue
+            # best_fields: the best single field decides the score
+            score = max((len(terms & tokens(source.get(name, ""))) * boost for name, boost in fields), default=0.0)
+            if score > 0 or not terms:
+                hits.append({"_index": index, "_id": doc_id, "_score": score, "_source": source})
+
+        hits.sort(key=lambda hit: -hit["_score"])
+        size = body.get("size", 10)
+        return {
+            "took": 1,
+            "timed_out": False,
+            "hits": {"total": {"value": len(hits), "relation": "eq"}, "max_score": hits[0]["_score"] if hits else None,
+                     "hits": hits[:size]},
+        }
+
+
+class FakeElasticsearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Keep-alive connections with Nagle on stall ~40ms per request on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        method = self.command
+
+        with server.lock:
+            if not parts:
+                return self._send(200, {"name": "fake", "cluster_name": "fake", "version": {"number": "8.4.3"},
+                                        "tagline": "You Know, for Search"})
+            if parts == ["_bulk"] or parts[-1] == "_bulk":
+                return self._send(200, self._bulk(raw, parts[0] if len(parts) == 2 else None))
+            if parts == ["_msearch"] or parts[-1] == "_msearch":
+                lines = [json.loads(line) for line in raw.decode().splitlines() if line.strip()]
+                responses = []
+                for header, body in zip(lines[::2], lines[1::2]):
+                    index = header.get("index", parts[0] if len(parts) == 2 else None)
+                    responses.append({**server.search(index, body), "status": 200})
+                return self._send(200, {"took": 1, "responses": responses})
+
+            index = parts[0]
+            body = json.loads(raw) if raw else {}
+            if len(parts) == 1:
+                if method == "HEAD":
+                    return self._send(200 if index in server.indices else 404, None)
+                if method == "PUT":
+                    if index in server.indices:
+                        return self._send(400, {"error": {"type": "resource_already_exists_exception"}, "status": 400})
+                    server.indices[index] = {"settings": body.get("settings", {}), "mappings": body.get("mappings", {}),
+                                             "docs": {}}
+                    return self._send(200, {"acknowledged": True, "index": index})
+                if method == "DELETE":
+                    server.indices.pop(index, None)
+                    return self._send(200, {"acknowledged": True})
+
+            if index not in server.indices:
+                return self._send(404, {"error": {"type": "index_not_found_exception"}, "status": 404})
+            data = server.indices[index]
+            action = parts[1]
+
+            if action == "_settings":
+                if method == "PUT":
+                    data["settings"].setdefault("index", {}).update(body.get("index", body))
+                    return self._send(200, {"acknowledged": True})
+                return self._send(200, {index: {"settings": {"index": data["settings"].get("index", {})}}})
+            if action == "_refresh":
+                return self._send(200, {"_shards": {"total": 1, "successful": 1, "failed": 0}})
+            if action == "_count":
+                return self._send(200, {"count": len(data["docs"])})
+            if action == "_doc":
+                doc_id = parts[2] if len(parts) > 2 else uuid.uuid4().hex
+                data["docs"][doc_id] = body
+                return self._send(201, {"_index": index, "_id": doc_id, "result": "created"})
+            if action == "_search":
+                return self._send(200, server.search(index, body))
+
+        return self._send(400, {"error": {"type": "unsupported", "reason": f"{method} {self.path}"}, "status": 400})
+
+    def _bulk(self, raw, default_index):
+        lines = [json.loads(line) for line in raw.decode().splitlines() if line.strip()]
+        items = []
+        i = 0
+        while i < len(lines):
+            (op, meta), = lines[i].items()
+            index = meta.get("_index", default_index)
+            doc_id = meta.get("_id") or uuid.uuid4().hex
+            if op == "delete":
+                self.server.indices.get(index, {}).get("docs", {}).pop(doc_id, None)
+                items.append({op: {"_index": index, "_id": doc_id, "status": 200}})
+                i += 1
+                continue
+            source = lines[i + 1]
+            self.server.indices.setdefault(index, {"settings": {}, "mappings": {}, "docs": {}})["docs"][doc_id] = source
+            items.append({op: {"_index": index, "_id": doc_id, "status": 201, "result": "created"}})
+            i += 2
+        return {"took": 1, "errors": False, "items": items}
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    do_GET = do_PUT = do_POST = do_DELETE = do_HEAD = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds added to every request")
+    args = parser.parse_args()
+
+    server = FakeElasticsearch(("127.0.0.1", args.port), latency=args.latency)
+    print(f"Fake Elasticsearch listening on {server.url}")
+    server.serve_forever()
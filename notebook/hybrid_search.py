@@ -0,0 +1,199 @@
+"""
+Hybrid retrieval for the RAG path: BM25 and embedding search run concurrently and are fused
+with reciprocal-rank fusion, with an LRU + TTL cache in front.
+
+    from embedded_index import EmbeddedIndex
+    from hybrid_search import HashingEmbedder, HybridRetriever
+
+    embed = HashingEmbedder()                   # or openai_embedder() for real embeddings
+    index = EmbeddedIndex.build(documents, embed=embed)
+    retriever = HybridRetriever(index, embed)
+    retriever.retrieve_documents("How do I join the course after it has started?")
+    retriever.retrieve_many(questions)          # one embedding call for the whole batch
+
+RRF scores each document sum(1 / (k + rank)) over the result lists it appears in, so the
+lexical and vector scores, which aren't comparable, never need normalizing.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from embedded_index import DEFAULT_COURSE, EmbeddedIndex, tokenize
+
+RRF_K = 60
+# Each leg contributes this many candidates to the fusion
+CANDIDATES = 20
+
+DEFAULT_CACHE_ENTRIES = 4096
+DEFAULT_CACHE_TTL = 3600.0
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire `ttl` seconds after they were stored.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES, ttl: float = DEFAULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def normalize_query(query: str) -> str:
+    # "How do I join?" and "how do i  join" are the same question to the index
+    return " ".join(tokenize(query))
+
+
+class HashingEmbedder:
+    """
+    Dependency-free stand-in for an embedding model: character n-gram counts hashed into `dim`
+    buckets. It matches misspellings and word forms BM25 misses, but carries no semantics.
+    """
+
+    def __init__(self, dim: int = 512, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            padded = f" {token} "
+            for i in range(max(1, len(padded) - self.ngram + 1)):
+                digest = hashlib.blake2b(padded[i:i + self.ngram].encode(), digest_size=4).digest()
+                vector[int.from_bytes(digest, "little") % self.dim] += 1
+        return vector
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+
+def openai_embedder(model: str = "text-embedding-3-small", client=None) -> Callable[[List[str]], np.ndarray]:
+    """
+    Embed with the OpenAI API, one request per call however many texts it gets.
+    """
+    from openai import OpenAI
+
+    client = client or OpenAI()
+
+    def embed(texts: List[str]) -> np.ndarray:
+        response = client.embeddings.create(model=model, input=texts)
+        return np.array([item.embedding for item in response.data], dtype=np.float32)
+
+    return embed
+
+
+def rrf(rankings: Sequence[Sequence[int]], k: int = RRF_K) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked lists of document ids, best first.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+class HybridRetriever:
+    """
+    BM25 + vector retrieval over an EmbeddedIndex built with vectors from the same `embed`.
+    """
+
+    def __init__(self, index: EmbeddedIndex, embed: Callable[[List[str]], np.ndarray],
+                 cache: Optional[TTLCache] = None, candidates: int = CANDIDATES, rrf_k: int = RRF_K,
+                 max_workers: int = 4):
+        self.index = index
+        self.embed = embed
+        self.cache = cache if cache is not None else TTLCache()
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hybrid-search")
+
+    def _key(self, query: str, course: Optional[str], num_results: int) -> Tuple:
+        return normalize_query(query), course, num_results
+
+    def _fuse(self, lexical: List[Tuple[int, float]], vector: List[Tuple[int, float]], num_results: int) -> Tuple[int, ...]:
+        fused = rrf([[i for i, _ in lexical], [i for i, _ in vector]], self.rrf_k)
+        # Cached as a tuple, so callers changing their result can't change the cache
+        return tuple(i for i, _ in fused[:num_results])
+
+    def rank(self, query: str, course: Optional[str] = DEFAULT_COURSE, num_results: int = 5) -> List[int]:
+        """
+        Fused document ids for one query, from the cache when it was asked before.
+        """
+        key = self._key(query, course, num_results)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        filter_dict = {"course": course} if course else None
+        # The embedding call is usually remote, BM25 runs while it is in flight
+        vector_future = self._pool.submit(
+            lambda: self.index.vector_rank(self.embed([query])[0], filter_dict, self.candidates)
+        )
+        lexical = self.index.rank(query, filter_dict, self.candidates)
+        ranked = self._fuse(lexical, vector_future.result(), num_results)
+        self.cache.set(key, ranked)
+        return list(ranked)
+
+    def rank_many(self, queries: List[str], course: Optional[str] = DEFAULT_COURSE, num_results: int = 5) -> List[List[int]]:
+        """
+        `rank` for many queries: cached ones are skipped, the rest share one embedding call.
+        """
+        keys = [self._key(query, course, num_results) for query in queries]
+        results: List[Optional[Tuple[int, ...]]] = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return [list(result) for result in results]
+
+        filter_dict = {"course": course} if course else None
+        vectors_future = self._pool.submit(self.embed, [queries[i] for i in missing])
+        lexical = [self.index.rank(queries[i], filter_dict, self.candidates) for i in missing]
+        for i, lex, vector in zip(missing, lexical, vectors_future.result()):
+            results[i] = self._fuse(lex, self.index.vector_rank(vector, filter_dict, self.candidates), num_results)
+            self.cache.set(keys[i], results[i])
+        return [list(result) for result in results]
+
+    def retrieve_documents(self, query: str, course: Optional[str] = DEFAULT_COURSE,
+                           max_results: int = 5) -> List[Dict[str, Any]]:
+        """
+        Same results shape as retrieval.retrieve_documents.
+        """
+        return [self.index.document(i) for i in self.rank(query, course, max_results)]
+
+    def retrieve_many(self, queries: List[str], course: Optional[str] = DEFAULT_COURSE,
+                      max_results: int = 5) -> List[List[Dict[str, Any]]]:
+        return [[self.index.document(i) for i in ranked] for ranked in self.rank_many(queries, course, max_results)]
@@ -0,0 +1,198 @@
+"""
+Elasticsearch indexing and retrieval for the course FAQ (documents.json) in elastic-search-rag.ipynb.
+
+    from retrieval import load_documents, index_documents, retrieve_documents
+
+    documents = load_documents("documents.json")
+    index_documents(documents)
+    retrieve_documents("How do I join the course after it has started?")
+
+Documents are sent with the bulk API in parallel chunks, with refresh turned off for the load,
+and every call shares one pooled client. ES_URL points at the cluster (default
+http://localhost:9200); with an 8.x server, use the 8.x `elasticsearch` client.
+"""
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from elasticsearch import Elasticsearch, helpers
+
+from documents import load_documents
+
+ES_URL = os.getenv("ES_URL", "http://localhost:9200")
+INDEX_NAME = "course-questions"
+DEFAULT_COURSE = "data-engineering-zoomcamp"
+
+INDEX_SETTINGS = {
+    "settings": {
+        "number_of_shards": 1,
+        "number_of_replicas": 0
+    },
+    "mappings": {
+        "properties": {
+            "text": {"type": "text"},
+            "section": {"type": "text"},
+            "question": {"type": "text"},
+            "course": {"type": "keyword"}
+        }
+    }
+}
+
+SEARCH_FIELDS = ["question^3", "text", "section"]
+
+# Bulk ingestion: documents per request and requests in flight
+CHUNK_SIZE = 500
+THREAD_COUNT = 4
+
+# Connections kept open to each node, one per concurrent request
+CONNECTIONS_PER_NODE = 10
+
+_clients: Dict[str, Elasticsearch] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(url: str = ES_URL) -> Elasticsearch:
+    """
+    Shared client for `url`. It is thread-safe and keeps its HTTP connections open between calls.
+    """
+    with _clients_lock:
+        if url not in _clients:
+            _clients[url] = Elasticsearch(
+                url,
+                connections_per_node=CONNECTIONS_PER_NODE,
+                request_timeout=30,
+                retry_on_timeout=True,
+                max_retries=3,
+            )
+        return _clients[url]
+
+
+def document_id(doc: Dict[str, Any]) -> str:
+    # Stable id, so indexing the same file again overwrites instead of duplicating
+    key = "\x1f".join(str(doc.get(field, "")) for field in ("course", "section", "question", "text"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def create_index(index_name: str = INDEX_NAME, es: Optional[Elasticsearch] = None, recreate: bool = False):
+    es = es or get_client()
+    if es.indices.exists(index=index_name):
+        if not recreate:
+            return
+        es.indices.delete(index=index_name)
+    es.indices.create(index=index_name, **INDEX_SETTINGS)
+
+
+def index_documents(
+    documents: Iterable[Dict[str, Any]],
+    index_name: str = INDEX_NAME,
+    es: Optional[Elasticsearch] = None,
+    chunk_size: int = CHUNK_SIZE,
+    thread_count: int = THREAD_COUNT) -> int:
+    """
+    Bulk-index `documents` and return how many were indexed.
+
+    Documents are streamed into `chunk_size` bulk requests sent by `thread_count` threads. Refresh
+    is off during the load and restored afterwards, followed by one refresh, so the documents
+    are searchable when this returns. Failed documents raise a BulkIndexError at the end.
+    """
+    es = es or get_client()
+    create_index(index_name, es)
+
+    settings = es.indices.get_settings(index=index_name)
+    previous_interval = settings[index_name]["settings"]["index"].get("refresh_interval")
+
+    actions = (
+        {"_index": index_name, "_id": document_id(doc), "_source": doc}
+        for doc in documents
+    )
+
+    indexed, errors = 0, []
+    es.indices.put_settings(index=index_name, settings={"index": {"refresh_interval": "-1"}})
+    try:
+        for ok, info in helpers.parallel_bulk(
+            es, actions, chunk_size=chunk_size, thread_count=thread_count, raise_on_error=False
+        ):
+            if ok:
+                indexed += 1
+            else:
+                errors.append(info)
+    finally:
+        # None puts back the index default (1s)
+        es.indices.put_settings(index=index_name, settings={"index": {"refresh_interval": previous_interval}})
+        es.indices.refresh(index=index_name)
+
+    if errors:
+        raise helpers.BulkIndexError(f"{len(errors)} document(s) failed to index", errors)
+    return indexed
+
+
+class MultiSearchError(Exception):
+    """
+    Queries of a batch that Elasticsearch failed, as (position, query, error) in `errors`.
+    """
+
+    def __init__(self, errors: List[tuple]):
+        position, query, error = errors[0]
+        super().__init__(f"{len(errors)} of the queries failed, first #{position} {query!r}: {error}")
+        self.errors = errors
+
+
+def build_query(query: str, max_results: int = 5, course: Optional[str] = DEFAULT_COURSE) -> Dict[str, Any]:
+    search_query = {
+        "size": max_results,
+        "query": {
+            "bool": {
+                "must": {
+                    "multi_match": {
+                        "query": query,
+                        "fields": SEARCH_FIELDS,
+                        "type": "best_fields"
+                    }
+                }
+            }
+        }
+    }
+    if course:
+        search_query["query"]["bool"]["filter"] = {"term": {"course": course}}
+    return search_query
+
+
+def retrieve_documents(
+    query: str,
+    index_name: str = INDEX_NAME,
+    max_results: int = 5,
+    course: Optional[str] = DEFAULT_COURSE,
+    es: Optional[Elasticsearch] = None) -> List[Dict[str, Any]]:
+    """
+    Top `max_results` FAQ documents for `query`, within `course` (None searches every course).
+    """
+    es = es or get_client()
+    response = es.search(index=index_name, **build_query(query, max_results, course))
+    return [hit["_source"] for hit in response["hits"]["hits"]]
+
+
+def retrieve_many(
+    queries: List[str],
+    index_name: str = INDEX_NAME,
+    max_results: int = 5,
+    course: Optional[str] = DEFAULT_COURSE,
+    es: Optional[Elasticsearch] = None) -> List[List[Dict[str, Any]]]:
+    """
+    `retrieve_documents` for many queries in one _msearch round trip, results in query order.
+    A query Elasticsearch fails comes back without hits; any such raises a MultiSearchError.
+    """
+    if not queries:
+        return []
+    es = es or get_client()
+    searches = []
+    for query in queries:
+        searches.append({"index": index_name})
+        searches.append(build_query(query, max_results, course))
+    response = es.msearch(searches=searches)
+
+    results = response["responses"]
+    errors = [(i, queries[i], result["error"]) for i, result in enumerate(results) if "error" in result]
+    if errors:
+        raise MultiSearchError(errors)
+    return [[hit["_source"] for hit in result["hits"]["hits"]] for result in results]
@@ -0,0 +1,102 @@
+"""
+Write amplification of the checkpointer over full planning runs with the fake search and LLM.
+
+    python -m benchmarks.bench_checkpoint --runs 5
+
+Amplification is the bytes stored in the checkpoint tables divided by the size of the final
+state, i.e. how many times over a run writes its own result. Commits are counted from the
+SQL trace, each one is a WAL append (and with synchronous=FULL, an fsync).
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from benchmarks.fakes import FakeChatModel, FakeGoogleSearch
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src import agent
+from src.utils import tools
+from src.utils.cache import search_cache
+from src.utils.checkpoint import STATE_MODULES, connect, prune_checkpoints, CompressedSerializer
+from src.utils.models import ModelRouter
+from src.utils.state import ItineraryAgentState
+
+ITINERARY_CHARS = 6000
+
+
+def stored_bytes(conn: sqlite3.Connection) -> int:
+    checkpoints = conn.execute(
+        "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+    ).fetchone()[0]
+    writes = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes").fetchone()[0]
+    return checkpoints + writes
+
+
+def make_default(path: str):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    return SqliteSaver(conn, serde=JsonPlusSerializer(allowed_msgpack_modules=STATE_MODULES)), conn
+
+
+def make_tuned(path: str):
+    conn = connect(path)
+    return SqliteSaver(conn, serde=CompressedSerializer()), conn
+
+
+def bench(name: str, make_saver, durability: str, state: ItineraryAgentState, runs: int, state_bytes: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        saver, conn = make_saver(os.path.join(tmp, "checkpoints.sqlite"))
+        commits = []
+        conn.set_trace_callback(lambda sql: commits.append(1) if sql.strip().upper() == "COMMIT" else None)
+        graph = agent.create_builder().compile(checkpointer=saver)
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            search_cache.clear()
+            graph.invoke(state, {"configurable": {"thread_id": str(uuid.uuid4())}}, durability=durability)
+        elapsed = time.perf_counter() - start
+
+        rows = conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        written = stored_bytes(conn)
+        prune_checkpoints(conn, keep_last=1)
+        retained = stored_bytes(conn)
+        conn.close()
+
+    print(
+        f"{name:>22}: {rows / runs:5.1f} checkpoints/run, {len(commits) / runs:5.1f} commits/run, "
+        f"{written / runs / 1024:7.1f} KiB/run, amplification {written / runs / state_bytes:5.1f}x, "
+        f"after prune {retained / runs / 1024:6.1f} KiB/run, {elapsed / runs * 1000:6.1f} ms/run"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    tools.GoogleSearch = FakeGoogleSearch
+    agent.router = ModelRouter.uniform(FakeChatModel({}, completion_chars=ITINERARY_CHARS))
+
+    state = ItineraryAgentState(
+        origin="BKK",
+        destination="CNX",
+        departure_date="2099-09-20",
+        return_date="2099-09-22"
+    )
+
+    # Reference size: the final state serialized once, uncompressed
+    final = agent.create_builder().compile().invoke(state)
+    state_bytes = len(JsonPlusSerializer(allowed_msgpack_modules=STATE_MODULES).dumps_typed(final)[1])
+    print(f"final state: {state_bytes / 1024:.1f} KiB")
+
+    bench("default, sync", make_default, "sync", state, args.runs, state_bytes)
+    bench("tuned, sync", make_tuned, "sync", state, args.runs, state_bytes)
+    bench("tuned, exit", make_tuned, "exit", state, args.runs, state_bytes)
+
+
+if __name__ == "__main__":
+    main()
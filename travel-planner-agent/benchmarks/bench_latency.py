@@ -0,0 +1,197 @@
+"""
+End-to-end latency of the compiled graph, replaying recorded SerpAPI responses and LLM completions.
+
+    python -m benchmarks.bench_latency --runs 20 --concurrency 1 4 16 --scale 0.05
+    python -m benchmarks.bench_latency --compare .cache/benchmarks/latency-<old commit>.json
+
+Each concurrency level plans `runs` distinct trips (dates shifted per run, so the search cache
+and single-flight don't serve them from one another). Every fourth trip starts from a name the
+airport index doesn't know, so update_airport_codes falls back to the LLM; the IATA memo starts
+empty per level, so the first of them in a level pays for the call. Reports p50/p95/p99 per node and end to
+end, throughput and peak RSS, and saves everything as JSON for comparing commits.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.fakes import FakeChatModel, FakeGoogleSearch, load_fixture
+
+from src import agent
+from src.utils import airports, tools
+from src.utils.cache import search_cache
+from src.utils.models import ModelRouter
+from src.utils.state import ItineraryAgentState
+
+# Typical latencies in seconds, before --scale
+NODE_LATENCIES = {
+    "update_airport_codes": 1.0,
+    "get_flight_recommendation": 8.0,
+    "get_hotel_recommendation": 10.0,
+    "generate_itinerary": 30.0,
+    "draft_itinerary": 26.0,
+}
+SEARCH_LATENCY = 2.0
+PERCENTILES = (50, 95, 99)
+FIRST_DEPARTURE = date(2099, 1, 1)
+# Bangkok's full Thai name: not in airports.csv, resolved by the LLM (fixtures/completions.json)
+FALLBACK_ORIGIN = "Krung Thep Maha Nakhon"
+FALLBACK_EVERY = 4
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def make_trip(i: int) -> ItineraryAgentState:
+    departure = FIRST_DEPARTURE + timedelta(days=i)
+    return ItineraryAgentState(
+        origin=FALLBACK_ORIGIN if i % FALLBACK_EVERY == 0 else "Bangkok",
+        destination="Chiang Mai",
+        departure_date=departure.isoformat(),
+        return_date=(departure + timedelta(days=2)).isoformat(),
+    )
+
+
+def run_once(graph, state: ItineraryAgentState) -> Dict[str, float]:
+    """
+    Plan one trip and return seconds per node, plus "total".
+    """
+    started: Dict[str, float] = {}
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    for event in graph.stream(state, stream_mode="tasks"):
+        now = time.perf_counter()
+        if "result" in event or "error" in event:
+            timings[event["name"]] = now - started.pop(event["id"], now)
+        else:
+            started[event["id"]] = now
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    values = np.percentile(np.array(samples) * 1000, PERCENTILES)
+    return {f"p{p}_ms": round(float(v), 2) for p, v in zip(PERCENTILES, values)}
+
+
+def run_level(graph, concurrency: int, runs: int, memo_path: str) -> dict:
+    search_cache.clear()
+    # A memo from an earlier level or run would answer the fallback trips without the LLM
+    airports.iata_memo = airports.IataMemo(memo_path)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: run_once(graph, make_trip(i)), range(runs)))
+    wall = time.perf_counter() - start
+
+    by_node = defaultdict(list)
+    for timings in results:
+        for node, seconds in timings.items():
+            by_node[node].append(seconds)
+
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(runs / wall, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "end_to_end": summarize(by_node.pop("total")),
+        "nodes": {node: summarize(samples) for node, samples in sorted(by_node.items())},
+    }
+
+
+def print_level(level: dict):
+    e2e = level["end_to_end"]
+    print(
+        f"\nconcurrency {level['concurrency']}: {level['throughput_per_s']:.2f} plans/s, "
+        f"peak RSS {level['peak_rss_mb']:.0f} MB"
+    )
+    print(f"  {'node':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for node, stats in list(level["nodes"].items()) + [("end to end", e2e)]:
+        print(f"  {node:<28}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+
+
+def compare(old: dict, new: dict):
+    old_levels = {level["concurrency"]: level for level in old["levels"]}
+    print(f"\nvs {old['commit']}:")
+    for level in new["levels"]:
+        before = old_levels.get(level["concurrency"])
+        if before is None:
+            continue
+        p95_old, p95_new = before["end_to_end"]["p95_ms"], level["end_to_end"]["p95_ms"]
+        print(
+            f"  concurrency {level['concurrency']}: end-to-end p95 {p95_old:.1f} -> {p95_new:.1f} ms "
+            f"({(p95_new - p95_old) / p95_old:+.1%}), throughput "
+            f"{before['throughput_per_s']:.2f} -> {level['throughput_per_s']:.2f} plans/s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="plans per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--scale", type=float, default=0.05, help="multiplier applied to every fake latency")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction of random latency variation")
+    parser.add_argument("--pipelined", action="store_true", help="benchmark the pipelined graph")
+    parser.add_argument("--output", help="JSON results path (default .cache/benchmarks/latency-<commit>.json)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    FakeGoogleSearch.latency = SEARCH_LATENCY * args.scale
+    FakeGoogleSearch.jitter = args.jitter
+    tools.GoogleSearch = FakeGoogleSearch
+    agent.router = ModelRouter.uniform(FakeChatModel(
+        {node: latency * args.scale for node, latency in NODE_LATENCIES.items()},
+        completions=load_fixture("completions"),
+        jitter=args.jitter,
+    ))
+    graph = agent.create_builder(pipelined=args.pipelined).compile()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "levels": [],
+    }
+    with tempfile.TemporaryDirectory() as memo_dir:
+        for n, concurrency in enumerate(args.concurrency):
+            level = run_level(graph, concurrency, args.runs, os.path.join(memo_dir, f"iata-{n}.json"))
+            report["levels"].append(level)
+            print_level(level)
+
+    output = args.output or os.path.join(".cache", "benchmarks", f"latency-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nsaved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Wall-clock comparison of the standard and pipelined itinerary graphs with fixed fake latencies.
+
+    python -m benchmarks.bench_pipelined --runs 3 --scale 0.1
+"""
+import argparse
+import time
+
+from benchmarks.fakes import FakeChatModel, FakeGoogleSearch
+
+from src import agent
+from src.utils import tools
+from src.utils.cache import search_cache
+from src.utils.models import ModelRouter
+from src.utils.state import ItineraryAgentState
+
+# Typical GPT-4 latencies in seconds: the recommendations are short, the itinerary is ~2k tokens
+NODE_LATENCIES = {
+    "get_flight_recommendation": 8.0,
+    "get_hotel_recommendation": 10.0,
+    "generate_itinerary": 30.0,
+    "draft_itinerary": 26.0,
+}
+SEARCH_LATENCY = 2.0
+
+
+def run_once(graph, state: ItineraryAgentState) -> float:
+    search_cache.clear()
+    start = time.perf_counter()
+    graph.invoke(state)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=0.1, help="multiplier applied to every fake latency")
+    args = parser.parse_args()
+
+    FakeGoogleSearch.latency = SEARCH_LATENCY * args.scale
+    tools.GoogleSearch = FakeGoogleSearch
+    agent.router = ModelRouter.uniform(FakeChatModel({node: latency * args.scale for node, latency in NODE_LATENCIES.items()}))
+
+    state = ItineraryAgentState(
+        origin="BKK",
+        destination="CNX",
+        departure_date="2099-09-20",
+        return_date="2099-09-22"
+    )
+
+    standard_graph = agent.create_builder(pipelined=False).compile()
+    results = {}
+    for name, graph in (("standard", standard_graph), ("pipelined", agent.pipelined_graph)):
+        timings = [run_once(graph, state) for _ in range(args.runs)]
+        results[name] = sum(timings) / len(timings)
+        print(f"{name:>10}: {results[name]:.3f}s mean over {args.runs} runs")
+
+    saved = results["standard"] - results["pipelined"]
+    print(f"{'saved':>10}: {saved:.3f}s ({saved / results['standard']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Prompt size of the recommendation nodes' option payloads: Python repr vs the compact tables.
+
+Exits non-zero when a compact payload exceeds its token budget; tests/test_prompt_size.py pins the same budgets.
+
+    python -m benchmarks.bench_prompt_size
+"""
+import sys
+from typing import Dict, Tuple
+
+from benchmarks.fakes import load_fixture
+
+from src.utils.ranking import rank_flights, rank_hotels
+from src.utils.serializers import estimate_tokens, format_flight_options, format_hotel_options
+from src.utils.tools import parse_flights, parse_hotels
+
+# Budgets for the recorded fixtures, in estimated tokens
+TOKEN_BUDGETS = {
+    "flight_options": 150,
+    "hotel_options": 375,
+}
+
+
+def payloads() -> Dict[str, Tuple[str, str]]:
+    """
+    (repr, compact) option payload per recommendation node, for the recorded fixtures.
+    """
+    # Same top-5 candidates the search nodes hand to the recommendation nodes
+    flight_options = rank_flights(parse_flights(load_fixture("google_flights")))
+    hotel_options = rank_hotels(parse_hotels(load_fixture("google_hotels")))
+
+    return {
+        "flight_options": (f"Flight options: {flight_options}", f"Flight options:\n{format_flight_options(flight_options)}"),
+        "hotel_options": (f"Hotel options: {hotel_options}", f"Hotel options:\n{format_hotel_options(hotel_options)}"),
+    }
+
+
+def main() -> int:
+    over_budget = False
+    print(f"{'payload':<16}{'repr':>8}{'compact':>10}{'saved':>8}{'budget':>8}")
+    for name, (before, after) in payloads().items():
+        before_tokens, after_tokens = estimate_tokens(before), estimate_tokens(after)
+        budget = TOKEN_BUDGETS[name]
+        over_budget |= after_tokens > budget
+        print(f"{name:<16}{before_tokens:>8}{after_tokens:>10}{1 - after_tokens / before_tokens:>8.0%}{budget:>8}"
+              + ("  OVER BUDGET" if after_tokens > budget else ""))
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Latency of requests the graph rejects, with validation first versus after airport resolution.
+
+    python -m benchmarks.bench_rejected --runs 200 --iata-latency 1.0
+
+Names missing from the local airport index fall back to the (fake) LLM, so with the old order
+an invalid request still waited for that call before validation turned it down. The fake's
+answer isn't valid JSON, so nothing is memoized and every run pays for the call.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.fakes import FakeChatModel
+
+from langgraph.graph import END, StateGraph
+
+from src import agent
+from src.utils.models import ModelRouter
+from src.utils.nodes import validate_request
+from src.utils.state import ItineraryAgentState
+
+REJECTED = {
+    "past dates": dict(origin="Atlantis", destination="Chiang Mai", departure_date="2020-01-10", return_date="2020-01-12"),
+    "inverted dates": dict(origin="Atlantis", destination="Chiang Mai", departure_date="2099-01-12", return_date="2099-01-10"),
+    "bad date format": dict(origin="Atlantis", destination="Chiang Mai", departure_date="12/01/2099", return_date="2099-01-14"),
+    "bad IATA code": dict(origin="BK1", destination="Chiang Mai", departure_date="2099-01-10", return_date="2099-01-12"),
+}
+
+
+def resolve_first_graph():
+    """
+    The previous entry order: resolve airports, then validate.
+    """
+    builder = StateGraph(ItineraryAgentState)
+    builder.add_node("update_airport_codes", agent.update_airport_codes)
+    builder.add_node("validate_request", validate_request)
+    builder.set_entry_point("update_airport_codes")
+    builder.add_edge("update_airport_codes", "validate_request")
+    builder.add_edge("validate_request", END)
+    return builder.compile()
+
+
+def timed_ms(func, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--iata-latency", type=float, default=1.0, help="seconds for the fake IATA lookup LLM call")
+    args = parser.parse_args()
+
+    agent.router = ModelRouter.uniform(FakeChatModel({}, default_latency=args.iata_latency))
+    validate_first = agent.create_builder().compile()
+    resolve_first = resolve_first_graph()
+
+    print(f"{'request':<18}{'pre-check':>12}{'graph':>12}{'resolve first':>16}   (median ms)")
+    for name, fields in REJECTED.items():
+        state = ItineraryAgentState(**fields)
+        assert not validate_first.invoke(state)["is_valid_date"]
+
+        check = timed_ms(lambda: validate_request(state), args.runs)
+        graph = timed_ms(lambda: validate_first.invoke(state), args.runs)
+        old = timed_ms(lambda: resolve_first.invoke(state), max(1, min(args.runs, 5)))
+        print(f"{name:<18}{check:>12.4f}{graph:>12.3f}{old:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
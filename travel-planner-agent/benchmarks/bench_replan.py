@@ -0,0 +1,90 @@
+"""
+Latency of re-planning a trip after a one-input edit, full plan versus diff-aware re-plan.
+
+    python -m benchmarks.bench_replan --runs 5 --scale 0.05
+
+Each edit starts from a finished plan on its own thread. The full plan runs the whole graph
+again with the edited inputs, the re-plan sends only the changed inputs to the nodes that read
+them (src/utils/replan.py). The search cache is cleared before every run and the LLM cache is
+off, so the difference is only the nodes that didn't run. The itinerary is regenerated either
+way and is the longest call, so the saving is mostly in LLM calls and searches rather than in
+wall time, unless the kept branch was the slower one.
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+from benchmarks.bench_latency import NODE_LATENCIES, SEARCH_LATENCY
+from benchmarks.fakes import FakeChatModel, FakeGoogleSearch, load_fixture
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src import agent
+from src.utils import tools
+from src.utils.cache import search_cache
+from src.utils.checkpoint import STATE_MODULES
+from src.utils.models import ModelRouter
+from src.utils.replan import replan
+
+TRIP = dict(origin="Bangkok", destination="Chiang Mai", departure_date="2099-01-10", return_date="2099-01-13")
+
+EDITS = {
+    "return date": {"return_date": "2099-01-15"},
+    "hotel preference": {"hotel_weights": {"price": 0.8, "rating": 0.1, "amenities": 0.1}},
+    "flight preference": {"flight_weights": {"price": 0.2, "duration": 0.6, "stops": 0.2}},
+    "fast mode": {"fast_mode": True},
+}
+
+
+def timed(func, model: FakeChatModel):
+    """
+    Run `func` and return its seconds, LLM calls and upstream searches.
+    """
+    search_cache.clear()
+    calls, searches = model.calls, search_cache.stats.misses
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start, model.calls - calls, search_cache.stats.misses - searches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=0.05, help="multiplier applied to every fake latency")
+    parser.add_argument("--pipelined", action="store_true", help="benchmark the pipelined graph")
+    args = parser.parse_args()
+
+    FakeGoogleSearch.latency = SEARCH_LATENCY * args.scale
+    tools.GoogleSearch = FakeGoogleSearch
+    model = FakeChatModel(
+        {node: latency * args.scale for node, latency in NODE_LATENCIES.items()},
+        completions=load_fixture("completions"),
+    )
+    agent.router = ModelRouter.uniform(model)
+    graph = agent.create_builder(pipelined=args.pipelined).compile(
+        checkpointer=InMemorySaver(serde=JsonPlusSerializer(allowed_msgpack_modules=STATE_MODULES))
+    )
+
+    print(f"{'edit':<20}{'full plan ms':>14}{'re-plan ms':>12}{'LLM calls':>12}{'searches':>12}")
+    for name, edit in EDITS.items():
+        edited = {**TRIP, **edit}
+        full, partial = [], []
+        for _ in range(args.runs):
+            full.append(timed(lambda: graph.invoke(edited, {"configurable": {"thread_id": str(uuid.uuid4())}}), model))
+
+            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            graph.invoke(TRIP, config)
+            partial.append(timed(lambda: replan(graph, config, TRIP, edited, pipelined=args.pipelined), model))
+
+        full_ms = statistics.median(seconds for seconds, _, _ in full) * 1000
+        partial_ms = statistics.median(seconds for seconds, _, _ in partial) * 1000
+        print(
+            f"{name:<20}{full_ms:>14.1f}{partial_ms:>12.1f}"
+            f"{f'{full[0][1]} -> {partial[0][1]}':>12}{f'{full[0][2]} -> {partial[0][2]}':>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
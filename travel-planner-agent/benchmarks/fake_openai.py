@@ -0,0 +1,157 @@
+"""
+Local OpenAI-compatible chat endpoint that answers with the recorded completions in
+benchmarks/fixtures, for exercising the model routing without a provider or Ollama.
+
+    python benchmarks/fake_openai.py --port 8766 --think --fail-models gpt-4o-mini
+    MODEL_CONFIG=my_models.json ...   # entries with "base_url": "http://127.0.0.1:8766/v1"
+
+The completion is picked from the system prompt, `--think` prefixes a <think> block like a
+reasoning model, and models listed in `--fail-models` answer 500 so the fallback chain is used.
+Repeated system prompts are reported as cached prompt tokens, as a provider prefix cache would.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# First matching phrase in the system prompt decides which recorded completion is returned
+PROMPT_ROUTES = [
+    ("IATA", "update_airport_codes"),
+    ("drafts the day-by-day", "draft_itinerary"),
+    ("Travel Planner", "generate_itinerary"),
+    ("flight options", "get_flight_recommendation"),
+    ("hotel options", "get_hotel_recommendation"),
+]
+
+
+def load_completions() -> dict:
+    with open(os.path.join(FIXTURES_DIR, "completions.json")) as f:
+        return json.load(f)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency: float = 0.0, think: bool = False, fail_models: List[str] = ()):
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency = latency
+        self.think = think
+        self.fail_models = set(fail_models)
+        self.completions = load_completions()
+        self.requests_by_model = {}
+        self.seen_prefixes = set()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def answer(self, messages: List[dict]) -> str:
+        system = " ".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+        user = (messages[-1].get("content") or "") if messages else ""
+
+        content = "Fake completion."
+        for phrase, node in PROMPT_ROUTES:
+            if phrase in system:
+                content = self.completions.get(node, content)
+                if node == "update_airport_codes":
+                    # Echo the requested names back with a made-up code each
+                    names = json.loads(user) if user.startswith("[") else []
+                    content = json.dumps({n: re.sub(r"[^A-Z]", "", n.upper())[:3].ljust(3, "X") for n in names})
+                break
+
+        if self.think:
+            content = f"<think>\nThe user wants {len(content)} characters. Let me think it through.\n</think>\n\n{content}"
+        return content
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = body.get("model", "")
+        with server._lock:
+            server.requests_by_model[model] = server.requests_by_model.get(model, 0) + 1
+
+        if not self.path.endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+        if model in server.fail_models:
+            return self._send_json(500, {"error": {"message": f"{model} is unavailable", "type": "server_error"}})
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        messages = body.get("messages", [])
+        content = server.answer(messages)
+
+        # Like a provider prefix cache: a system prompt seen before counts as cached tokens
+        prefix = "".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+        with server._lock:
+            cached = len(prefix) // 4 if prefix in server.seen_prefixes else 0
+            server.seen_prefixes.add(prefix)
+        usage = {
+            "prompt_tokens": sum(len(m.get("content") or "") for m in messages) // 4,
+            "completion_tokens": len(content) // 4,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": model}
+
+        if not body.get("stream"):
+            return self._send_json(200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunks = [{"role": "assistant", "content": ""}] + [{"content": w} for w in re.findall(r"\S+\s*|\s+", content)]
+        for i, delta in enumerate(chunks):
+            finish = "stop" if i == len(chunks) - 1 else None
+            self._send_event({**base, "object": "chat.completion.chunk",
+                              "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._send_event({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _send_event(self, data: dict):
+        self.wfile.write(f"data: {json.dumps(data)}\n\n".encode())
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--think", action="store_true", help="prefix completions with a <think> block")
+    parser.add_argument("--fail-models", nargs="*", default=[], help="models that always answer 500")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(("127.0.0.1", args.port), latency=args.latency, think=args.think, fail_models=args.fail_models)
+    print(f"Fake OpenAI endpoint listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,86 @@
+"""
+Local stand-in for https://serpapi.com/search.json that replays the recorded responses
+in benchmarks/fixtures, with optional injected latency and transient failures.
+
+    python benchmarks/fake_serpapi.py --port 8765 --latency 0.8
+    SERPAPI_BASE_URL=http://127.0.0.1:8765/search.json SERPAPI_API_KEY=fake ...
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(engine: str) -> dict:
+    with open(os.path.join(FIXTURES_DIR, f"{engine}.json")) as f:
+        return json.load(f)
+
+
+class FakeSerpAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency: float = 0.0, failure_rate: float = 0.0):
+        super().__init__(address, FakeSerpAPIHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fixtures = {engine: load_fixture(engine) for engine in ("google_flights", "google_hotels")}
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/search.json"
+
+    def start(self) -> "FakeSerpAPIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class FakeSerpAPIHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.request_count += 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        if random.random() < server.failure_rate:
+            return self._send(503, {"error": "Service temporarily unavailable"})
+
+        fixture = server.fixtures.get(query.get("engine"))
+        if fixture is None:
+            return self._send(400, {"error": f"Unsupported engine: {query.get('engine')}"})
+        self._send(200, fixture)
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = FakeSerpAPIServer(("127.0.0.1", args.port), latency=args.latency, failure_rate=args.failure_rate)
+    print(f"Fake SerpAPI listening on {server.url}")
+    server.serve_forever()
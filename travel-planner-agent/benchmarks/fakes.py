@@ -0,0 +1,90 @@
+"""
+Offline stand-ins for SerpAPI and the chat model, shared by the benchmark scripts.
+
+Import this module before anything from `src` so the environment defaults below apply.
+"""
+import json
+import os
+import random
+import time
+
+from langchain_core.messages import AIMessage
+from langgraph.config import get_config
+
+os.environ.setdefault("OPENAI_API_KEY", "fake")
+os.environ.setdefault("SERPAPI_API_KEY", "fake")
+os.environ.setdefault("SEARCH_CACHE_BACKEND", "memory")
+os.environ.setdefault("LLM_CACHE", "0")
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def jittered(latency: float, jitter: float) -> float:
+    """
+    `latency` scaled by a random factor in [1 - jitter, 1 + jitter].
+    """
+    return latency * random.uniform(1 - jitter, 1 + jitter) if jitter else latency
+
+
+def load_fixture(engine: str) -> dict:
+    with open(os.path.join(FIXTURES_DIR, f"{engine}.json")) as f:
+        return json.load(f)
+
+
+class FakeGoogleSearch:
+    """
+    Drop-in for `serpapi.GoogleSearch` that replays the recorded fixtures after `latency` seconds.
+    """
+    latency = 0.0
+    jitter = 0.0
+    fixtures = {engine: load_fixture(engine) for engine in ("google_flights", "google_hotels")}
+
+    def __init__(self, params: dict):
+        self.params = params
+
+    def get_dict(self) -> dict:
+        time.sleep(jittered(self.latency, self.jitter))
+        return json.loads(json.dumps(self.fixtures[self.params["engine"]]))
+
+
+class FakeChatModel:
+    """
+    Chat model stand-in that sleeps for the latency configured for the calling graph node.
+
+    `completions` maps node names to recorded completion text, e.g. `load_fixture("completions")`.
+    `completion_chars` pads each completion with seeded filler words, for benchmarks where
+    the size of the itinerary matters.
+    """
+    words = ("day", "visit", "temple", "market", "breakfast", "hotel", "check-in", "old city",
+             "night bazaar", "transfer", "airport", "lunch", "dinner", "museum", "walk", "THB")
+
+    def __init__(self, latencies: dict, default_latency: float = 0.0, completion_chars: int = 0, completions: dict = None,
+                 jitter: float = 0.0):
+        self.latencies = latencies
+        self.default_latency = default_latency
+        self.jitter = jitter
+        self.completions = completions or {}
+        self.completion_chars = completion_chars
+        self.calls = 0
+
+    def _filler(self) -> str:
+        rng = random.Random(self.calls)
+        text, size = [], 0
+        while size < self.completion_chars:
+            word = rng.choice(self.words)
+            text.append(word)
+            size += len(word) + 1
+        return " ".join(text)
+
+    def invoke(self, messages, config=None, **kwargs) -> AIMessage:
+        self.calls += 1
+        try:
+            node = get_config().get("metadata", {}).get("langgraph_node")
+        except RuntimeError:
+            node = None
+
+        time.sleep(jittered(self.latencies.get(node, self.default_latency), self.jitter))
+        content = self.completions.get(node, f"Fake completion for {node}.")
+        if self.completion_chars:
+            content += "\n" + self._filler()
+        return AIMessage(content=content)
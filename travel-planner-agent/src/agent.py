@@ -1,96 +1,92 @@
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 
 from langgraph.graph import START, StateGraph, END
 
 from src.utils.state import ItineraryAgentState
-from src.utils.nodes import validate_dates, get_flight_options, get_hotel_options
+from src.utils.checkpoint import checkpointer_from_env
+from src.utils.airports import is_iata, resolve_airport_codes
+from src.utils.llm_cache import invoke_with_cache
+from src.utils.metrics import instrument_builder, record_llm_call, start_metrics_server
+from src.utils.models import ModelRouter
+from src.utils.prompts import DRAFT_ITINERARY, FLIGHT_RECOMMENDATION, HOTEL_RECOMMENDATION, IATA_LOOKUP, ITINERARY
+from src.utils.serializers import format_flight_options, format_hotel_options
+from src.utils.ranking import templated_flight_recommendation, templated_hotel_recommendation
+from src.utils.nodes import validate_request, get_flight_options, get_hotel_options, aget_flight_options, aget_hotel_options
+from src.utils.nodes import search_date_window, asearch_date_window
 
 from datetime import datetime
+from typing import Dict, List
+import json
+import os
+import re
 
-llm = ChatOpenAI(model="gpt-4", temperature=0)
+# Model tiers and their fallback chains, see src/data/models.json
+router = ModelRouter.from_env()
+
+# The tier each LLM-calling node runs on
+NODE_TIERS = {
+    "update_airport_codes": "small",
+    "get_flight_recommendation": "mid",
+    "get_hotel_recommendation": "mid",
+    "draft_itinerary": "large",
+    "generate_itinerary": "large",
+}
+
+
+def model_for(node: str):
+    return router.for_tier(NODE_TIERS[node])
 
 
 def should_continue(state: ItineraryAgentState):
     if not state.is_valid_date:
         return END
     
+    if state.date_window_start:
+        return "search_date_window"
+    
     return ["get_flight_options", "get_hotel_options"]
 
-def is_iata(code: str) -> bool:
-    return isinstance(code, str) and len(code) == 3 and code.isalpha()
+def get_iata_codes(names: List[str]) -> Dict[str, str]:
+    messages = IATA_LOOKUP.messages(content=json.dumps(names))
+    
+    llm = model_for("update_airport_codes")
+    response = llm.invoke(messages)
+    record_llm_call(llm, messages, response)
+    
+    # Small models like to wrap the object in a code fence or a sentence
+    match = re.search(r"\{.*\}", response.content, flags=re.DOTALL)
+    try:
+        codes = json.loads(match.group(0) if match else response.content)
+    except ValueError:
+        return {}
+    return codes if isinstance(codes, dict) else {}
 
 
 def get_iata_from_name(name: str) -> str:
-    system_prompt = """
-    Given a city name, return ONLY the main airport's IATA code (3 letters).
-    If it's already an IATA code, just return it.
-    If multiple airports exist, choose the largest/primary one.
-    Output only the IATA code, nothing else.
-    """
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=name)
-    ]
-    
-    response = llm(messages)
-    return response.content
+    return get_iata_codes([name]).get(name, name)
     
     
     
 def update_airport_codes(state: ItineraryAgentState):
     
-    if is_iata(state.origin) and is_iata(state.destination):
-        return {"origin": state.origin, "destination": state.destination}
+    # Local index and memo first, one batched LLM call only for whatever is left
+    codes = resolve_airport_codes([state.origin, state.destination], fallback=get_iata_codes)
+    origin = codes.get(state.origin, state.origin)
+    destination = codes.get(state.destination, state.destination)
     
-    if not is_iata(state.origin):
-        origin = get_iata_from_name(state.origin)
-        
-    if not is_iata(state.destination):
-        destination = get_iata_from_name(state.destination)
+    # Don't spend searches on a name nothing could resolve
+    for name, code in ((state.origin, origin), (state.destination, destination)):
+        if not is_iata(code):
+            return {"is_valid_date": False, "validation_message": f"Could not find an airport for '{name}'."}
         
-    return {"origin": origin, "destination": destination}
+    return {
+        "origin": origin,
+        "destination": destination
+    }
     
 
-flight_agent_instructions = """
-
-Your are AI expert that provides in-depth analysis comparing flight options based on multiple factors. Analyze flight options and recommend the best one considering price, duration, stops, and overall convenience.
-
-Recommend the best flight from the available options, based on the details provided below:
-
-**Reasoning for Recommendation:**
-- **Price:** Provide a detailed explanation about why this flight offers the best value compared to others.
-- **Duration:** Explain why this flight has the best duration in comparison to others.
-- **Stops:** Discuss why this flight has minimal or optimal stops.
-- **Travel Class:** Describe why this flight provides the best comfort and amenities.
-
-Use the provided flight data as the basis for your recommendation. Be sure to justify your choice using clear reasoning for each attribute. Do not repeat the flight details in your response.
-"""
-
-
-hotel_agent_instructions = """
-
-Your are AI expert that provides in-depth analysis comparing hotel options based on multiple factors. Analyze hotel options and recommend the best one considering price, rating, location, and amenities.
-
-Based on the following analysis, generate a detailed recommendation for the best hotel. Your response should include clear reasoning based on price, rating, location, and amenities.
-
-**AI Hotel Recommendation**
-We recommend the best hotel based on the following analysis:
-
-**Reasoning for Recommendation**:
-- **Price:** The recommended hotel is the best option for the price compared to others, offering the best value for the amenities and services provided.
-- **Rating:** With a higher rating compared to the alternatives, it ensures a better overall guest experience. Explain why this makes it the best choice.
-- **Location:** The hotel is in a prime location, close to important attractions, making it convenient for travelers.
-- **Amenities:** The hotel offers amenities like Wi-Fi, pool, fitness center, free breakfast, etc. Discuss how these amenities enhance the experience, making it suitable for different types of travelers.
-
-**Reasoning Requirements**:
-- Ensure that each section clearly explains why this hotel is the best option based on the factors of price, rating, location, and amenities.
-- Compare it against the other options and explain why this one stands out.
-- Provide concise, well-structured reasoning to make the recommendation clear to the traveler.
-- Your recommendation should help a traveler make an informed decision based on multiple factors, not just one.
-"""
 
 
 def get_flight_recommendation(state: ItineraryAgentState):
@@ -99,11 +95,12 @@ def get_flight_recommendation(state: ItineraryAgentState):
     if not flight_options:
         return {"flight_data": "No flight options available."}
     
-    messages = [SystemMessage(content=flight_agent_instructions),
-                HumanMessage(content=f"Flight options: {flight_options}")]
+    if state.fast_mode:
+        return {"flight_data": templated_flight_recommendation(flight_options)}
     
+    messages = FLIGHT_RECOMMENDATION.messages(options=format_flight_options(flight_options))
     
-    recommended_flight = llm.invoke(messages)
+    recommended_flight = invoke_with_cache(model_for("get_flight_recommendation"), "get_flight_recommendation", messages, inputs=flight_options)
     
     return {"flight_data": recommended_flight.content}
 
@@ -114,110 +111,161 @@ def get_hotel_recommendation(state: ItineraryAgentState):
     if not hotel_options:
         return {"hotel_data": "No hotel options available."}
     
-    messages = [SystemMessage(content=hotel_agent_instructions),
-                HumanMessage(content=f"Hotel options: {hotel_options}")]
+    if state.fast_mode:
+        return {"hotel_data": templated_hotel_recommendation(hotel_options)}
     
-    recommended_hotel = llm.invoke(messages)
+    messages = HOTEL_RECOMMENDATION.messages(options=format_hotel_options(hotel_options))
+    
+    recommended_hotel = invoke_with_cache(model_for("get_hotel_recommendation"), "get_hotel_recommendation", messages, inputs=hotel_options)
     
     return {"hotel_data": recommended_hotel.content}
     
 
+def trip_days(departure_date: str, return_date: str) -> int:
+    return (datetime.strptime(return_date, "%Y-%m-%d") - datetime.strptime(departure_date, "%Y-%m-%d")).days
+
+
 def generate_itinerary(state: ItineraryAgentState):
     
-    flight_data = state.flight_data
-    hotel_data = state.hotel_data
+    # Trip length goes in the human message, the system prompt stays identical across calls
+    messages = ITINERARY.messages(
+        flight_data=state.flight_data,
+        hotel_data=state.hotel_data,
+        destination=state.destination,
+        departure_date=state.departure_date,
+        return_date=state.return_date,
+        days=trip_days(state.departure_date, state.return_date),
+    )
+    
+    result = invoke_with_cache(model_for("generate_itinerary"), "generate_itinerary", messages)
+        
+    return {"itinerary": result.content}
+
+
+
+def draft_itinerary(state: ItineraryAgentState):
     
-    destination = state.destination
-    departure_date = state.departure_date
-    return_date = state.return_date
+    flight_options = state.flight_options
+    hotel_options = state.hotel_options
     
-    days = (datetime.strptime(departure_date, "%Y-%m-%d") - datetime.strptime(return_date, "%Y-%m-%d")).days
+    # The recommendation isn't known yet, so anchor the draft on the leading candidates
+    messages = DRAFT_ITINERARY.messages(
+        destination=state.destination,
+        departure_date=state.departure_date,
+        return_date=state.return_date,
+        days=trip_days(state.departure_date, state.return_date),
+        arrival_time=(flight_options[0].arrival_time if flight_options else None) or "N/A",
+        hotel_name=hotel_options[0].name if hotel_options else "N/A",
+    )
     
+    result = invoke_with_cache(model_for("draft_itinerary"), "draft_itinerary", messages)
     
-    planner_agent_instructions = f"""
-Your are an AI Travel Planner Expert that create a detailed itinerary for the user based on flight and hotel information.
+    return {"itinerary_draft": result.content}
 
-Based on the following details, create a {days}-day itinerary for the user:
 
-The itinerary should include:
-- Flight arrival and departure information
-- Hotel check-in and check-out details
-- Day-by-day breakdown of activities
-- Must-visit attractions and estimated visit times
-- Restaurant recommendations for meals
-- Tips for local transportation
-- Estimated daily expenses 💰 and total trip cost
-
-**Format Requirements**:
-- Use markdown formatting with clear headings (# for main headings, ## for days, ### for sections)
-- Include emojis for different types of activities ( for landmarks, 🍽️ for restaurants, etc.)
-- Use bullet points for listing activities
-- Include estimated timings for each activity
-- Include estimated cost for each activity, meal, and transportation
-- Include total estimated cost at the end of the itinerary
-- Format the itinerary to be visually appealing and easy to read
-"""
+def assemble_itinerary(state: ItineraryAgentState):
     
-    user_message = f"""
+    itinerary = f"""# 🌍 Your Trip to {state.destination}
 
-**Flight Details**:
-{flight_data}
+**Travel Dates**: {state.departure_date} to {state.return_date}
 
-**Hotel Details**:
-{hotel_data}
+## ✈️ Flight
 
-**Destination**: {destination}
+{state.flight_data}
 
-**Travel Dates**: {departure_date} to {return_date} ({days} days)
-"""
+## 🏨 Hotel
 
-    
-    messages = [
-        SystemMessage(content=planner_agent_instructions),
-        HumanMessage(content=user_message)
-    ]
-    
-    result = llm.invoke(messages)
-        
-    return {"itinerary": result.content}
+{state.hotel_data}
 
+{state.itinerary_draft}
+"""
+    
+    return {"itinerary": itinerary}
 
 
-builder = StateGraph(ItineraryAgentState)
+def create_builder(pipelined: bool = False) -> StateGraph:
+    """
+    Build the itinerary graph.
+    
+    With `pipelined=True` the day-by-day body is drafted from the raw options in parallel
+    with the flight and hotel recommendations, and the itinerary is assembled without
+    a final LLM call once all three finish.
+    """
+    builder = StateGraph(ItineraryAgentState)
+
+    builder.add_node("validate_request", validate_request)
+    builder.add_node("update_airport_codes", update_airport_codes)
+    # Search nodes run their async version under ainvoke/astream (LangGraph server) and fall back to sync under invoke
+    builder.add_node("get_flight_options", RunnableLambda(get_flight_options, afunc=aget_flight_options))
+    builder.add_node("get_hotel_options", RunnableLambda(get_hotel_options, afunc=aget_hotel_options))
+    builder.add_node("search_date_window", RunnableLambda(search_date_window, afunc=asearch_date_window))
+
+    builder.add_node("get_flight_recommendation", get_flight_recommendation)
+    builder.add_node("get_hotel_recommendation", get_hotel_recommendation)
+
+    # Pure validation first, so rejected requests never reach airport resolution and its LLM fallback
+    builder.set_entry_point("validate_request")
+    builder.add_conditional_edges(
+        "validate_request",
+        lambda state: "update_airport_codes" if state.is_valid_date else END,
+        ["update_airport_codes", END]
+    )
 
-builder.add_node("update_airport_codes", update_airport_codes)
-builder.add_node("validate_dates", validate_dates)
-builder.add_node("get_flight_options", get_flight_options)
-builder.add_node("get_hotel_options", get_hotel_options)
+    builder.add_conditional_edges(
+        "update_airport_codes", 
+        should_continue,
+        {
+            "get_flight_options": "get_flight_options",
+            "get_hotel_options": "get_hotel_options",
+            "search_date_window": "search_date_window",
+            END: END
+        }
+    )
 
-builder.add_node("get_flight_recommendation", get_flight_recommendation)
-builder.add_node("get_hotel_recommendation", get_hotel_recommendation)
 
-builder.add_node("generate_itinerary", generate_itinerary)
+    builder.add_edge("get_flight_options", "get_flight_recommendation")
+    builder.add_edge("get_hotel_options", "get_hotel_recommendation")
+    
+    # Flexible dates: one node fetches both option lists for the chosen date pair
+    def after_date_window(state: ItineraryAgentState):
+        if not state.is_valid_date:
+            return END
+        
+        next_nodes = ["get_flight_recommendation", "get_hotel_recommendation"]
+        return next_nodes + ["draft_itinerary"] if pipelined else next_nodes
+    
+    builder.add_conditional_edges("search_date_window", after_date_window)
 
-builder.set_entry_point("update_airport_codes")
-builder.add_edge("update_airport_codes", "validate_dates")
+    if pipelined:
+        builder.add_node("draft_itinerary", draft_itinerary)
+        builder.add_node("assemble_itinerary", assemble_itinerary)
+        
+        builder.add_edge(["get_flight_options", "get_hotel_options"], "draft_itinerary")
+        builder.add_edge(["get_flight_recommendation", "get_hotel_recommendation", "draft_itinerary"], "assemble_itinerary")
+        builder.add_edge("assemble_itinerary", END)
+    else:
+        builder.add_node("generate_itinerary", generate_itinerary)
+        
+        builder.add_edge("get_flight_recommendation", "generate_itinerary")
+        builder.add_edge("get_hotel_recommendation", "generate_itinerary")
+        builder.add_edge("generate_itinerary", END)
+    
+    # Times every node and adds its metrics to the state update
+    return instrument_builder(builder)
 
-builder.add_conditional_edges(
-    "validate_dates", 
-    should_continue,
-    {
-        "get_flight_options": "get_flight_options",
-        "get_hotel_options": "get_hotel_options",
-        END: END
-    }
-)
 
+PIPELINED = os.getenv("ITINERARY_PIPELINED", "").lower() in ("1", "true", "yes")
 
-builder.add_edge("get_flight_options", "get_flight_recommendation")
-builder.add_edge("get_hotel_options", "get_hotel_recommendation")
+if os.getenv("METRICS_PORT"):
+    start_metrics_server(int(os.getenv("METRICS_PORT")))
 
-builder.add_edge("get_flight_recommendation", "generate_itinerary")
-builder.add_edge("get_hotel_recommendation", "generate_itinerary")
+# In-process runs only persist state when CHECKPOINT_DB is set, the LangGraph server brings its own
+checkpointer = checkpointer_from_env()
 
-builder.add_edge("generate_itinerary", END)
+builder = create_builder(pipelined=PIPELINED)
+graph = builder.compile(checkpointer=checkpointer)
 
-graph = builder.compile()
+pipelined_graph = create_builder(pipelined=True).compile(checkpointer=checkpointer)
 
 # Example usage (uncommented for testing)
 def run_itinerary_agent():
@@ -228,5 +276,5 @@ def run_itinerary_agent():
         return_date="2025-09-22"
     )
     
-    result = graph.invoke(initial_state)
+    result = graph.invoke(initial_state, {"configurable": {"thread_id": "example"}})
     return result
\ No newline at end of file
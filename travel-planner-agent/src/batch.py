@@ -0,0 +1,213 @@
+"""
+Plan itineraries for many trips in one run.
+
+    python -m src.batch trips.jsonl results.jsonl --concurrency 8
+
+Trips are read from JSONL or CSV with origin, destination, departure_date and return_date
+columns (plus an optional id and any other ItineraryAgentState field). Results are appended to
+the output JSONL as each trip finishes, and re-running the same command skips trips that already
+have a successful result, so a crashed batch resumes where it stopped.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from src.agent import create_builder, get_iata_codes
+from src.utils.airports import is_iata, resolve_airport_codes
+from src.utils.cache import search_cache
+from src.utils.nodes import candidate_date_pairs, validate_request
+from src.utils.state import ItineraryAgentState
+from src.utils.tools import asearch_flights, asearch_hotels
+
+RESULT_FIELDS = ("origin", "destination", "departure_date", "return_date", "is_valid_date",
+                 "validation_message", "flight_data", "hotel_data", "itinerary")
+
+
+def trip_id(trip: Dict[str, Any]) -> str:
+    if trip.get("id"):
+        return str(trip["id"])
+    # Every field, so trips differing only in weights, top_k or the date window stay apart
+    key = json.dumps({k: v for k, v in trip.items() if k != "id"}, sort_keys=True, default=str)
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def read_trips(path: str) -> List[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = [dict(row) for row in csv.DictReader(f)]
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    trips = []
+    for row in rows:
+        # Empty CSV cells mean "use the state default"
+        trip = {k: v for k, v in row.items() if v not in (None, "")}
+        trip["id"] = trip_id(trip)
+        trips.append(trip)
+    return trips
+
+
+def completed_ids(path: str) -> set:
+    """
+    Ids of trips with a successful result in an earlier run's output file.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash, that trip is simply planned again
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def resolve_trip_airports(trips: List[Dict[str, Any]]):
+    """
+    Resolve every distinct origin/destination name across the batch, with at most one LLM call.
+    """
+    names = [trip[field] for trip in trips for field in ("origin", "destination") if trip.get(field)]
+    codes = resolve_airport_codes(names, fallback=get_iata_codes)
+    for trip in trips:
+        for field in ("origin", "destination"):
+            trip[field] = codes.get(trip.get(field), trip.get(field))
+
+
+def _valid_state(trip: Dict[str, Any]) -> Optional[ItineraryAgentState]:
+    try:
+        state = ItineraryAgentState(**{k: v for k, v in trip.items() if k != "id"})
+    except ValueError:
+        return None
+    return state if validate_request(state)["is_valid_date"] else None
+
+
+def _is_valid_request(trip: Dict[str, Any]) -> bool:
+    return _valid_state(trip) is not None
+
+
+async def prefetch_searches(trips: List[Dict[str, Any]], concurrency: int):
+    """
+    Run each distinct flight and hotel search the graph runs will make once, up front. Call it
+    inside `search_cache.pinned()` so the runs read the results whatever the TTLs and cache size.
+    """
+    flight_keys, hotel_keys = set(), set()
+    for trip in trips:
+        state = _valid_state(trip)
+        # Trips the graph will reject never search, don't spend quota on them
+        if state is None or not (is_iata(state.origin) and is_iata(state.destination)):
+            continue
+        # Flexible-date trips search every candidate pair in their window
+        pairs = candidate_date_pairs(state) if state.date_window_start else [(state.departure_date, state.return_date)]
+        for departure_date, return_date in pairs:
+            flight_keys.add((state.origin, state.destination, departure_date, return_date))
+            hotel_keys.add((state.destination, departure_date, return_date))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(search, *args):
+        async with semaphore:
+            try:
+                await search(*args)
+            except Exception:
+                # The graph run retries the search and records the failure for that trip
+                pass
+
+    await asyncio.gather(
+        *[run(asearch_flights, *key) for key in flight_keys],
+        *[run(asearch_hotels, *key) for key in hotel_keys],
+    )
+
+
+async def run_batch(
+    trips: Iterable[Dict[str, Any]],
+    output_path: str,
+    concurrency: int = 4,
+    pipelined: bool = False,
+    prefetch: bool = True) -> Dict[str, int]:
+    """
+    Plan every trip not already in `output_path`, appending one JSON line per trip as it finishes.
+    """
+    trips = list(trips)
+    done = completed_ids(output_path)
+    inputs = {trip["id"]: trip for trip in trips if trip["id"] not in done}
+    summary = {"skipped": len(trips) - len(inputs), "ok": 0, "error": 0}
+    if not inputs:
+        return summary
+
+    # Airport resolution rewrites origin/destination, keep the inputs as given for the output file
+    pending = [dict(trip) for trip in inputs.values()]
+
+    # Rejected trips fail validation before airport resolution in the graph too, skip their names here
+    resolve_trip_airports([trip for trip in pending if _is_valid_request(trip)])
+
+    graph = create_builder(pipelined=pipelined).compile()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Searches stay pinned for the whole batch, so each runs once even past its TTL
+    with search_cache.pinned(), open(output_path, "a", encoding="utf-8") as out:
+        if prefetch:
+            await prefetch_searches(pending, concurrency)
+
+        async def plan(trip: Dict[str, Any]):
+            async with semaphore:
+                start = time.perf_counter()
+                record = {"id": trip["id"], "input": inputs[trip["id"]]}
+                try:
+                    state = ItineraryAgentState(**{k: v for k, v in trip.items() if k != "id"})
+                    check = validate_request(state)
+                    # Same result the graph would give, without its per-run overhead
+                    result = {**state.model_dump(), **check} if not check["is_valid_date"] else await graph.ainvoke(state)
+                    record.update(status="ok", result={k: _jsonable(result.get(k)) for k in RESULT_FIELDS})
+                except Exception as e:
+                    record.update(status="error", error=f"{type(e).__name__}: {e}")
+                record["seconds"] = round(time.perf_counter() - start, 3)
+
+            # Single event loop thread, so whole lines are written without extra locking
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            summary[record["status"]] += 1
+
+        await asyncio.gather(*[plan(trip) for trip in pending])
+
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="trips as .jsonl or .csv")
+    parser.add_argument("output", help="results .jsonl, appended to and used to resume")
+    parser.add_argument("--concurrency", type=int, default=4, help="graph runs in flight at once")
+    parser.add_argument("--pipelined", action="store_true", help="use the pipelined graph")
+    parser.add_argument("--no-prefetch", action="store_true", help="skip the shared search prefetch")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run_batch(
+        read_trips(args.input),
+        args.output,
+        concurrency=args.concurrency,
+        pipelined=args.pipelined,
+        prefetch=not args.no_prefetch,
+    ))
+    print(f"ok: {summary['ok']}, errors: {summary['error']}, skipped (already done): {summary['skipped']}")
+
+
+if __name__ == "__main__":
+    main()
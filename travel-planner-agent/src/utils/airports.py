@@ -0,0 +1,172 @@
+import csv
+import difflib
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "airports.csv")
+DEFAULT_MEMO_PATH = os.path.join(".cache", "iata_lookup.json")
+
+# Words that don't help tell airports apart ("Chiang Mai International Airport" == "Chiang Mai")
+STOPWORDS = {"airport", "international", "intl", "the"}
+
+
+def is_iata(code: str) -> bool:
+    # isalpha alone also takes "東京都"
+    return isinstance(code, str) and len(code) == 3 and code.isascii() and code.isalpha()
+
+
+def normalize_name(name: str) -> str:
+    """
+    Fold case, accents and punctuation so "São Paulo", "sao-paulo" and "Sao Paulo Airport" match.
+    Letters of other scripts are kept, "กรุงเทพ" and "東京" must not both fold to "".
+    """
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    words = re.sub(r"[\W_]+", " ", text).split()
+    return " ".join(w for w in words if w not in STOPWORDS)
+
+
+class AirportIndex:
+    """
+    In-memory hash index from city names, airport names and aliases to IATA codes.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, str]], fuzzy_cutoff: float = 0.85):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.codes = set()
+        self.names: Dict[str, str] = {}
+        # Code-shaped aliases ("NYC" for JFK), the only thing allowed to replace a typed code
+        self.code_aliases: Dict[str, str] = {}
+
+        for row in rows:
+            code = row["iata"].strip().upper()
+            self.codes.add(code)
+
+            aliases = [a for a in (row.get("aliases") or "").split("|") if a.strip()]
+            for alias in aliases:
+                alias = alias.strip()
+                if is_iata(alias) and alias.isupper() and alias != code:
+                    self.code_aliases.setdefault(alias, code)
+            for name in [row["city"], row["airport"], *aliases]:
+                key = normalize_name(name)
+                # Rows are ordered primary airport first, so the first code wins for a city
+                if key and key not in self.names:
+                    self.names[key] = code
+
+        self._keys = list(self.names)
+
+    @classmethod
+    def load(cls, path: str = DATA_PATH) -> "AirportIndex":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(csv.DictReader(f))
+
+    def lookup(self, name: str) -> Optional[str]:
+        """
+        Resolve a city/airport name or IATA code, returning None when nothing matches.
+        """
+        if not isinstance(name, str) or not name.strip():
+            return None
+
+        text = name.strip()
+        if is_iata(text) and text.isupper():
+            # Typed as a code: keep it even if the table doesn't know it (NAN is Nadi, not NNT)
+            return self.code_aliases.get(text, text)
+        if is_iata(text) and text.upper() in self.codes:
+            return text.upper()
+
+        key = normalize_name(name)
+        if key in self.names:
+            return self.names[key]
+
+        matches = difflib.get_close_matches(key, self._keys, n=1, cutoff=self.fuzzy_cutoff)
+        if matches:
+            return self.names[matches[0]]
+        return None
+
+
+class IataMemo:
+    """
+    JSON file of names the index couldn't resolve, with the code the LLM returned for them.
+    """
+
+    def __init__(self, path: str = DEFAULT_MEMO_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, str]] = None
+
+    def _load(self) -> Dict[str, str]:
+        if self._data is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, name: str) -> Optional[str]:
+        key = normalize_name(name)
+        if not key:
+            return None
+        with self._lock:
+            return self._load().get(key)
+
+    def update(self, codes: Dict[str, str]):
+        # A name of nothing but punctuation has no key, and must not answer for every other one
+        entries = {key: code for key, code in ((normalize_name(name), code) for name, code in codes.items()) if key}
+        if not entries:
+            return
+        with self._lock:
+            data = self._load()
+            data.update(entries)
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+airport_index = AirportIndex.load()
+iata_memo = IataMemo(os.getenv("IATA_MEMO_PATH", DEFAULT_MEMO_PATH))
+
+
+def resolve_airport_codes(
+    names: List[str],
+    fallback: Optional[Callable[[List[str]], Dict[str, str]]] = None) -> Dict[str, str]:
+    """
+    Resolve names to IATA codes using the bundled index, then the on-disk memo, and only
+    then `fallback` (e.g. an LLM), called once with every name still unresolved.
+
+    Names that can't be resolved are left out of the returned mapping.
+    """
+    resolved = {}
+    unresolved = []
+
+    for name in dict.fromkeys(names):
+        code = airport_index.lookup(name) or iata_memo.get(name)
+        if code is None and is_iata(name.strip()):
+            # Unknown to the index but already shaped like a code, pass it through
+            code = name.strip().upper()
+
+        if code is not None:
+            resolved[name] = code
+        else:
+            unresolved.append(name)
+
+    if unresolved and fallback is not None:
+        answers = {
+            name: code.strip().upper()
+            for name, code in fallback(unresolved).items()
+            if name in unresolved and isinstance(code, str) and is_iata(code.strip())
+        }
+        if answers:
+            iata_memo.update(answers)
+        resolved.update(answers)
+
+    return resolved
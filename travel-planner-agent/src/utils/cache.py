@@ -0,0 +1,288 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Fares go stale in minutes, hotel lists in hours.
+DEFAULT_TTLS = {
+    "google_flights": 15 * 60,
+    "google_hotels": 6 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_SQLITE_PATH = os.path.join(".cache", "serpapi_cache.sqlite")
+
+
+class CacheStats:
+    """
+    Hit/miss/eviction counters for a cache. Every hit is one upstream call saved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU store bounded by number of entries.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: str, expires_at: float) -> int:
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk LRU store shared by every worker process pointing at the same file.
+    """
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at)")
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+            return row
+
+    def set(self, key: str, value: str, expires_at: float) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, time.time()),
+                )
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+                evicted = max(0, count - self.max_entries)
+                if evicted:
+                    self._conn.execute(
+                        """
+                        DELETE FROM cache_entries WHERE key IN (
+                            SELECT key FROM cache_entries ORDER BY accessed_at ASC LIMIT ?
+                        )
+                        """,
+                        (evicted,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return evicted
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+            return count
+
+
+# Results pinned for the current scope (see SearchCache.pinned), shared by every task and
+# thread that copies the context
+_pinned: ContextVar[Optional[Dict[str, dict]]] = ContextVar("pinned_searches", default=None)
+
+
+class SearchCache:
+    """
+    TTL-aware cache for SerpAPI responses, keyed on the engine and its search params.
+
+    Pass a `backend`, or `make_backend` to build it on first use.
+    """
+
+    def __init__(self, backend=None, ttls: Optional[Dict[str, float]] = None,
+                 make_backend: Optional[Callable[[], Any]] = None):
+        if backend is None and make_backend is None:
+            raise ValueError("SearchCache needs a backend or make_backend")
+        self._backend = backend
+        self._make_backend = make_backend
+        self._backend_lock = threading.Lock()
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stats = CacheStats()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = self._make_backend()
+        return self._backend
+
+    @classmethod
+    def from_env(cls) -> "SearchCache":
+        """
+        Build the cache from SEARCH_CACHE_* environment variables.
+
+        SEARCH_CACHE_BACKEND is "sqlite" (default) or "memory", SEARCH_CACHE_PATH and
+        SEARCH_CACHE_MAX_ENTRIES size the store, and SEARCH_CACHE_TTL_<ENGINE> overrides
+        the TTL in seconds for one engine, e.g. SEARCH_CACHE_TTL_GOOGLE_FLIGHTS=300.
+
+        The backend is opened on first use, importing the module doesn't create the SQLite file.
+        """
+
+        def make_backend():
+            max_entries = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+            if os.getenv("SEARCH_CACHE_BACKEND", "sqlite").lower() == "memory":
+                return MemoryCacheBackend(max_entries=max_entries)
+            return SQLiteCacheBackend(
+                path=os.getenv("SEARCH_CACHE_PATH", DEFAULT_SQLITE_PATH),
+                max_entries=max_entries,
+            )
+
+        ttls = {}
+        for engine in DEFAULT_TTLS:
+            value = os.getenv(f"SEARCH_CACHE_TTL_{engine.upper()}")
+            if value is not None:
+                ttls[engine] = float(value)
+        return cls(ttls=ttls, make_backend=make_backend)
+
+    @staticmethod
+    def make_key(params: Dict[str, Any]) -> str:
+        key_params = {k: v for k, v in params.items() if k != "api_key"}
+        return json.dumps(key_params, sort_keys=True, separators=(",", ":"), default=str)
+
+    def ttl_for(self, engine: str) -> float:
+        return self.ttls.get(engine, DEFAULT_TTL)
+
+    @staticmethod
+    @contextmanager
+    def pinned() -> Iterator[Dict[str, dict]]:
+        """
+        Keep every result fetched or served inside the block for the rest of the block, without
+        TTL or size limit, on top of the backend. A batch can prefetch its searches and have
+        its runs read them however long it takes and however many there are.
+        """
+        token = _pinned.set({})
+        try:
+            yield _pinned.get()
+        finally:
+            _pinned.reset(token)
+
+    def get(self, params: Dict[str, Any]) -> Optional[dict]:
+        key = self.make_key(params)
+        pinned = _pinned.get()
+        if pinned is not None and key in pinned:
+            self.stats.incr("hits")
+            return pinned[key]
+
+        entry = self.backend.get(key)
+        if entry is None:
+            self.stats.incr("misses")
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.time():
+            self.backend.delete(key)
+            self.stats.incr("expirations")
+            self.stats.incr("misses")
+            return None
+
+        self.stats.incr("hits")
+        value = json.loads(value)
+        if pinned is not None:
+            pinned[key] = value
+        return value
+
+    def set(self, params: Dict[str, Any], value: dict):
+        pinned = _pinned.get()
+        if pinned is not None:
+            pinned[self.make_key(params)] = value
+        ttl = self.ttl_for(params.get("engine", ""))
+        if ttl <= 0:
+            return
+        evicted = self.backend.set(self.make_key(params), json.dumps(value), time.time() + ttl)
+        if evicted:
+            self.stats.incr("evictions", evicted)
+
+    def clear(self):
+        self.backend.clear()
+
+
+search_cache = SearchCache.from_env()
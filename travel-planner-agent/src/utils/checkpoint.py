@@ -0,0 +1,153 @@
+"""
+SQLite checkpointer tuned for the itinerary graph.
+
+    python -m src.utils.checkpoint prune checkpoints.sqlite --keep-last 1
+
+Every super-step of a planning run saves the full state, including the option lists and the
+multi-KB itinerary. The stock SqliteSaver is tuned only through its public knobs: zlib for
+large blobs (the serializer), WAL with synchronous=NORMAL (the connection), and pruning of all
+but the latest checkpoints of each thread. Every put still commits, so a process crash loses
+nothing that was saved; synchronous=NORMAL only gives up the last commits on power loss.
+Fewer checkpoints per run come from `durability="exit"`, not from grouping commits.
+"""
+import argparse
+import os
+import sqlite3
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+DEFAULT_PATH = os.path.join(".cache", "checkpoints.sqlite")
+DEFAULT_COMPRESS_MIN_BYTES = 1024
+COMPRESSED_SUFFIX = "+zlib"
+
+# Types stored in the state, registered so msgpack round-trips them without warnings
+STATE_MODULES = [
+    ("src.utils.state", "FlightOption"),
+    ("src.utils.state", "HotelOption"),
+    ("src.utils.state", "FlightRankingWeights"),
+    ("src.utils.state", "HotelRankingWeights"),
+    ("src.utils.state", "ItineraryAgentState"),
+]
+
+
+class CompressedSerializer:
+    """
+    JsonPlusSerializer that zlib-compresses serialized values of at least `min_bytes`.
+
+    Compressed blobs are tagged by appending "+zlib" to the stored type, so rows written
+    before compression was enabled (or below the threshold) still load as-is.
+    """
+
+    def __init__(self, min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES, level: int = 6, serde=None):
+        self.min_bytes = min_bytes
+        self.level = level
+        self.serde = serde or JsonPlusSerializer(allowed_msgpack_modules=STATE_MODULES)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) >= self.min_bytes:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                return type_ + COMPRESSED_SUFFIX, compressed
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(COMPRESSED_SUFFIX):
+            type_, payload = type_[:-len(COMPRESSED_SUFFIX)], zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+def connect(path: str = DEFAULT_PATH) -> sqlite3.Connection:
+    """
+    Open the checkpoint database with WAL and the pragmas that suit many small writes.
+    """
+    if path != ":memory:" and os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only fsyncs at checkpoints, committed data survives an app crash
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-16000")
+    return conn
+
+
+def create_checkpointer(path: str = DEFAULT_PATH, compress: bool = True) -> SqliteSaver:
+    serde = CompressedSerializer() if compress else JsonPlusSerializer(allowed_msgpack_modules=STATE_MODULES)
+    return SqliteSaver(connect(path), serde=serde)
+
+
+def checkpointer_from_env() -> Optional[SqliteSaver]:
+    """
+    Build the checkpointer from CHECKPOINT_* environment variables, or return None when CHECKPOINT_DB is unset.
+
+    CHECKPOINT_COMPRESS=0 stores blobs uncompressed.
+    """
+    path = os.getenv("CHECKPOINT_DB")
+    if not path:
+        return None
+    return create_checkpointer(path, compress=os.getenv("CHECKPOINT_COMPRESS", "1").lower() not in ("0", "false", "no"))
+
+
+def prune_checkpoints(conn: sqlite3.Connection, keep_last: int = 1, thread_ids: Optional[List[str]] = None) -> int:
+    """
+    Delete all but the `keep_last` newest checkpoints of each thread, with their pending writes.
+
+    Checkpoint ids are time-ordered, so "newest" is the largest id. Returns the number of
+    checkpoints deleted.
+    """
+    thread_filter, params = "", [keep_last]
+    if thread_ids:
+        thread_filter = f"WHERE thread_id IN ({','.join('?' * len(thread_ids))})"
+        params = list(thread_ids) + params
+
+    with conn:
+        deleted = conn.execute(
+            f"""
+            DELETE FROM checkpoints WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, ROW_NUMBER() OVER (
+                        PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+                    ) AS rank
+                    FROM checkpoints {thread_filter}
+                ) WHERE rank > ?
+            )
+            """,
+            params,
+        ).rowcount
+        conn.execute(
+            """
+            DELETE FROM writes WHERE NOT EXISTS (
+                SELECT 1 FROM checkpoints c
+                WHERE c.thread_id = writes.thread_id
+                  AND c.checkpoint_ns = writes.checkpoint_ns
+                  AND c.checkpoint_id = writes.checkpoint_id
+            )
+            """
+        )
+    return deleted
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prune = subparsers.add_parser("prune", help="delete old checkpoints of every thread")
+    prune.add_argument("db", nargs="?", default=os.getenv("CHECKPOINT_DB", DEFAULT_PATH))
+    prune.add_argument("--keep-last", type=int, default=1, help="checkpoints to keep per thread")
+    prune.add_argument("--vacuum", action="store_true", help="give the freed pages back to the filesystem")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    deleted = prune_checkpoints(conn, keep_last=args.keep_last)
+    if args.vacuum:
+        conn.execute("VACUUM")
+    conn.close()
+    print(f"deleted {deleted} checkpoints from {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from pydantic import BaseModel
+
+from src.utils.cache import CacheStats, SQLiteCacheBackend
+from src.utils.metrics import record_llm_cache, record_llm_call
+
+DEFAULT_SQLITE_PATH = os.path.join(".cache", "llm_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_SIMILARITY = 0.97
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+class LLMCacheStats(CacheStats):
+
+    def __init__(self):
+        super().__init__()
+        self.semantic_hits = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        stats = super().as_dict()
+        stats["semantic_hits"] = self.semantic_hits
+        return stats
+
+
+class SemanticIndex:
+    """
+    Embedding vectors of cached inputs, so near-duplicate option sets can reuse a response.
+
+    Vectors are stored next to the response cache and scoped by model + system prompt,
+    only entries from the same scope are ever compared.
+    """
+
+    def __init__(self, path: str, embeddings, threshold: float = DEFAULT_SIMILARITY, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_embeddings (
+                key TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                vector TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_scope ON llm_embeddings (scope)")
+
+    def embed(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def nearest(self, scope: str, vector: List[float]) -> Optional[str]:
+        import numpy as np
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, vector FROM llm_embeddings WHERE scope = ?", (scope,)
+            ).fetchall()
+        if not rows:
+            return None
+
+        matrix = np.array([json.loads(v) for _, v in rows], dtype=np.float32)
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(scores))
+        return rows[best][0] if scores[best] >= self.threshold else None
+
+    def add(self, key: str, scope: str, vector: List[float]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_embeddings (key, scope, vector) VALUES (?, ?, ?)",
+                (key, scope, json.dumps(vector)),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM llm_embeddings WHERE rowid NOT IN (
+                    SELECT rowid FROM llm_embeddings ORDER BY rowid DESC LIMIT ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+
+class LLMResponseCache:
+    """
+    Cache of chat completions for deterministic (temperature=0) node calls.
+
+    Exact tier: hash of model, system prompt and the node's canonical inputs.
+    Semantic tier (optional): nearest cached input by embedding similarity within the same
+    model + system prompt scope.
+    """
+
+    def __init__(self, backend, ttl: float = DEFAULT_TTL, semantic: Optional[SemanticIndex] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.semantic = semantic
+        self._stats: Dict[str, LLMCacheStats] = {}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMResponseCache"]:
+        """
+        Build the cache from LLM_CACHE_* environment variables, or return None when LLM_CACHE=0.
+
+        LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES and LLM_CACHE_TTL size the store, and
+        LLM_CACHE_SEMANTIC=1 enables the embedding tier (threshold LLM_CACHE_SIMILARITY).
+        """
+        if os.getenv("LLM_CACHE", "1").lower() in ("0", "false", "no"):
+            return None
+
+        path = os.getenv("LLM_CACHE_PATH", DEFAULT_SQLITE_PATH)
+        max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        backend = SQLiteCacheBackend(path=path, max_entries=max_entries)
+
+        semantic = None
+        if os.getenv("LLM_CACHE_SEMANTIC", "").lower() in ("1", "true", "yes"):
+            from langchain_openai import OpenAIEmbeddings
+
+            semantic = SemanticIndex(
+                path,
+                OpenAIEmbeddings(model=os.getenv("LLM_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")),
+                threshold=float(os.getenv("LLM_CACHE_SIMILARITY", DEFAULT_SIMILARITY)),
+                max_entries=max_entries,
+            )
+
+        return cls(backend, ttl=float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL)), semantic=semantic)
+
+    def stats_for(self, node: str) -> LLMCacheStats:
+        with self._stats_lock:
+            if node not in self._stats:
+                self._stats[node] = LLMCacheStats()
+            return self._stats[node]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._stats_lock:
+            nodes = list(self._stats.items())
+        return {node: stats.as_dict() for node, stats in nodes}
+
+    @staticmethod
+    def make_scope(model: str, messages: List[BaseMessage]) -> str:
+        system_prompt = "".join(m.content for m in messages if isinstance(m, SystemMessage))
+        return hashlib.sha256(canonical_json([model, system_prompt]).encode()).hexdigest()
+
+    @staticmethod
+    def make_key(scope: str, inputs: str) -> str:
+        return hashlib.sha256(f"{scope}:{inputs}".encode()).hexdigest()
+
+    def _read(self, key: str) -> Optional[str]:
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            self.backend.delete(key)
+            return None
+        return value
+
+    def invoke(self, llm, node: str, messages: List[BaseMessage], inputs: Any = None) -> BaseMessage:
+        """
+        Return the cached completion for these inputs, or call `llm.invoke(messages)` and cache it.
+
+        `inputs` is what actually varies between calls, e.g. the raw option list, so changes to how
+        the prompt is formatted don't fragment the cache. Defaults to the non-system message contents.
+        """
+        stats = self.stats_for(node)
+        model = getattr(llm, "model_name", None) or type(llm).__name__
+        if inputs is None:
+            inputs = [m.content for m in messages if not isinstance(m, SystemMessage)]
+
+        scope = self.make_scope(model, messages)
+        serialized = canonical_json(inputs)
+        key = self.make_key(scope, serialized)
+
+        # A hit returns the whole completion at once, there are no tokens to stream to the UI
+        content = self._read(key)
+        if content is not None:
+            stats.incr("hits")
+            record_llm_cache(hit=True)
+            return AIMessage(content=content)
+
+        vector = None
+        if self.semantic is not None:
+            vector = self.semantic.embed(serialized)
+            similar_key = self.semantic.nearest(scope, vector)
+            content = self._read(similar_key) if similar_key else None
+            if content is not None:
+                stats.incr("hits")
+                stats.incr("semantic_hits")
+                record_llm_cache(hit=True)
+                return AIMessage(content=content)
+
+        stats.incr("misses")
+        record_llm_cache(hit=False)
+        response = llm.invoke(messages)
+        record_llm_call(llm, messages, response)
+
+        # A fallback model's answer is filed under that model, not served later as the primary's
+        answered_by = (getattr(response, "response_metadata", None) or {}).get("routed_model", model)
+        if answered_by != model:
+            scope = self.make_scope(answered_by, messages)
+            key = self.make_key(scope, serialized)
+
+        evicted = self.backend.set(key, response.content, time.time() + self.ttl)
+        if evicted:
+            stats.incr("evictions", evicted)
+        if vector is not None:
+            self.semantic.add(key, scope, vector)
+        return response
+
+
+llm_cache = LLMResponseCache.from_env()
+
+
+def invoke_with_cache(llm, node: str, messages: List[BaseMessage], inputs: Any = None) -> BaseMessage:
+    if llm_cache is None:
+        response = llm.invoke(messages)
+        record_llm_call(llm, messages, response)
+        return response
+    return llm_cache.invoke(llm, node, messages, inputs=inputs)
@@ -0,0 +1,330 @@
+"""
+Per-node timing, upstream call, token and cache counters for the itinerary graph.
+
+Every node registered on the builder is wrapped by `instrument_builder`, which times it and
+collects whatever the code running inside it records (SerpAPI and LLM calls, cache hits, tokens).
+The totals are returned in the node's state update under `node_metrics`, and accumulated
+process-wide for the Prometheus text endpoint started by `start_metrics_server`.
+"""
+import functools
+import inspect
+import threading
+import time
+import warnings
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableLambda
+
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# USD per 1K prompt / completion tokens, matched on the longest model name prefix
+MODEL_PRICES = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+NODE_FIELDS = ("seconds", "serpapi_calls", "llm_calls", "search_cache_hits", "llm_cache_hits",
+               "prompt_tokens", "completion_tokens", "static_prefix_tokens", "cached_prompt_tokens",
+               "cached_prompt_share", "cost_usd")
+
+# Metrics of the node currently running in this context, None outside a node. The lock guards
+# the values: a node's worker threads (copy_context) all add to the same span
+_current: ContextVar[Optional[Tuple[str, Dict[str, float], threading.Lock]]] = ContextVar("node_metrics", default=None)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms, rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, List[float]]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: Dict[str, str], amount: float = 1.0):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, labels: Dict[str, str], value: float):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts, then +Inf count and sum
+            counts = series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels(key: Tuple, extra: Tuple = ()) -> str:
+        pairs = key + extra
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                kind, help_text = self._help.get(name, ("counter", ""))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{self._labels(key)} {value:g}" for key, value in sorted(series.items())]
+
+            for name, series in sorted(self._histograms.items()):
+                _, help_text = self._help.get(name, ("histogram", ""))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for key, counts in sorted(series.items()):
+                    cumulative = 0.0
+                    for bound, count in zip(self.buckets, counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{self._labels(key, (('le', f'{bound:g}'),))} {cumulative:g}")
+                    cumulative += counts[len(self.buckets)]
+                    lines.append(f"{name}_bucket{self._labels(key, (('le', '+Inf'),))} {cumulative:g}")
+                    lines.append(f"{name}_sum{self._labels(key)} {counts[-1]:g}")
+                    lines.append(f"{name}_count{self._labels(key)} {cumulative:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+metrics.describe("itinerary_node_duration_seconds", "histogram", "Wall time of each graph node.")
+metrics.describe("itinerary_node_errors_total", "counter", "Graph node runs that raised.")
+metrics.describe("itinerary_tool_duration_seconds", "histogram", "Wall time of each tool call.")
+metrics.describe("itinerary_upstream_calls_total", "counter", "Calls that reached SerpAPI or the LLM provider.")
+metrics.describe("itinerary_cache_hits_total", "counter", "Search and LLM cache hits.")
+metrics.describe("itinerary_cache_misses_total", "counter", "Search and LLM cache misses.")
+metrics.describe("itinerary_llm_tokens_total", "counter", "Prompt and completion tokens sent to the LLM.")
+metrics.describe("itinerary_llm_cost_usd_total", "counter", "Estimated LLM cost in USD.")
+
+
+def current_node() -> str:
+    current = _current.get()
+    return current[0] if current else "none"
+
+
+def _add(field: str, amount: float):
+    current = _current.get()
+    if current is not None:
+        _, values, lock = current
+        with lock:
+            values[field] += amount
+
+
+def record_search(cache_hit: bool):
+    node = current_node()
+    outcome = "hits" if cache_hit else "misses"
+    metrics.inc(f"itinerary_cache_{outcome}_total", {"node": node, "cache": "search"})
+    if cache_hit:
+        _add("search_cache_hits", 1)
+
+
+def record_serpapi_call():
+    metrics.inc("itinerary_upstream_calls_total", {"node": current_node(), "service": "serpapi"})
+    _add("serpapi_calls", 1)
+
+
+def record_llm_cache(hit: bool):
+    outcome = "hits" if hit else "misses"
+    metrics.inc(f"itinerary_cache_{outcome}_total", {"node": current_node(), "cache": "llm"})
+    if hit:
+        _add("llm_cache_hits", 1)
+
+
+def model_price(model: str) -> Tuple[float, float]:
+    matches = [name for name in MODEL_PRICES if model.startswith(name)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else (0.0, 0.0)
+
+
+@functools.lru_cache(maxsize=64)
+def _system_tokens(text: str) -> int:
+    from src.utils.serializers import estimate_tokens
+    return estimate_tokens(text)
+
+
+def static_prefix_tokens(messages) -> int:
+    """
+    Tokens in the leading system messages, the part of the prompt that is identical across calls.
+    """
+    total = 0
+    for message in messages:
+        if message.type != "system":
+            break
+        total += _system_tokens(str(message.content))
+    return total
+
+
+def record_llm_call(llm, messages, response):
+    """
+    Count an upstream LLM call, with tokens from the provider's usage data when it reports it.
+    """
+    from src.utils.serializers import estimate_tokens
+
+    node = current_node()
+    # The model that actually answered, which for a fallback chain may not be the first one
+    model = (getattr(response, "response_metadata", None) or {}).get("model_name") \
+        or getattr(llm, "model_name", None) or type(llm).__name__
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt = usage.get("input_tokens") or sum(estimate_tokens(str(m.content)) for m in messages)
+    completion = usage.get("output_tokens") or estimate_tokens(str(response.content))
+    # Prompt tokens the provider served from its prefix cache (OpenAI reports 0 below 1024 tokens)
+    cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    prefix = static_prefix_tokens(messages)
+    prompt_price, completion_price = model_price(model)
+    cost = (prompt * prompt_price + completion * completion_price) / 1000
+
+    metrics.inc("itinerary_upstream_calls_total", {"node": node, "service": "llm"})
+    metrics.inc("itinerary_llm_tokens_total", {"node": node, "type": "prompt"}, prompt)
+    metrics.inc("itinerary_llm_tokens_total", {"node": node, "type": "completion"}, completion)
+    metrics.inc("itinerary_llm_tokens_total", {"node": node, "type": "cached_prompt"}, cached)
+    metrics.inc("itinerary_llm_tokens_total", {"node": node, "type": "static_prefix"}, prefix)
+    metrics.inc("itinerary_llm_cost_usd_total", {"node": node}, cost)
+    _add("llm_calls", 1)
+    _add("prompt_tokens", prompt)
+    _add("completion_tokens", completion)
+    _add("static_prefix_tokens", prefix)
+    _add("cached_prompt_tokens", cached)
+    _add("cost_usd", cost)
+
+
+@contextmanager
+def node_span(node: str) -> Iterator[Dict[str, float]]:
+    """
+    Time a node run and collect what is recorded inside it.
+    """
+    values = dict.fromkeys(NODE_FIELDS, 0)
+    lock = threading.Lock()
+    token = _current.set((node, values, lock))
+    start = time.perf_counter()
+    try:
+        yield values
+    except BaseException:
+        metrics.inc("itinerary_node_errors_total", {"node": node})
+        raise
+    finally:
+        with lock:
+            values["seconds"] = round(time.perf_counter() - start, 4)
+            values["cost_usd"] = round(values["cost_usd"], 6)
+            if values["prompt_tokens"]:
+                values["cached_prompt_share"] = round(values["cached_prompt_tokens"] / values["prompt_tokens"], 3)
+        metrics.observe("itinerary_node_duration_seconds", {"node": node}, values["seconds"])
+        _current.reset(token)
+
+
+def _with_metrics(node: str, result: Any, values: Dict[str, float]) -> Any:
+    if isinstance(result, dict):
+        return {**result, "node_metrics": {node: values}}
+    return result
+
+
+def instrument_node(node: str, runnable):
+    """
+    Wrap a node's runnable so each run is timed and reports its metrics in the state update.
+    """
+
+    def run(state, config):
+        with node_span(node) as values:
+            result = runnable.invoke(state, config)
+        return _with_metrics(node, result, values)
+
+    async def arun(state, config):
+        with node_span(node) as values:
+            result = await runnable.ainvoke(state, config)
+        return _with_metrics(node, result, values)
+
+    return RunnableLambda(run, afunc=arun, name=node)
+
+
+def instrument_builder(builder):
+    """
+    Instrument every node registered on a StateGraph builder, in place. Returns the builder.
+    """
+    for node, spec in list(builder.nodes.items()):
+        builder.nodes[node] = replace(spec, runnable=instrument_node(node, spec.runnable))
+    return builder
+
+
+def instrument_tool(func):
+    """
+    Decorator timing a tool function (sync or async), applied under `@tool`.
+    """
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                metrics.observe("itinerary_tool_duration_seconds", {"tool": name}, time.perf_counter() - start)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.observe("itinerary_tool_duration_seconds", {"tool": name}, time.perf_counter() - start)
+    return wrapper
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serve the metrics at http://host:port/metrics from a daemon thread, once per process.
+    """
+    global _server
+    if _server is not None:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        # e.g. a second server worker on the same port, the first one already serves the endpoint
+        warnings.warn(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
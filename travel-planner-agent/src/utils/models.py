@@ -0,0 +1,149 @@
+"""
+Chat model routing by tier, with a fallback chain per tier.
+
+Tiers and their chains come from a JSON config (src/data/models.json, or the file in MODEL_CONFIG):
+
+    {"tiers": {"small": [{"model": "gpt-4o-mini"}, {"model": "gpt-4"}], ...}}
+
+src/data/models.ollama.json is the opt-in variant that tries a local Ollama model first.
+
+Each entry takes the ChatOpenAI settings `model`, `base_url` (any OpenAI-compatible endpoint,
+e.g. Ollama or a local fake), `api_key` or `api_key_env`, `temperature`, `timeout`, `max_retries`
+and `streaming`. Models are tried in order until one returns a non-empty completion.
+"""
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models.json")
+
+# Reasoning models (deepseek-r1, qwq, ...) put their chain of thought before the answer
+THINK_BLOCK = re.compile(r"<think>.*?(?:</think>|$)", flags=re.DOTALL)
+
+
+def strip_think(content: Any) -> Any:
+    if isinstance(content, str) and "<think>" in content:
+        return THINK_BLOCK.sub("", content).strip()
+    return content
+
+
+class ModelRoutingError(RuntimeError):
+    """
+    Every model in a tier's fallback chain failed.
+    """
+
+    def __init__(self, tier: str, errors: List[str]):
+        super().__init__(f"All models for tier '{tier}' failed: " + "; ".join(errors))
+        self.tier = tier
+        self.errors = errors
+
+
+def build_chat_model(spec: Dict[str, Any]):
+    from langchain_openai import ChatOpenAI
+
+    api_key = spec.get("api_key") or os.getenv(spec.get("api_key_env", "OPENAI_API_KEY"))
+    return ChatOpenAI(
+        model=spec["model"],
+        base_url=spec.get("base_url"),
+        api_key=api_key,
+        temperature=spec.get("temperature", 0),
+        timeout=spec.get("timeout"),
+        # The next model in the chain is the retry, don't wait long on this one
+        max_retries=spec.get("max_retries", 1),
+        # streaming=True makes invoke emit token callbacks, which LangGraph forwards to
+        # stream_mode="messages" clients, stream_usage keeps the token counts for the metrics
+        streaming=spec.get("streaming", True),
+        stream_usage=True,
+    )
+
+
+class TieredModel:
+    """
+    A tier's fallback chain, used like a chat model: `invoke(messages)` returns an AIMessage.
+    """
+
+    def __init__(self, tier: str, specs: List[Dict[str, Any]], models: Optional[List[Any]] = None):
+        if not specs:
+            raise ValueError(f"Tier '{tier}' has no models configured")
+        self.tier = tier
+        self.specs = specs
+        self._models = models or [None] * len(specs)
+        self._lock = threading.Lock()
+
+    @property
+    def model_name(self) -> str:
+        return self.specs[0]["model"]
+
+    def _model(self, i: int):
+        # Built on first use, so a missing key for an unused fallback doesn't fail at import
+        with self._lock:
+            if self._models[i] is None:
+                self._models[i] = build_chat_model(self.specs[i])
+            return self._models[i]
+
+    def _accept(self, spec: Dict[str, Any], response, errors: List[str]):
+        content = strip_think(response.content)
+        if not content:
+            errors.append(f"{spec['model']}: empty completion")
+            return None
+        # Which model of the chain answered, the LLM cache files the response under it
+        metadata = {**response.response_metadata, "routed_model": spec["model"]}
+        return response.model_copy(update={"content": content, "response_metadata": metadata})
+
+    def invoke(self, messages: List[BaseMessage], config=None, **kwargs):
+        errors = []
+        for i, spec in enumerate(self.specs):
+            try:
+                response = self._model(i).invoke(messages, config=config, **kwargs)
+            except Exception as e:
+                errors.append(f"{spec['model']}: {type(e).__name__}: {e}")
+                continue
+            accepted = self._accept(spec, response, errors)
+            if accepted is not None:
+                return accepted
+        raise ModelRoutingError(self.tier, errors)
+
+    async def ainvoke(self, messages: List[BaseMessage], config=None, **kwargs):
+        errors = []
+        for i, spec in enumerate(self.specs):
+            try:
+                response = await self._model(i).ainvoke(messages, config=config, **kwargs)
+            except Exception as e:
+                errors.append(f"{spec['model']}: {type(e).__name__}: {e}")
+                continue
+            accepted = self._accept(spec, response, errors)
+            if accepted is not None:
+                return accepted
+        raise ModelRoutingError(self.tier, errors)
+
+
+class ModelRouter:
+
+    def __init__(self, tiers: Dict[str, TieredModel]):
+        self.tiers = tiers
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ModelRouter":
+        return cls({tier: TieredModel(tier, specs) for tier, specs in config["tiers"].items()})
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        with open(os.getenv("MODEL_CONFIG", DEFAULT_CONFIG_PATH), encoding="utf-8") as f:
+            return cls.from_config(json.load(f))
+
+    @classmethod
+    def uniform(cls, model, tiers=("small", "mid", "large")) -> "ModelRouter":
+        """
+        Serve every tier with one already-built chat model, e.g. a fake in the benchmarks.
+        """
+        name = getattr(model, "model_name", None) or type(model).__name__
+        return cls({tier: TieredModel(tier, [{"model": name}], models=[model]) for tier in tiers})
+
+    def for_tier(self, tier: str) -> TieredModel:
+        if tier not in self.tiers:
+            raise KeyError(f"No models configured for tier '{tier}', known tiers: {sorted(self.tiers)}")
+        return self.tiers[tier]
@@ -1,7 +1,19 @@
-from datetime import datetime
-from typing import TypedDict
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import datetime, timedelta
+from typing import List, Tuple, TypedDict
+
+import numpy as np
+
 from src.utils.state import ItineraryAgentState
-from src.utils.tools import search_flights_tool, search_hotels_tool
+from src.utils.validation import validate_request
+from src.utils.ranking import rank_flights, rank_hotels
+from src.utils.tools import search_flights_tool, search_hotels_tool, asearch_flights_tool, asearch_hotels_tool
+from src.utils.tools import search_flights, search_hotels, asearch_flights, asearch_hotels, parse_flights, parse_hotels
+
+# Searches in flight at once per flexible-date run, on top of the client's global limit
+DATE_WINDOW_CONCURRENCY = 4
 
 
 def get_flight_options(state: ItineraryAgentState):
@@ -13,7 +25,8 @@ def get_flight_options(state: ItineraryAgentState):
     }
     
     result = search_flights_tool.invoke(input_dict)
-    return {"flight_options": result.get("flights", [])}
+    options = rank_flights(result.get("flights", []), state.flight_weights, top_k=state.top_k)
+    return {"flight_options": options}
 
 
 def get_hotel_options(state: ItineraryAgentState):
@@ -24,32 +37,129 @@ def get_hotel_options(state: ItineraryAgentState):
     }
     
     result = search_hotels_tool.invoke(input_dict)
-    return {"hotel_options": result.get("hotels", [])}
+    options = rank_hotels(result.get("hotels", []), state.hotel_weights, top_k=state.top_k)
+    return {"hotel_options": options}
 
 
-def validate_dates(state: ItineraryAgentState):
+async def aget_flight_options(state: ItineraryAgentState):
+    input_dict = {
+        "origin": state.origin,
+        "destination": state.destination,
+        "departure_date": state.departure_date,
+        "return_date": state.return_date
+    }
     
-    departure_date = state.departure_date
-    return_date = state.return_date
+    result = await asearch_flights_tool.ainvoke(input_dict)
+    options = rank_flights(result.get("flights", []), state.flight_weights, top_k=state.top_k)
+    return {"flight_options": options}
+
+
+async def aget_hotel_options(state: ItineraryAgentState):
+    input_dict = {
+        "destination": state.destination,
+        "check_in_date": state.departure_date,
+        "check_out_date": state.return_date
+    }
     
-    try:
-        dep_date = datetime.strptime(departure_date, "%Y-%m-%d")
-        ret_date = datetime.strptime(return_date, "%Y-%m-%d")
-        today = datetime.today()
+    result = await asearch_hotels_tool.ainvoke(input_dict)
+    options = rank_hotels(result.get("hotels", []), state.hotel_weights, top_k=state.top_k)
+    return {"hotel_options": options}
+
 
-        # Check if dates are in the future
-        if dep_date < today or ret_date < today:
-            return {"is_valid_date": False, "validation_message": "Departure and return dates must be in the future."}
-        
-        # Check if return date is after departure date
-        if ret_date <= dep_date:
-            return {"is_valid_date": False, "validation_message": "Return date must be after departure date."}
-        
-        return {"is_valid_date": True, "validation_message": "Dates are valid."}
+def candidate_date_pairs(state: ItineraryAgentState) -> List[Tuple[str, str]]:
+    """
+    (departure, return) pairs for every allowed departure day in the window, evenly thinned
+    out to at most `max_date_candidates` to bound the number of searches.
+    """
+    start = datetime.strptime(state.date_window_start, "%Y-%m-%d").date()
+    end = datetime.strptime(state.date_window_end, "%Y-%m-%d").date()
     
-    except ValueError as e:
-        return {"is_valid_date": False, "validation_message": f"Invalid date format: {str(e)}"}
+    departures = [
+        start + timedelta(days=i)
+        for i in range((end - start).days + 1)
+        if not state.departure_weekdays or (start + timedelta(days=i)).weekday() in state.departure_weekdays
+    ]
+    if len(departures) > state.max_date_candidates:
+        picks = np.linspace(0, len(departures) - 1, state.max_date_candidates).round().astype(int)
+        departures = [departures[i] for i in sorted(set(picks))]
     
+    return [(d.isoformat(), (d + timedelta(days=state.trip_nights)).isoformat()) for d in departures]
+
+
+def pick_date_pair(state: ItineraryAgentState, pairs, flight_results, hotel_results):
+    """
+    Build the fare/rate matrix for all date pairs and return the state update for the cheapest one.
+    """
+    flights = [parse_flights(r) for r in flight_results]
+    hotels = [parse_hotels(r) for r in hotel_results]
+    
+    def cheapest(options):
+        prices = [o.price for o in options if o.price is not None]
+        return min(prices) if prices else np.nan
+    
+    # One row per date pair: cheapest fare, cheapest nightly rate, total for the stay
+    matrix = np.array([[cheapest(f), cheapest(h)] for f, h in zip(flights, hotels)], dtype=np.float64).reshape(-1, 2)
+    totals = matrix[:, 0] + matrix[:, 1] * state.trip_nights
+    
+    fare_calendar = [
+        {
+            "departure_date": dep,
+            "return_date": ret,
+            "flight_price": None if np.isnan(row[0]) else float(row[0]),
+            "hotel_price": None if np.isnan(row[1]) else float(row[1]),
+            "total_price": None if np.isnan(total) else float(total),
+        }
+        for (dep, ret), row, total in zip(pairs, matrix, totals)
+    ]
+    
+    if np.all(np.isnan(totals)):
+        return {"fare_calendar": fare_calendar, "is_valid_date": False, "validation_message": "No flight and hotel pair found in the date window."}
+    
+    best = int(np.nanargmin(totals))
+    departure_date, return_date = pairs[best]
+    return {
+        "departure_date": departure_date,
+        "return_date": return_date,
+        "flight_options": rank_flights(flights[best], state.flight_weights, top_k=state.top_k),
+        "hotel_options": rank_hotels(hotels[best], state.hotel_weights, top_k=state.top_k),
+        "fare_calendar": fare_calendar,
+    }
+
+
+def _safe(search, *args) -> dict:
+    try:
+        return search(*args)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def search_date_window(state: ItineraryAgentState):
+    pairs = candidate_date_pairs(state)
+    
+    with ThreadPoolExecutor(max_workers=DATE_WINDOW_CONCURRENCY) as pool:
+        # Each search runs in a copy of this context, so its calls count towards this node's metrics
+        flight_futures = [pool.submit(copy_context().run, _safe, search_flights, state.origin, state.destination, dep, ret) for dep, ret in pairs]
+        hotel_futures = [pool.submit(copy_context().run, _safe, search_hotels, state.destination, dep, ret) for dep, ret in pairs]
+        flight_results = [f.result() for f in flight_futures]
+        hotel_results = [f.result() for f in hotel_futures]
     
+    return pick_date_pair(state, pairs, flight_results, hotel_results)
 
-    
\ No newline at end of file
+
+async def asearch_date_window(state: ItineraryAgentState):
+    pairs = candidate_date_pairs(state)
+    semaphore = asyncio.Semaphore(DATE_WINDOW_CONCURRENCY)
+    
+    async def run(search, *args):
+        async with semaphore:
+            try:
+                return await search(*args)
+            except Exception as e:
+                return {"error": str(e)}
+    
+    results = await asyncio.gather(
+        *[run(asearch_flights, state.origin, state.destination, dep, ret) for dep, ret in pairs],
+        *[run(asearch_hotels, state.destination, dep, ret) for dep, ret in pairs],
+    )
+    
+    return pick_date_pair(state, pairs, results[:len(pairs)], results[len(pairs):])
@@ -0,0 +1,135 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.utils.state import FlightOption, FlightRankingWeights, HotelOption, HotelRankingWeights
+
+
+def _normalized_costs(values: Sequence[Optional[float]]) -> np.ndarray:
+    """
+    Min-max scale a metric to [0, 1] where 0 is best. Missing values get the worst cost.
+    """
+    costs = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if np.all(np.isnan(costs)):
+        return np.ones(len(costs))
+
+    low, high = np.nanmin(costs), np.nanmax(costs)
+    scaled = (costs - low) / (high - low) if high > low else np.zeros(len(costs))
+    return np.nan_to_num(scaled, nan=1.0)
+
+
+def pareto_front(costs: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of rows not dominated by any other row (lower cost is better in every column).
+    """
+    if len(costs) == 0:
+        return np.zeros(0, dtype=bool)
+    # dominates[j, i]: option j is no worse than i everywhere and strictly better somewhere
+    no_worse = np.all(costs[:, None, :] <= costs[None, :, :], axis=2)
+    better = np.any(costs[:, None, :] < costs[None, :, :], axis=2)
+    return ~np.any(no_worse & better, axis=0)
+
+
+def _select(costs: np.ndarray, weights: np.ndarray, top_k: int, pareto: bool) -> List[int]:
+    scores = costs @ weights
+    order = np.argsort(scores, kind="stable")
+    if not pareto:
+        return order[:top_k].tolist()
+
+    # Pareto-optimal options first, then fill up with the best-scoring dominated ones
+    front = pareto_front(costs)
+    ranked = [i for i in order if front[i]] + [i for i in order if not front[i]]
+    return [int(i) for i in ranked[:top_k]]
+
+
+def rank_flights(
+    options: List[FlightOption],
+    weights: Optional[FlightRankingWeights] = None,
+    top_k: int = 5,
+    pareto: bool = True) -> List[FlightOption]:
+    """
+    Return the `top_k` flights by weighted price, duration and stops.
+    """
+    if not options:
+        return []
+    weights = weights or FlightRankingWeights()
+
+    costs = np.column_stack([
+        _normalized_costs([o.price for o in options]),
+        _normalized_costs([o.duration_minutes for o in options]),
+        _normalized_costs([o.stops for o in options]),
+    ])
+    w = np.array([weights.price, weights.duration, weights.stops])
+    return [options[i] for i in _select(costs, w, top_k, pareto)]
+
+
+def rank_hotels(
+    options: List[HotelOption],
+    weights: Optional[HotelRankingWeights] = None,
+    top_k: int = 5,
+    pareto: bool = True) -> List[HotelOption]:
+    """
+    Return the `top_k` hotels by weighted price, rating and number of amenities.
+    """
+    if not options:
+        return []
+    weights = weights or HotelRankingWeights()
+
+    costs = np.column_stack([
+        _normalized_costs([o.price for o in options]),
+        _normalized_costs([None if o.rating is None else -o.rating for o in options]),
+        _normalized_costs([-len(o.amenities) for o in options]),
+    ])
+    w = np.array([weights.price, weights.rating, weights.amenities])
+    return [options[i] for i in _select(costs, w, top_k, pareto)]
+
+
+def _stops_label(stops: int) -> str:
+    return "nonstop" if stops == 0 else f"{stops} stop" + ("s" if stops > 1 else "")
+
+
+def templated_flight_recommendation(options: List[FlightOption]) -> str:
+    """
+    Recommendation text for the top-ranked flight, written without an LLM call.
+    """
+    best = options[0]
+    reasons = []
+    if best.price is not None and best.price == min(o.price for o in options if o.price is not None):
+        reasons.append("- **Price:** Cheapest of the options compared.")
+    elif best.price is not None:
+        reasons.append(f"- **Price:** THB {best.price:,.0f}, balanced against duration and stops.")
+    if best.duration_minutes is not None and best.duration_minutes == min(o.duration_minutes for o in options if o.duration_minutes is not None):
+        reasons.append("- **Duration:** Shortest total travel time.")
+    reasons.append(f"- **Stops:** {_stops_label(best.stops).capitalize()}.")
+
+    price = f"THB {best.price:,.0f}" if best.price is not None else "price N/A"
+    duration = f"{best.duration_minutes} min" if best.duration_minutes is not None else "duration N/A"
+    return (
+        f"**Recommended flight:** {best.airline}, {price}, {duration}, {_stops_label(best.stops)}, "
+        f"departs {best.departure_time or 'N/A'}, arrives {best.arrival_time or 'N/A'} ({best.travel_class or 'N/A'}).\n\n"
+        f"**Reasoning for Recommendation:**\n" + "\n".join(reasons)
+    )
+
+
+def templated_hotel_recommendation(options: List[HotelOption]) -> str:
+    """
+    Recommendation text for the top-ranked hotel, written without an LLM call.
+    """
+    best = options[0]
+    reasons = []
+    if best.price is not None and best.price == min(o.price for o in options if o.price is not None):
+        reasons.append("- **Price:** Lowest nightly rate of the options compared.")
+    elif best.price is not None:
+        reasons.append(f"- **Price:** THB {best.price:,.0f} per night, balanced against rating and amenities.")
+    if best.rating is not None:
+        reasons.append(f"- **Rating:** {best.rating} overall.")
+    if best.nearby_places:
+        reasons.append(f"- **Location:** Near {', '.join(best.nearby_places[:3])}.")
+    if best.amenities:
+        reasons.append(f"- **Amenities:** {', '.join(best.amenities[:6])}.")
+
+    price = f"THB {best.price:,.0f}/night" if best.price is not None else "price N/A"
+    return (
+        f"**Recommended hotel:** {best.name} ({price}).\n\n"
+        f"**Reasoning for Recommendation:**\n" + "\n".join(reasons)
+    )
@@ -0,0 +1,35 @@
+"""
+Diff-aware re-planning on a thread that already holds a finished plan.
+
+Instead of running the whole graph again, the changed inputs are written into the thread's
+checkpointed state and only the nodes that read them are run again, through a LangGraph
+`Command(update=..., goto=[...])`. Everything downstream of those nodes reruns through the
+graph's own edges, the rest (resolved airports, the other search, its recommendation) is kept.
+
+    command = replan_command(state, changed_inputs(previous_inputs, inputs))
+    graph.invoke(Command(**command), config)                                  # in-process
+    client.runs.stream(thread_id, assistant_id, input=None, command=command)  # LangGraph server
+"""
+from typing import Any, Dict
+
+from langgraph.types import Command
+
+from src.utils.replan_keys import changed_inputs, replan_command
+from src.utils.state import ItineraryAgentState
+
+
+def replan(graph, config, previous_inputs: Dict[str, Any], inputs: Dict[str, Any], pipelined: bool = False):
+    """
+    Re-plan the thread in `config` in-process with the new `inputs`, falling back to a full
+    run on the same thread. The graph needs a checkpointer. Returns the final state values.
+    """
+    state = graph.get_state(config).values
+    changed = changed_inputs(previous_inputs, inputs)
+    if state and not changed:
+        return state
+
+    command = replan_command(state, changed, pipelined)
+    if command is None:
+        # Every field is sent, so outputs of the previous plan don't leak into this one
+        return graph.invoke(ItineraryAgentState(**inputs).model_dump(exclude={"node_metrics"}), config)
+    return graph.invoke(Command(**command), config)
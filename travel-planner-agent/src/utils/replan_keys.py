@@ -0,0 +1,116 @@
+"""
+What a re-plan reruns for which changed inputs, and the command that does it.
+
+Only needs the state model and the request validation, so the Streamlit client can import it
+without loading the graph's nodes, the search clients and their caches.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.utils.state import ItineraryAgentState
+from src.utils.validation import validate_request
+
+# Trip inputs a client sends, the rest of the state is produced by the graph
+INPUT_FIELDS = (
+    "origin", "destination", "departure_date", "return_date",
+    "date_window_start", "date_window_end", "trip_nights", "departure_weekdays", "max_date_candidates",
+    "flight_weights", "hotel_weights", "top_k", "fast_mode",
+)
+
+# Inputs that can change without a full re-plan, and the first nodes that read them.
+# Changing anything else (origin, destination, the flexible-date window) plans from scratch.
+RERUN_FROM = {
+    "departure_date": ("get_flight_options", "get_hotel_options"),
+    "return_date": ("get_flight_options", "get_hotel_options"),
+    "top_k": ("get_flight_options", "get_hotel_options"),
+    "flight_weights": ("get_flight_options",),
+    "hotel_weights": ("get_hotel_options",),
+    "fast_mode": ("get_flight_recommendation", "get_hotel_recommendation"),
+}
+
+# Single edges out of the re-runnable nodes of the pipelined graph. The default graph has
+# no joins, LangGraph's own edges take a re-plan from the entries to generate_itinerary
+PIPELINED_EDGES = {
+    "get_flight_options": ("get_flight_recommendation",),
+    "get_hotel_options": ("get_hotel_recommendation",),
+}
+
+# Pipelined joins: the target only runs once every source ran in the same re-plan, so a
+# partial re-plan also runs the sources it would otherwise keep (served by the search and LLM caches)
+PIPELINED_JOINS = {
+    "draft_itinerary": ("get_flight_options", "get_hotel_options"),
+    "assemble_itinerary": ("get_flight_recommendation", "get_hotel_recommendation", "draft_itinerary"),
+}
+
+
+def changed_inputs(previous: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Inputs whose value differs from the previous request, compared after defaults and validation.
+    """
+    before = ItineraryAgentState(**previous)
+    after = ItineraryAgentState(**inputs)
+    return {
+        field: after.model_dump(include={field})[field]
+        for field in INPUT_FIELDS
+        if getattr(before, field) != getattr(after, field)
+    }
+
+
+def _reached(entries: Iterable[str], edges: Dict[str, tuple]) -> Set[str]:
+    reached, stack = set(), list(entries)
+    while stack:
+        node = stack.pop()
+        if node not in reached:
+            reached.add(node)
+            stack.extend(edges.get(node, ()))
+    return reached
+
+
+def rerun_nodes(changed: Iterable[str], pipelined: bool = False) -> List[str]:
+    """
+    Nodes to send the re-plan to, or an empty list when nothing the graph reads changed.
+    """
+    entries = {node for field in changed for node in RERUN_FROM[field]}
+    if not pipelined:
+        return sorted(entries)
+
+    # A join the re-plan reaches only fires if all its sources run, add the missing ones
+    # as entries and start over, joins are listed in graph order
+    while True:
+        reached = _reached(entries, PIPELINED_EDGES)
+        for target, sources in PIPELINED_JOINS.items():
+            if not reached & set(sources):
+                continue
+            missing = set(sources) - reached
+            if missing:
+                entries |= missing
+                break
+            reached |= _reached([target], PIPELINED_EDGES)
+        else:
+            return sorted(entries)
+
+
+def replan_command(state: Dict[str, Any], changed: Dict[str, Any], pipelined: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Build the `{"update": ..., "goto": [...]}` command that re-plans `state` with the `changed`
+    inputs, or return None when the trip has to be planned from scratch.
+
+    A full plan is needed when there is no finished plan to start from, the previous request
+    was rejected or used flexible dates, or an input without a shortcut (origin, destination,
+    date window) changed. New dates are validated here, a rejected change also plans from scratch
+    so the rejection isn't shown next to the old itinerary.
+    """
+    if not state or not state.get("is_valid_date") or state.get("date_window_start"):
+        return None
+    if not state.get("itinerary"):
+        return None
+    if any(field not in RERUN_FROM for field in changed):
+        return None
+
+    update = dict(changed)
+    if "departure_date" in changed or "return_date" in changed:
+        check = validate_request(ItineraryAgentState(**{**state, **update}))
+        if not check["is_valid_date"]:
+            return None
+        update.update(check)
+
+    return {"update": update, "goto": rerun_nodes(changed, pipelined)}
@@ -0,0 +1,94 @@
+from collections import Counter
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from src.utils.state import FlightOption, HotelOption
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Count prompt tokens with tiktoken when installed, otherwise estimate ~4 characters per token.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _cell(value: Any, max_len: int = 80) -> str:
+    text = "-" if value is None or value == "N/A" else str(value)
+    text = " ".join(text.split())
+    return text if len(text) <= max_len else text[:max_len - 1] + "…"
+
+
+def _table(header: List[str], rows: List[List[Any]]) -> str:
+    lines = ["\t".join(header)]
+    lines.extend("\t".join(_cell(value) for value in row) for row in rows)
+    return "\n".join(lines)
+
+
+def _format_price(price: Optional[float]) -> Optional[str]:
+    return None if price is None else f"{price:.0f}"
+
+
+def _shared_date(times: List[Optional[str]]) -> Optional[str]:
+    """
+    Return the date when every "YYYY-MM-DD HH:MM" time falls on it, so rows can show HH:MM only.
+    """
+    dates = {t[:10] for t in times if t and len(t) == 16}
+    if len(dates) == 1 and all(t and len(t) == 16 for t in times):
+        return dates.pop()
+    return None
+
+
+def format_flight_options(options: List[FlightOption]) -> str:
+    """
+    Serialize flight options as a compact tab-separated table for the LLM prompt.
+    """
+    date = _shared_date([t for o in options for t in (o.departure_time, o.arrival_time)])
+
+    def time_of(value: Optional[str]) -> Optional[str]:
+        return value[11:] if date and value else value
+
+    rows = [
+        [i, o.airline, _format_price(o.price), o.duration_minutes, time_of(o.departure_time),
+         time_of(o.arrival_time), o.stops, o.travel_class]
+        for i, o in enumerate(options, start=1)
+    ]
+    table = _table(["#", "airline", "price_thb", "duration_min", "depart", "arrive", "stops", "class"], rows)
+    return f"Date: {date}\n{table}" if date else table
+
+
+def format_hotel_options(options: List[HotelOption], max_places: int = 3) -> str:
+    """
+    Serialize hotel options as a compact tab-separated table for the LLM prompt.
+
+    Amenities shared by every hotel are listed once, the rest are replaced by short codes
+    from a legend, and nearby places are cut down to the first `max_places` names.
+    """
+    amenity_counts = Counter(a for o in options for a in dict.fromkeys(o.amenities))
+    shared = [a for a, n in amenity_counts.items() if n == len(options)] if len(options) > 1 else []
+    vocab = {a: f"a{i}" for i, (a, _) in enumerate(amenity_counts.most_common(), start=1) if a not in shared}
+
+    rows = []
+    for i, o in enumerate(options, start=1):
+        codes = [vocab[a] for a in dict.fromkeys(o.amenities) if a in vocab]
+        rows.append([i, o.name, _format_price(o.price), o.rating,
+                     ", ".join(o.nearby_places[:max_places]), ",".join(codes)])
+
+    lines = []
+    if shared:
+        lines.append("All hotels have: " + ", ".join(shared))
+    if vocab:
+        lines.append("Amenity codes: " + "; ".join(f"{code}={a}" for a, code in vocab.items()))
+    lines.append(_table(["#", "name", "price_per_night_thb", "rating", "nearby", "amenities"], rows))
+    return "\n".join(lines)
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import random
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+
+DEFAULT_BASE_URL = "https://serpapi.com/search.json"
+
+# Statuses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SerpAPIError(Exception):
+    pass
+
+
+class AsyncSerpAPIClient:
+    """
+    Async SerpAPI client with a pooled keep-alive connection, a concurrency limit, per-request
+    timeouts and retry with jittered exponential backoff.
+
+    httpx clients and asyncio semaphores belong to one event loop, so each loop that searches
+    gets its own pool and its own `max_concurrency` limit; the limit is per loop, not per
+    process. A loop's pool is closed when that loop shuts down, or by `aclose()`.
+
+    Point `base_url` (or SERPAPI_BASE_URL) at a local fake server to test without quota.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 8,
+        timeout: float = 20.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0):
+        self.base_url = base_url or os.getenv("SERPAPI_BASE_URL", DEFAULT_BASE_URL)
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Event loop -> (client, semaphore, closer)
+        self._per_loop: Dict[asyncio.AbstractEventLoop, Tuple] = {}
+
+    @classmethod
+    def from_env(cls) -> "AsyncSerpAPIClient":
+        return cls(
+            max_concurrency=int(os.getenv("SERPAPI_MAX_CONCURRENCY", 8)),
+            timeout=float(os.getenv("SERPAPI_TIMEOUT", 20.0)),
+            max_retries=int(os.getenv("SERPAPI_MAX_RETRIES", 3)),
+        )
+
+    async def _ensure_client(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        entry = self._per_loop.get(loop)
+        if entry is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            closer = self._close_on_loop_shutdown(loop, client)
+            # Registered before the first await, so concurrent first searches share one client
+            entry = self._per_loop[loop] = (client, asyncio.Semaphore(self.max_concurrency), closer)
+            await closer.__anext__()
+        return entry[0], entry[1]
+
+    async def _close_on_loop_shutdown(self, loop: asyncio.AbstractEventLoop,
+                                      client: httpx.AsyncClient) -> AsyncIterator[None]:
+        # Parked at the yield until the loop shuts down: asyncio.run (and uvicorn) close every
+        # live async generator first, which runs this finally on the client's own loop
+        try:
+            yield
+        finally:
+            self._per_loop.pop(loop, None)
+            await client.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retrying workers from synchronising on the same instant
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def search(self, params: Dict[str, Any]) -> dict:
+        """
+        Run a SerpAPI search and return the decoded JSON response.
+
+        Raises:
+            SerpAPIError: when every attempt timed out or hit a retryable status
+        """
+        client, semaphore = await self._ensure_client()
+        query = {**params, "api_key": self.api_key or os.environ["SERPAPI_API_KEY"], "output": "json"}
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff(attempt - 1))
+
+            # Only hold a slot while the request is in flight, not while backing off
+            async with semaphore:
+                try:
+                    response = await client.get(self.base_url, params=query)
+                except httpx.TransportError as e:
+                    last_error = f"{type(e).__name__}: {e}"
+                    continue
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = f"HTTP {response.status_code}"
+                continue
+
+            # SerpAPI reports bad requests as {"error": ...}, same as GoogleSearch.get_dict()
+            try:
+                return response.json()
+            except ValueError:
+                return {"error": f"Invalid response (HTTP {response.status_code})"}
+
+        raise SerpAPIError(f"SerpAPI request failed after {self.max_retries + 1} attempts: {last_error}")
+
+    async def aclose(self):
+        """
+        Close the running loop's pool now instead of at loop shutdown.
+        """
+        entry = self._per_loop.get(asyncio.get_running_loop())
+        if entry is not None:
+            # Closing the generator runs its finally, which closes the client
+            await entry[2].aclose()
+
+
+serpapi_client = AsyncSerpAPIClient.from_env()
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _LeaderAbandoned(Exception):
+    """
+    The leader was cancelled or interrupted before finishing; its followers claim the key again.
+    """
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one upstream call.
+
+    The first caller for a key (the leader) runs the call, every caller that arrives while
+    it is in flight waits for the leader's result instead of issuing its own request.
+    Only the leader's errors (Exception) are shared. If the leader itself is cancelled or
+    interrupted, the key is released and one of its followers takes over as leader.
+    `do` and `ado` keep separate in-flight tables: a sync caller blocked on an async leader's
+    result on the event loop thread would stop the very loop that has to produce it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Keyed by (is_async, key)
+        self._inflight: Dict[Tuple[bool, str], Future] = {}
+        self.calls = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def _claim(self, key: Tuple[bool, str], retry: bool = False) -> Tuple[Future, bool]:
+        with self._lock:
+            if not retry:
+                self.calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                if not retry:
+                    self.coalesced += 1
+                return future, False
+
+            future = Future()
+            self._inflight[key] = future
+            self.upstream_calls += 1
+            return future, True
+
+    def _release(self, key: Tuple[bool, str], future: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        key = (False, key)
+        retry = False
+        while True:
+            future, is_leader = self._claim(key, retry)
+            if is_leader:
+                break
+            try:
+                return future.result()
+            except _LeaderAbandoned:
+                retry = True
+
+        try:
+            result = fn()
+        except Exception as e:
+            self._release(key, future, error=e)
+            raise
+        except BaseException:
+            self._release(key, future, error=_LeaderAbandoned())
+            raise
+        self._release(key, future, result=result)
+        return result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        key = (True, key)
+        retry = False
+        while True:
+            future, is_leader = self._claim(key, retry)
+            if is_leader:
+                break
+            try:
+                # Shield so a cancelled follower doesn't cancel the shared future for everyone else
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderAbandoned:
+                retry = True
+
+        try:
+            result = await fn()
+        except Exception as e:
+            self._release(key, future, error=e)
+            raise
+        except BaseException:
+            # A cancelled leader (its client went away) must not fail the callers coalesced onto it
+            self._release(key, future, error=_LeaderAbandoned())
+            raise
+        self._release(key, future, result=result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "upstream_calls": self.upstream_calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
+
+
+search_singleflight = SingleFlight()
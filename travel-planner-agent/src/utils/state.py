@@ -1,22 +1,80 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Annotated
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Dict, Any, Annotated, Tuple
+
+
+class FlightOption(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
+    airline: str = "Unknown"
+    price: Optional[float] = None                 # THB, round trip
+    duration_minutes: Optional[int] = None
+    departure_time: Optional[str] = None          # format: YYYY-MM-DD HH:MM
+    arrival_time: Optional[str] = None            # format: YYYY-MM-DD HH:MM
+    stops: int = 0
+    travel_class: Optional[str] = None
+
+
+class HotelOption(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
+    name: str = "Unknown"
+    price: Optional[float] = None                 # THB, lowest rate per night
+    rating: Optional[float] = None
+    nearby_places: Tuple[str, ...] = ()
+    amenities: Tuple[str, ...] = ()
+    link: Optional[str] = None
+
+
+class FlightRankingWeights(BaseModel):
+    price: float = 0.5
+    duration: float = 0.3
+    stops: float = 0.2
+
+
+class HotelRankingWeights(BaseModel):
+    price: float = 0.4
+    rating: float = 0.4
+    amenities: float = 0.2
+
+
+def merge_node_metrics(left: Dict[str, Dict[str, float]], right: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    return {**(left or {}), **(right or {})}
+
 
 class ItineraryAgentState(BaseModel):
     
     origin: str
     destination: str
-    departure_date: str      # format: YYYY-MM-DD
-    return_date: str         # format: YYYY-MM-DD
+    departure_date: Optional[str] = None      # format: YYYY-MM-DD, picked by the search in flexible mode
+    return_date: Optional[str] = None         # format: YYYY-MM-DD, picked by the search in flexible mode
+    
+    # Flexible-date mode: search every departure in the window and keep the cheapest date pair
+    date_window_start: Optional[str] = None   # format: YYYY-MM-DD
+    date_window_end: Optional[str] = None     # format: YYYY-MM-DD, last possible departure
+    trip_nights: Optional[int] = None
+    departure_weekdays: List[int] = Field(default_factory=list)   # 0=Monday ... 6=Sunday, empty means any day
+    max_date_candidates: int = 10
+    fare_calendar: List[Dict[str, Any]] = Field(default_factory=list)
+    
+    # Only the top_k pre-ranked options per search are sent to the recommendation nodes
+    flight_weights: FlightRankingWeights = Field(default_factory=FlightRankingWeights)
+    hotel_weights: HotelRankingWeights = Field(default_factory=HotelRankingWeights)
+    top_k: int = 5
+    fast_mode: bool = False  # templated recommendations for the top-ranked options, no LLM call
     
     is_valid_date: Optional[bool] = None
     validation_message: Optional[str] = None
     
-    flight_options: List[Dict[str, Any]] = Field(default_factory=list)
-    hotel_options: List[Dict[str, Any]] = Field(default_factory=list)
+    flight_options: List[FlightOption] = Field(default_factory=list)
+    hotel_options: List[HotelOption] = Field(default_factory=list)
     
     flight_data: Optional[str] = None
     hotel_data: Optional[str] = None
     
+    itinerary_draft: Optional[str] = None    # pipelined mode only
     itinerary: Optional[str] = None
     
-    is_valid_date: Optional[bool] = None
\ No newline at end of file
+    # Per-node wall time, upstream calls, cache hits and tokens, see src/utils/metrics.py
+    node_metrics: Annotated[Dict[str, Dict[str, float]], merge_node_metrics] = Field(default_factory=dict)
+    
+    is_valid_date: Optional[bool] = None
@@ -1,21 +1,66 @@
-from functools import lru_cache
+import asyncio
 from typing import List, Optional, Any, Callable, Dict
 from serpapi import GoogleSearch
 from langchain_core.tools import tool
 
+from src.utils.cache import search_cache
+from src.utils.metrics import instrument_tool, record_search, record_serpapi_call
+from src.utils.serpapi_client import serpapi_client
+from src.utils.singleflight import search_singleflight
+from src.utils.state import FlightOption, HotelOption
+
 import os
 
-@lru_cache(maxsize=None)
-def search_flights(
+
+def serpapi_search(params: Dict[str, Any]) -> dict:
+    """
+    Run a SerpAPI search, serving repeated searches from the shared search cache.
+    Identical searches already in flight are coalesced into a single upstream call.
+    """
+    cached = search_cache.get(params)
+    record_search(cache_hit=cached is not None)
+    if cached is not None:
+        return cached
+
+    def fetch():
+        record_serpapi_call()
+        results = GoogleSearch({**params, "api_key": os.environ["SERPAPI_API_KEY"]}).get_dict()
+
+        # Don't cache failures, the next call should retry upstream
+        if "error" not in results:
+            search_cache.set(params, results)
+        return results
+
+    return search_singleflight.do(search_cache.make_key(params), fetch)
+
+
+async def aserpapi_search(params: Dict[str, Any]) -> dict:
+    """
+    Async version of `serpapi_search` using the pooled, concurrency-limited client.
+    Cache reads and writes can hit SQLite, so they run in a worker thread, off the event loop.
+    """
+    cached = await asyncio.to_thread(search_cache.get, params)
+    record_search(cache_hit=cached is not None)
+    if cached is not None:
+        return cached
+
+    async def fetch():
+        record_serpapi_call()
+        results = await serpapi_client.search(params)
+
+        if "error" not in results:
+            await asyncio.to_thread(search_cache.set, params, results)
+        return results
+
+    return await search_singleflight.ado(search_cache.make_key(params), fetch)
+
+
+def flight_search_params(
     origin: str,
     destination: str,
     departure_date: str,
-    return_date: Optional[str]) -> dict:
-    """
-    Search flights between two airports using SerpAPI Google Flights and return available options.
-    """
-    params = {
-        "api_key": os.environ["SERPAPI_API_KEY"],
+    return_date: Optional[str]) -> Dict[str, Any]:
+    return {
         "engine": "google_flights",
         "hl": "en",
         "gl": "th",
@@ -25,22 +70,13 @@ def search_flights(
         "return_date": return_date,
         "currency": "THB"
     }
-    
-    results = GoogleSearch(params).get_dict()
-    return results
 
 
-@lru_cache(maxsize=None)
-def search_hotels(
-    destination: str, 
-    check_in_date: str, 
-    check_out_date: str) -> dict:
-    """
-    Search hotels in a location using SerpAPI Google Hotels and return available options.
-    """
-    
-    params = {
-        "api_key": os.environ["SERPAPI_API_KEY"],
+def hotel_search_params(
+    destination: str,
+    check_in_date: str,
+    check_out_date: str) -> Dict[str, Any]:
+    return {
         "engine": "google_hotels",
         "hl": "en",
         "gl": "th",
@@ -51,12 +87,103 @@ def search_hotels(
         "sort_by": 3,
         "rating": 8
     }
-    
-    results = GoogleSearch(params).get_dict()
-    return results
+
+
+def search_flights(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: Optional[str]) -> dict:
+    """
+    Search flights between two airports using SerpAPI Google Flights and return available options.
+    """
+    params = flight_search_params(origin, destination, departure_date, return_date)
+    return serpapi_search(params)
+
+
+async def asearch_flights(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: Optional[str]) -> dict:
+    """
+    Async version of `search_flights`.
+    """
+    params = flight_search_params(origin, destination, departure_date, return_date)
+    return await aserpapi_search(params)
+
+
+def search_hotels(
+    destination: str,
+    check_in_date: str,
+    check_out_date: str) -> dict:
+    """
+    Search hotels in a location using SerpAPI Google Hotels and return available options.
+    """
+    params = hotel_search_params(destination, check_in_date, check_out_date)
+    return serpapi_search(params)
+
+
+async def asearch_hotels(
+    destination: str,
+    check_in_date: str,
+    check_out_date: str) -> dict:
+    """
+    Async version of `search_hotels`.
+    """
+    params = hotel_search_params(destination, check_in_date, check_out_date)
+    return await aserpapi_search(params)
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """
+    Parse SerpAPI prices, either numeric (1696) or display strings ("THB 6,340", "฿1,234").
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        digits = "".join(c for c in value if c.isdigit() or c == ".")
+        try:
+            return float(digits)
+        except ValueError:
+            return None
+    return None
+
+
+def parse_flights(results: dict) -> List[FlightOption]:
+    flights = []
+    # Everything SerpAPI returned, ranking picks the candidates for the LLM
+    for flight in results.get("best_flights", []) + results.get("other_flights", []):
+        legs = flight.get("flights") or [{}]
+        flights.append(FlightOption(
+            airline=legs[0].get("airline", "Unknown"),
+            price=parse_price(flight.get("price")),
+            duration_minutes=flight.get("total_duration"),
+            departure_time=legs[0].get("departure_airport", {}).get("time"),
+            arrival_time=legs[-1].get("arrival_airport", {}).get("time"),
+            stops=max(len(flight.get("flights", [])) - 1, 0),
+            travel_class=legs[0].get("travel_class"),
+        ))
+    return flights
+
+
+def parse_hotels(results: dict, max_places: int = 5) -> List[HotelOption]:
+    hotels = []
+    for hotel in results.get("properties", []):
+        rate = hotel.get("rate_per_night", {})
+        hotels.append(HotelOption(
+            name=hotel.get("name", "Unknown"),
+            price=parse_price(rate.get("extracted_lowest", rate.get("lowest"))),
+            rating=hotel.get("overall_rating"),
+            nearby_places=tuple(p.get("name") for p in hotel.get("nearby_places", [])[:max_places] if p.get("name")),
+            amenities=tuple(hotel.get("amenities", [])),
+            link=hotel.get("link"),
+        ))
+    return hotels
 
 
 @tool
+@instrument_tool
 def search_flights_tool(
     origin: str,
     destination: str,
@@ -82,23 +209,8 @@ def search_flights_tool(
             return_date=return_date
         )
         
-        flights = []
-        if "best_flights" in results:
-            for flight in results["best_flights"][:5]:  # Top 5 flights
-                flights.append({
-                    "airline": flight.get("flights", [{}])[0].get("airline", "Unknown"),
-                    "price": flight.get("price", "N/A"),
-                    "duration": flight.get("total_duration", "N/A"),
-                    "departure_time": flight.get("flights", [{}])[0].get("departure_airport", {}).get("time", "N/A"),
-                    "arrival_time": flight.get("flights", [{}])[-1].get("arrival_airport", {}).get("time", "N/A"),
-                    "stops": len(flight.get("flights", [])) - 1,
-                    "travel_class": flight.get("flights", [{}])[0].get("travel_class", "N/A"),
-                    # "return_date":
-                    # "airline_logo":
-                })
-        
         return {
-            "flights": flights,
+            "flights": parse_flights(results),
             "search_metadata": {
                 "origin": origin,
                 "destination": destination, 
@@ -112,6 +224,48 @@ def search_flights_tool(
 
 
 @tool
+@instrument_tool
+async def asearch_flights_tool(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: Optional[str]) -> dict:
+    """
+    Search for flights using Google Flights API without blocking the event loop
+
+    Args:
+        origin: Origin airport code or city
+        destination: Destination airport code or city
+        departure_date: Departure date (YYYY-MM-DD)
+        return_date: Return date (YYYY-MM-DD)
+
+    Returns:
+        Dict containing flight search results
+    """
+    try:
+        results = await asearch_flights(
+            origin=origin,
+            destination=destination,
+            departure_date=departure_date,
+            return_date=return_date
+        )
+
+        return {
+            "flights": parse_flights(results),
+            "search_metadata": {
+                "origin": origin,
+                "destination": destination,
+                "departure_date": departure_date,
+                "return_date": return_date
+            }
+        }
+
+    except Exception as e:
+        return {"error": f"Flight search failed: {str(e)}", "flights": []}
+
+
+@tool
+@instrument_tool
 def search_hotels_tool(
     destination: str,
     check_in_date: str,
@@ -135,20 +289,8 @@ def search_hotels_tool(
             check_out_date=check_out_date
         )
         
-        hotels = []
-        if "properties" in results:
-            for hotel in results["properties"][:5]:  # Top 5 hotels
-                hotels.append({
-                    "name": hotel.get("name", "Unknown"),
-                    "price": hotel.get("rate_per_night", {}).get("lowest", "N/A"),
-                    "rating": hotel.get("overall_rating", "N/A"),
-                    "location": hotel.get("nearby_places", "N/A"),
-                    "amenities": hotel.get("amenities", []),
-                    "link": hotel.get("link", "N/A")
-                })
-        
         return {
-            "hotels": hotels,
+            "hotels": parse_hotels(results),
             "search_metadata": {
                 "destination": destination,
                 "check_in_date": check_in_date,
@@ -161,8 +303,46 @@ def search_hotels_tool(
         return {"error": f"Hotel search failed: {str(e)}", "hotels": []}
 
 
+@tool
+@instrument_tool
+async def asearch_hotels_tool(
+    destination: str,
+    check_in_date: str,
+    check_out_date: str) -> dict:
+    """
+    Search for hotels using Google Hotels API without blocking the event loop
+
+    Args:
+        destination: Hotel destination
+        check_in_date: Check-in date (YYYY-MM-DD)
+        check_out_date: Check-out date (YYYY-MM-DD)
+
+    Returns:
+        Dict containing hotel search results
+    """
+    try:
+        results = await asearch_hotels(
+            destination=destination,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date
+        )
+
+        return {
+            "hotels": parse_hotels(results),
+            "search_metadata": {
+                "destination": destination,
+                "check_in_date": check_in_date,
+                "check_out_date": check_out_date,
+            }
+        }
+
+    except Exception as e:
+        return {"error": f"Hotel search failed: {str(e)}", "hotels": []}
+
+
 
 @tool
+@instrument_tool
 def extract_travel_details(user_request: str) -> Dict[str, str]:
     """
     Extract travel details from user request using LLM
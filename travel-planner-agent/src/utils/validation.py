@@ -0,0 +1,108 @@
+"""
+Request validation, kept free of the search and LLM clients so the UI can import it cheaply.
+"""
+from datetime import date
+from typing import Optional
+
+from src.utils.state import ItineraryAgentState
+
+# Longest origin/destination accepted, real city and airport names are far shorter
+MAX_LOCATION_LENGTH = 100
+
+
+def validate_date_window(state: ItineraryAgentState):
+    """
+    Flexible mode: the window holds the possible departure days, a single day included.
+    """
+    if not state.trip_nights or state.trip_nights < 1:
+        return {"is_valid_date": False, "validation_message": "Trip length must be at least one night."}
+    
+    if state.departure_date or state.return_date:
+        return {"is_valid_date": False, "validation_message": "Give either fixed dates or a date window, not both."}
+    
+    if not state.date_window_start or not state.date_window_end:
+        return {"is_valid_date": False, "validation_message": "Date window start and end are required."}
+    
+    try:
+        start = parse_iso_date(state.date_window_start)
+        end = parse_iso_date(state.date_window_end)
+    except ValueError as e:
+        return {"is_valid_date": False, "validation_message": f"Invalid date format: {str(e)}"}
+    
+    if start <= date.today():
+        return {"is_valid_date": False, "validation_message": "Date window must be in the future."}
+    
+    if end < start:
+        return {"is_valid_date": False, "validation_message": "Date window must not end before it starts."}
+    
+    return {"is_valid_date": True, "validation_message": "Dates are valid."}
+
+
+def validate_dates(state: ItineraryAgentState):
+    
+    if state.date_window_start or state.date_window_end:
+        return validate_date_window(state)
+    
+    departure_date = state.departure_date
+    return_date = state.return_date
+    
+    if not departure_date or not return_date:
+        return {"is_valid_date": False, "validation_message": "Departure and return dates are required."}
+    
+    try:
+        dep_date = parse_iso_date(departure_date)
+        ret_date = parse_iso_date(return_date)
+    except ValueError as e:
+        return {"is_valid_date": False, "validation_message": f"Invalid date format: {str(e)}"}
+    
+    # Check if dates are in the future (today counts as past, as with the earlier datetime comparison)
+    today = date.today()
+    if dep_date <= today or ret_date <= today:
+        return {"is_valid_date": False, "validation_message": "Departure and return dates must be in the future."}
+    
+    # Check if return date is after departure date
+    if ret_date <= dep_date:
+        return {"is_valid_date": False, "validation_message": "Return date must be after departure date."}
+    
+    return {"is_valid_date": True, "validation_message": "Dates are valid."}
+
+
+def parse_iso_date(value: str) -> date:
+    """
+    Strict YYYY-MM-DD parsing, `date.fromisoformat` alone also accepts forms like "20250920".
+    """
+    if len(value) != 10 or value[4] != "-" or value[7] != "-":
+        raise ValueError(f"'{value}' does not match format 'YYYY-MM-DD'")
+    return date.fromisoformat(value)
+
+
+def location_error(name: str, label: str) -> Optional[str]:
+    """
+    Cheap format check of an origin/destination before any lookup: a city or airport name,
+    or a 3-letter IATA code. Returns the validation message, or None when it looks fine.
+    """
+    name = name.strip()
+    if not name:
+        return f"{label} is required."
+    if len(name) > MAX_LOCATION_LENGTH:
+        return f"{label} is too long."
+    if len(name) <= 3 and not name.isalpha():
+        return f"{label} '{name}' is not a valid IATA code."
+    if any(c.isdigit() or not c.isprintable() for c in name):
+        return f"{label} '{name}' is not a valid city name or IATA code."
+    return None
+
+
+def validate_request(state: ItineraryAgentState):
+    """
+    Reject bad requests before airport resolution, which may call the LLM. No I/O, no lookups.
+    """
+    for name, label in ((state.origin, "Origin"), (state.destination, "Destination")):
+        message = location_error(name, label)
+        if message:
+            return {"is_valid_date": False, "validation_message": message}
+    
+    if state.origin.strip().casefold() == state.destination.strip().casefold():
+        return {"is_valid_date": False, "validation_message": "Origin and destination must be different."}
+    
+    return validate_dates(state)
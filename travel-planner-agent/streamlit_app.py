@@ -1,20 +1,135 @@
 import streamlit as st
 import asyncio
 import datetime
+import threading
 from datetime import date, timedelta
 import pandas as pd
 import json
+import os
+
+import httpx
 
 # Import LangGraph API client (adjust import based on your setup)
 try:
     from langgraph_sdk import get_client
+    from langgraph_sdk.client import LangGraphClient
     URL = "http://127.0.0.1:2024"
-    client = get_client(url=URL)
-    assistant_id = "agent"
+    # "agent_pipelined" drafts the itinerary alongside the recommendations, see langgraph.json
+    assistant_id = os.getenv("LANGGRAPH_ASSISTANT_ID", "agent")
+    # The server serves the pipelined graph as "agent" too when ITINERARY_PIPELINED is set
+    pipelined = assistant_id == "agent_pipelined" or os.getenv("ITINERARY_PIPELINED", "").lower() in ("1", "true", "yes")
 except ImportError:
     st.error("Please install langgraph-sdk: pip install langgraph-sdk")
     st.stop()
 
+# Connections to the LangGraph server shared by all sessions, each streaming run holds one
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+
+from src.utils.replan_keys import changed_inputs, replan_command
+
+
+class ClientRuntime:
+    """
+    One event loop on a background thread, and one pooled SDK client bound to it, for every
+    session of this Streamlit process. Script runs submit coroutines and return without waiting.
+    """
+    
+    def __init__(self, url):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="langgraph-client", daemon=True).start()
+        # get_client resolves the x-api-key header from LANGGRAPH_API_KEY / LANGSMITH_API_KEY;
+        # keep its headers and only swap in a transport with a larger pool
+        sdk_headers = get_client(url=url).http.client.headers
+        http = httpx.AsyncClient(
+            base_url=url,
+            headers=sdk_headers,
+            transport=httpx.AsyncHTTPTransport(
+                retries=5,
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS),
+            ),
+            timeout=httpx.Timeout(connect=5, read=300, write=300, pool=5),
+        )
+        self.client = LangGraphClient(http)
+    
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+@st.cache_resource
+def get_runtime():
+    return ClientRuntime(URL)
+
+
+runtime = get_runtime()
+client = runtime.client
+
+
+class StreamedText:
+    """
+    Visible text of one model run's token stream, without reasoning models' <think> spans.
+    Tags split across chunks are held back until the next chunk completes or rules them out.
+    """
+    OPEN, CLOSE = "<think>", "</think>"
+    
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.text = ""
+        self._pending = ""
+        self._thinking = False
+    
+    @staticmethod
+    def _partial(data, tag):
+        # Length of the longest prefix of `tag` that `data` ends with
+        for k in range(min(len(tag) - 1, len(data)), 0, -1):
+            if data.endswith(tag[:k]):
+                return k
+        return 0
+    
+    def add(self, content):
+        data, self._pending = self._pending + content, ""
+        while data:
+            tag = self.CLOSE if self._thinking else self.OPEN
+            at = data.find(tag)
+            if at < 0:
+                hold = self._partial(data, tag)
+                if not self._thinking:
+                    self.text += data[:len(data) - hold]
+                self._pending = data[len(data) - hold:]
+                return
+            if not self._thinking:
+                self.text += data[:at]
+            data = data[at + len(tag):]
+            self._thinking = not self._thinking
+
+
+class PlanJob:
+    """
+    One generation running on the shared loop. It only writes to its own fields, never to
+    st.session_state, which doesn't exist outside the script thread; the script polls it.
+    """
+    
+    def __init__(self, input_state, thread_id=None, last_inputs=None, current_result=None):
+        self.input_state = input_state
+        self.thread_id = thread_id
+        self.last_inputs = last_inputs
+        self.current_result = current_result
+        self.steps = {}
+        self.durations = {}
+        self.streamed_text = {}
+        self.streams = {}
+        self.result = None
+        self.error = None
+        self.future = None
+    
+    def start(self):
+        self.future = runtime.submit(run_plan_job(self))
+        return self
+    
+    @property
+    def done(self):
+        return self.future is not None and self.future.done()
+
 # Page configuration
 st.set_page_config(
     page_title="🌍 AI Travel Itinerary Planner",
@@ -91,81 +206,189 @@ if 'thread_id' not in st.session_state:
     st.session_state.thread_id = None
 if 'generation_steps' not in st.session_state:
     st.session_state.generation_steps = {}
+if 'step_durations' not in st.session_state:
+    st.session_state.step_durations = {}
 if 'is_generating' not in st.session_state:
     st.session_state.is_generating = False
+if 'last_inputs' not in st.session_state:
+    st.session_state.last_inputs = None
+if 'job' not in st.session_state:
+    st.session_state.job = None
 
-# Async function to handle the streaming API
-async def generate_itinerary_stream(input_state):
-    """Stream itinerary generation with real-time updates"""
-    
-    # Create thread if it doesn't exist
-    if not st.session_state.thread_id:
-        thread = await client.threads.create()
-        st.session_state.thread_id = thread["thread_id"]
-    
-    # Track progress
-    progress_steps = {
-        "update_airport_codes": "🗺️ Converting airport codes...",
-        "validate_dates": "📅 Validating travel dates...",
-        "get_flight_options": "✈️ Searching flight options...",
-        "get_hotel_options": "🏨 Finding hotel options...",
-        "get_flight_recommendation": "🎯 Analyzing best flights...",
-        "get_hotel_recommendation": "🏆 Selecting optimal hotel...",
-        "generate_itinerary": "📋 Creating your itinerary..."
-    }
+# Graph nodes in execution order, with their progress labels
+PROGRESS_STEPS = {
+    "validate_request": "📅 Validating trip details...",
+    "update_airport_codes": "🗺️ Converting airport codes...",
+    "search_date_window": "📆 Comparing dates in your window...",
+    "get_flight_options": "✈️ Searching flight options...",
+    "get_hotel_options": "🏨 Finding hotel options...",
+    "get_flight_recommendation": "🎯 Analyzing best flights...",
+    "get_hotel_recommendation": "🏆 Selecting optimal hotel...",
+    "draft_itinerary": "📝 Drafting your days...",
+    "generate_itinerary": "📋 Creating your itinerary...",
+    "assemble_itinerary": "📋 Putting your itinerary together..."
+}
+
+# Steps the selected graph never runs, and steps only shown once they run (flexible dates)
+SKIPPED_STEPS = {"generate_itinerary"} if pipelined else {"draft_itinerary", "assemble_itinerary"}
+OPTIONAL_STEPS = {"search_date_window"}
+
+# Nodes whose LLM tokens are streamed to the UI
+STREAMED_NODES = {"get_flight_recommendation", "get_hotel_recommendation", "generate_itinerary", "draft_itinerary"}
+
+# Ranking weights behind the preference choices, see FlightRankingWeights and HotelRankingWeights
+FLIGHT_PRIORITIES = {
+    "Balanced": {"price": 0.5, "duration": 0.3, "stops": 0.2},
+    "Cheapest": {"price": 0.8, "duration": 0.1, "stops": 0.1},
+    "Fastest": {"price": 0.2, "duration": 0.5, "stops": 0.3},
+}
+HOTEL_PRIORITIES = {
+    "Balanced": {"price": 0.4, "rating": 0.4, "amenities": 0.2},
+    "Cheapest": {"price": 0.8, "rating": 0.1, "amenities": 0.1},
+    "Best rated": {"price": 0.2, "rating": 0.7, "amenities": 0.1},
+}
+
+
+def kept_steps(goto):
+    """Progress steps a re-plan sent to `goto` keeps from the previous plan"""
+    kept = {"validate_request", "update_airport_codes"}
+    for options, recommendation in (("get_flight_options", "get_flight_recommendation"),
+                                    ("get_hotel_options", "get_hotel_recommendation")):
+        if options not in goto:
+            kept.add(options)
+            if recommendation not in goto:
+                kept.add(recommendation)
+    if pipelined and not {"draft_itinerary", "get_flight_options", "get_hotel_options"} & set(goto):
+        # The draft follows the options, the assembly always runs again
+        kept.add("draft_itinerary")
+    return kept
+
+
+async def plan_command(job):
+    """
+    Re-plan command for the job's thread, or None to plan from scratch on a new thread.
+    Only the nodes whose inputs changed since the last plan run again.
+    """
+    if not job.thread_id or not job.last_inputs:
+        return None
     
-    final_result = {}
+    changed = changed_inputs(job.last_inputs, job.input_state)
+    thread_state = await client.threads.get_state(job.thread_id)
+    return replan_command(thread_state.get("values") or {}, changed, pipelined=pipelined)
+
+async def run_plan_job(job):
+    """Stream itinerary generation into the job as it runs on the shared loop"""
     
     try:
+        # Re-plan on the previous thread when only some inputs changed, else a new thread
+        command = await plan_command(job)
+        if command is None:
+            thread = await client.threads.create()
+            job.thread_id = thread["thread_id"]
+        elif not command["goto"]:
+            # Nothing the graph reads changed, the current plan stands
+            for step_name in PROGRESS_STEPS.keys() - OPTIONAL_STEPS:
+                job.steps[step_name] = "reused"
+            job.result = job.current_result
+            return
+        else:
+            for step_name in kept_steps(command["goto"]):
+                job.steps[step_name] = "reused"
+        
         async for event in client.runs.stream(
-            thread_id=st.session_state.thread_id,
+            thread_id=job.thread_id,
             assistant_id=assistant_id,
-            input=input_state,
-            stream_mode="values"
+            input=job.input_state if command is None else None,
+            command=command,
+            stream_mode=["updates", "messages-tuple", "values"]
         ):
-            # Update session state with current event
-            if hasattr(event, 'data') and event.data:
-                # Extract current step information
-                current_step = None
-                if hasattr(event.data, '__dict__'):
-                    for step_name in progress_steps.keys():
-                        if step_name in str(event.data):
-                            current_step = step_name
-                            break
-                
-                # Update progress
-                if current_step:
-                    st.session_state.generation_steps[current_step] = "completed"
+            if event.event == "updates" and isinstance(event.data, dict):
+                # One update per finished node, keyed by node name
+                for step_name, update in event.data.items():
+                    if step_name in PROGRESS_STEPS:
+                        job.steps[step_name] = "completed"
+                    
+                    # Wall time measured by the node instrumentation on the server
+                    node_metrics = (update or {}).get("node_metrics", {}).get(step_name, {})
+                    if "seconds" in node_metrics:
+                        job.durations[step_name] = node_metrics["seconds"]
+            
+            elif event.event.startswith("messages") and event.data:
+                # messages-tuple events carry (message chunk, metadata) for each LLM token
+                chunk, metadata = event.data
+                step_name = metadata.get("langgraph_node")
+                if step_name not in STREAMED_NODES:
+                    continue
                 
+                if job.steps.get(step_name) != "completed":
+                    job.steps[step_name] = "running"
+                content = chunk.get("content", "") if isinstance(chunk, dict) else ""
+                run_id = chunk.get("id") if isinstance(chunk, dict) else None
+                stream = job.streams.get(step_name)
+                if stream is None or stream.run_id != run_id:
+                    # A new model run for this node, e.g. the next model in a fallback chain after
+                    # the previous one failed mid-stream: its tokens replace the failed run's
+                    stream = job.streams[step_name] = StreamedText(run_id)
+                if isinstance(content, str) and content:
+                    stream.add(content)
+                    job.streamed_text[step_name] = stream.text
+            
+            elif event.event == "values" and event.data:
                 # Store the latest complete state
-                final_result = event.data
-                
-            # Yield for real-time updates
-            yield final_result, st.session_state.generation_steps
+                job.result = event.data
             
     except Exception as e:
-        st.error(f"Error during generation: {str(e)}")
-        yield None, st.session_state.generation_steps
+        job.error = str(e) or type(e).__name__
 
-def display_progress(steps):
-    """Display current generation progress"""
-    progress_steps = {
-        "update_airport_codes": "🗺️ Converting airport codes...",
-        "validate_dates": "📅 Validating travel dates...",
-        "get_flight_options": "✈️ Searching flight options...",
-        "get_hotel_options": "🏨 Finding hotel options...",
-        "get_flight_recommendation": "🎯 Analyzing best flights...",
-        "get_hotel_recommendation": "🏆 Selecting optimal hotel...",
-        "generate_itinerary": "📋 Creating your itinerary..."
-    }
+def display_trip_summary(input_state):
+    """Show the submitted trip while it is being planned"""
+    departure = date.fromisoformat(input_state["departure_date"])
+    return_day = date.fromisoformat(input_state["return_date"])
+    
+    st.markdown(f"""
+    <div class="trip-summary">
+        <h3>🎯 Trip Summary</h3>
+        <ul>
+            <li><strong>From:</strong> {input_state["origin"]}</li>
+            <li><strong>To:</strong> {input_state["destination"]}</li>
+            <li><strong>Departure:</strong> {departure.strftime('%B %d, %Y')}</li>
+            <li><strong>Return:</strong> {return_day.strftime('%B %d, %Y')}</li>
+            <li><strong>Duration:</strong> {(return_day - departure).days} days</li>
+        </ul>
+    </div>
+    """, unsafe_allow_html=True)
+
+@st.fragment(run_every=0.5)
+def show_job_progress(job):
+    """Poll the running job, re-rendering only this fragment until it finishes"""
+    if job.done:
+        # Full rerun, which takes over the result
+        st.rerun()
+    
+    display_progress(job.steps, job.durations)
     
+    # Render the itinerary as its tokens arrive
+    itinerary_data = job.streamed_text.get("generate_itinerary") or job.streamed_text.get("draft_itinerary", "")
+    if itinerary_data:
+        st.markdown("### 🎉 Itinerary Preview")
+        with st.expander("Click to view your itinerary", expanded=True):
+            st.markdown(itinerary_data + " ▌")
+
+def display_progress(steps, durations=None):
+    """Display current generation progress"""
+    durations = durations or {}
     st.markdown('<div class="progress-container">', unsafe_allow_html=True)
     st.markdown("### 🔄 Generation Progress")
     
-    for step_name, step_desc in progress_steps.items():
+    for step_name, step_desc in PROGRESS_STEPS.items():
+        if step_name in SKIPPED_STEPS or (step_name in OPTIONAL_STEPS and step_name not in steps):
+            continue
         status = steps.get(step_name, "pending")
         if status == "completed":
-            st.markdown(f'<div class="step-completed">✅ {step_desc}</div>', unsafe_allow_html=True)
+            took = f" ({durations[step_name]:.1f}s)" if step_name in durations else ""
+            st.markdown(f'<div class="step-completed">✅ {step_desc}{took}</div>', unsafe_allow_html=True)
+        elif status == "reused":
+            st.markdown(f'<div class="step-completed">♻️ {step_desc} (kept from previous plan)</div>', unsafe_allow_html=True)
         elif step_name in steps and status != "completed":
             st.markdown(f'<div class="step-current">🔄 {step_desc}</div>', unsafe_allow_html=True)
         else:
@@ -173,6 +396,19 @@ def display_progress(steps):
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Take over a job that finished since the last run, before the form reads is_generating
+finished_job = None
+if st.session_state.job is not None and st.session_state.job.done:
+    finished_job = st.session_state.job
+    st.session_state.job = None
+    st.session_state.thread_id = finished_job.thread_id
+    st.session_state.generation_steps = finished_job.steps
+    st.session_state.step_durations = finished_job.durations
+    st.session_state.current_result = finished_job.result
+    st.session_state.last_inputs = finished_job.input_state if finished_job.result else None
+    st.session_state.itinerary_generated = True
+    st.session_state.is_generating = False
+
 # Sidebar for input form
 with st.sidebar:
     st.header("✈️ Trip Details")
@@ -213,6 +449,10 @@ with st.sidebar:
             max_value=today + timedelta(days=365)
         )
         
+        with st.expander("⚙️ Preferences"):
+            flight_priority = st.selectbox("Flights", list(FLIGHT_PRIORITIES))
+            hotel_priority = st.selectbox("Hotels", list(HOTEL_PRIORITIES))
+        
         # Submit button
         submit_button = st.form_submit_button(
             "🚀 Plan My Trip", 
@@ -239,72 +479,39 @@ with col1:
             for error in errors:
                 st.error(error)
         else:
-            # Show trip summary
-            days = (return_date - departure_date).days
-            
-            st.markdown(f"""
-            <div class="trip-summary">
-                <h3>🎯 Trip Summary</h3>
-                <ul>
-                    <li><strong>From:</strong> {origin}</li>
-                    <li><strong>To:</strong> {destination}</li>
-                    <li><strong>Departure:</strong> {departure_date.strftime('%B %d, %Y')}</li>
-                    <li><strong>Return:</strong> {return_date.strftime('%B %d, %Y')}</li>
-                    <li><strong>Duration:</strong> {days} days</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
-            
             # Prepare input state
             input_state = {
                 "origin": origin.strip(),
                 "destination": destination.strip(),
                 "departure_date": departure_date.strftime("%Y-%m-%d"),
-                "return_date": return_date.strftime("%Y-%m-%d")
+                "return_date": return_date.strftime("%Y-%m-%d"),
+                "flight_weights": FLIGHT_PRIORITIES[flight_priority],
+                "hotel_weights": HOTEL_PRIORITIES[hotel_priority]
             }
             
             # Set generating state
             st.session_state.is_generating = True
             st.session_state.generation_steps = {}
+            st.session_state.step_durations = {}
             
-            # Create placeholders for single-location updates
-            progress_placeholder = st.empty()
-            result_placeholder = st.empty()
-            
-            # Run async generation with streaming
-            async def run_generation():
-                final_result = None
-                async for result, steps in generate_itinerary_stream(input_state):
-                    # Update progress in the same location
-                    with progress_placeholder.container():
-                        display_progress(steps)
-                    
-                    # Update result if available
-                    if result:
-                        final_result = result
-                        # Handle dict result
-                        itinerary_data = result.get('itinerary', '') if isinstance(result, dict) else getattr(result, 'itinerary', '')
-                        if itinerary_data:
-                            with result_placeholder.container():
-                                st.markdown("### 🎉 Itinerary Preview")
-                                with st.expander("Click to view your itinerary", expanded=True):
-                                    preview = itinerary_data[:500] + "..." if len(itinerary_data) > 500 else itinerary_data
-                                    st.markdown(preview)
-                
-                # Final cleanup - clear progress and show success
-                progress_placeholder.empty()
-                st.session_state.current_result = final_result
-                st.session_state.itinerary_generated = True
-                st.session_state.is_generating = False
-                
-                if final_result:
-                    st.success("🎉 Your itinerary has been generated successfully!")
-                    st.rerun()
-                else:
-                    st.error("❌ Failed to generate itinerary. Please try again.")
-            
-            # Run the async function
-            asyncio.run(run_generation())
+            # Generation runs on the shared loop, this script run returns right away
+            st.session_state.job = PlanJob(
+                input_state,
+                thread_id=st.session_state.thread_id,
+                last_inputs=st.session_state.last_inputs,
+                current_result=st.session_state.current_result
+            ).start()
+    
+    if finished_job is not None:
+        if finished_job.error:
+            st.error(f"Error during generation: {finished_job.error}")
+        if finished_job.result:
+            st.success("🎉 Your itinerary has been generated successfully!")
+        else:
+            st.error("❌ Failed to generate itinerary. Please try again.")
+    elif st.session_state.job is not None:
+        display_trip_summary(st.session_state.job.input_state)
+        show_job_progress(st.session_state.job)
     
     # Show generation in progress
     if st.session_state.is_generating:
@@ -396,6 +603,7 @@ with col2:
         - Use city names or airport codes
         - Plan at least a week in advance
         - Consider your budget and preferences
+        - Changing only dates or preferences re-plans just the affected steps
         """)
     else:
         st.markdown("""
@@ -433,7 +641,9 @@ with col2:
             st.session_state.itinerary_generated = False
             st.session_state.current_result = None
             st.session_state.thread_id = None
+            st.session_state.last_inputs = None
             st.session_state.generation_steps = {}
+            st.session_state.step_durations = {}
             st.session_state.is_generating = False
             st.rerun()
 
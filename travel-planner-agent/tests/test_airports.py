@@ -0,0 +1,50 @@
+from src.utils import airports
+from src.utils.airports import AirportIndex, IataMemo, is_iata, normalize_name, resolve_airport_codes
+
+ROWS = [
+    {"iata": "BKK", "city": "Bangkok", "airport": "Suvarnabhumi Airport", "aliases": "Krung Thep"},
+    {"iata": "JFK", "city": "New York", "airport": "John F. Kennedy International Airport", "aliases": "NYC"},
+]
+
+
+def test_normalize_name_keeps_other_scripts():
+    assert normalize_name("Sao Paulo Airport") == normalize_name("São-Paulo")
+    assert normalize_name("กรุงเทพ")
+    assert normalize_name("東京") != normalize_name("กรุงเทพ")
+
+
+def test_is_iata_is_ascii_only():
+    assert is_iata("BKK")
+    assert not is_iata("東京都")
+
+
+def test_lookup_keeps_typed_codes():
+    index = AirportIndex(ROWS)
+    assert index.lookup("NAN") == "NAN"
+    assert index.lookup("NYC") == "JFK"
+    assert index.lookup("krung thep") == "BKK"
+    assert index.lookup("東京") is None
+
+
+def test_memo_does_not_share_codes_between_non_latin_names(tmp_path):
+    memo = IataMemo(str(tmp_path / "memo.json"))
+    memo.update({"กรุงเทพ": "BKK", "!!!": "XXX"})
+    assert memo.get("กรุงเทพ") == "BKK"
+    assert memo.get("東京") is None
+    assert memo.get("???") is None
+    assert IataMemo(memo.path).get("กรุงเทพ") == "BKK"
+
+
+def test_resolve_calls_fallback_once_per_unknown_name(tmp_path, monkeypatch):
+    monkeypatch.setattr(airports, "airport_index", AirportIndex(ROWS))
+    monkeypatch.setattr(airports, "iata_memo", IataMemo(str(tmp_path / "memo.json")))
+    calls = []
+
+    def fallback(names):
+        calls.append(names)
+        return {"東京": "HND", "กรุงเทพ": "BKK"}
+
+    assert resolve_airport_codes(["Bangkok", "東京", "กรุงเทพ"], fallback) == {
+        "Bangkok": "BKK", "東京": "HND", "กรุงเทพ": "BKK"}
+    assert resolve_airport_codes(["東京", "大阪"], fallback=lambda names: {}) == {"東京": "HND"}
+    assert calls == [["東京", "กรุงเทพ"]]
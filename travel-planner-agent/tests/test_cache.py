@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from src.utils.cache import MemoryCacheBackend, SQLiteCacheBackend, SearchCache
+
+FLIGHTS = {"engine": "google_flights", "departure_id": "BKK", "arrival_id": "CNX", "outbound_date": "2099-01-01"}
+
+
+def test_backend_is_created_on_first_use(tmp_path):
+    path = tmp_path / "cache" / "serpapi.sqlite"
+    cache = SearchCache(make_backend=lambda: SQLiteCacheBackend(path=str(path)))
+    assert not path.parent.exists()
+
+    cache.set(FLIGHTS, {"best_flights": []})
+    assert path.exists()
+    assert cache.get(FLIGHTS) == {"best_flights": []}
+
+
+def test_memory_backend_len():
+    backend = MemoryCacheBackend(max_entries=2)
+    for key in "abc":
+        backend.set(key, "{}", float("inf"))
+    assert len(backend) == 2
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        # Every reading is later than the last, so SQLite access times never tie
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_least_recently_used_entry_is_evicted(backend, tmp_path, clock):
+    store = MemoryCacheBackend(max_entries=2) if backend == "memory" else \
+        SQLiteCacheBackend(path=str(tmp_path / "cache.sqlite"), max_entries=2)
+    store.set("a", "{}", float("inf"))
+    store.set("b", "{}", float("inf"))
+    assert store.get("a") is not None
+    assert store.set("c", "{}", float("inf")) == 1
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+
+
+def test_entries_expire_after_their_engine_ttl(clock):
+    cache = SearchCache(backend=MemoryCacheBackend(), ttls={"google_flights": 60})
+    hotels = {**FLIGHTS, "engine": "google_hotels"}
+    cache.set(FLIGHTS, {"best_flights": []})
+    cache.set(hotels, {"properties": []})
+
+    clock.now += 59
+    assert cache.get(FLIGHTS) == {"best_flights": []}
+    clock.now += 2
+    assert cache.get(FLIGHTS) is None
+    assert cache.get(hotels) == {"properties": []}
+    assert len(cache.backend) == 1
+    assert cache.stats.as_dict()["expirations"] == 1
+
+
+def test_zero_ttl_is_not_stored():
+    cache = SearchCache(backend=MemoryCacheBackend(), ttls={"google_flights": 0})
+    cache.set(FLIGHTS, {"best_flights": []})
+    assert cache.get(FLIGHTS) is None
+    assert len(cache.backend) == 0
+
+
+def test_evictions_are_counted():
+    cache = SearchCache(backend=MemoryCacheBackend(max_entries=1))
+    cache.set(FLIGHTS, {})
+    cache.set({**FLIGHTS, "arrival_id": "HKT"}, {})
+    assert cache.get(FLIGHTS) is None
+    assert cache.stats.as_dict()["evictions"] == 1
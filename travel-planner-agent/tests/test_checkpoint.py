@@ -0,0 +1,44 @@
+import uuid
+
+from src.utils.checkpoint import COMPRESSED_SUFFIX, CompressedSerializer, create_checkpointer, prune_checkpoints
+from src.utils.state import FlightOption
+
+
+def test_large_values_are_compressed_and_round_trip():
+    serde = CompressedSerializer(min_bytes=64)
+    value = {"itinerary": "day one, temple, market " * 100, "flights": [FlightOption(airline="TG", price=3200.0)]}
+    type_, data = serde.dumps_typed(value)
+    assert type_.endswith(COMPRESSED_SUFFIX)
+    assert serde.loads_typed((type_, data)) == value
+
+
+def test_small_and_uncompressed_values_load():
+    serde = CompressedSerializer(min_bytes=64)
+    assert not serde.dumps_typed("short")[0].endswith(COMPRESSED_SUFFIX)
+    assert serde.loads_typed(serde.serde.dumps_typed({"written": "before compression"})) == {"written": "before compression"}
+
+
+def test_prune_keeps_the_latest_checkpoints(tmp_path):
+    from langgraph.graph import END, START, StateGraph
+    from typing_extensions import TypedDict
+
+    class Counter(TypedDict):
+        n: int
+
+    builder = StateGraph(Counter)
+    builder.add_node("a", lambda state: {"n": state["n"] + 1})
+    builder.add_node("b", lambda state: {"n": state["n"] + 1})
+    builder.add_edge(START, "a")
+    builder.add_edge("a", "b")
+    builder.add_edge("b", END)
+    saver = create_checkpointer(str(tmp_path / "checkpoints.sqlite"))
+    graph = builder.compile(checkpointer=saver)
+
+    threads = [{"configurable": {"thread_id": str(uuid.uuid4())}} for _ in range(2)]
+    for config in threads:
+        graph.invoke({"n": 0}, config)
+
+    assert prune_checkpoints(saver.conn, keep_last=1) > 0
+    assert saver.conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0] == 2
+    for config in threads:
+        assert graph.get_state(config).values == {"n": 2}
@@ -0,0 +1,51 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.utils.cache import SQLiteCacheBackend
+from src.utils.llm_cache import LLMResponseCache
+from src.utils.models import TieredModel
+
+MESSAGES = [SystemMessage("Pick a flight."), HumanMessage("options")]
+
+
+class Down:
+    def invoke(self, messages, config=None, **kwargs):
+        raise RuntimeError("unavailable")
+
+
+class Answers:
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def invoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        return AIMessage(content=self.content)
+
+
+def make_cache(tmp_path):
+    return LLMResponseCache(SQLiteCacheBackend(path=str(tmp_path / "llm.sqlite")))
+
+
+def test_hit_skips_the_model(tmp_path):
+    cache = make_cache(tmp_path)
+    model = Answers("cached")
+    chain = TieredModel("small", [{"model": "primary"}], models=[model])
+
+    assert cache.invoke(chain, "node", MESSAGES).content == "cached"
+    assert cache.invoke(chain, "node", MESSAGES).content == "cached"
+    assert model.calls == 1
+
+
+def test_fallback_answer_is_not_served_as_the_primary(tmp_path):
+    cache = make_cache(tmp_path)
+    degraded = TieredModel("small", [{"model": "primary"}, {"model": "fallback"}], models=[Down(), Answers("fallback")])
+    assert cache.invoke(degraded, "node", MESSAGES).content == "fallback"
+
+    primary = Answers("primary")
+    healthy = TieredModel("small", [{"model": "primary"}, {"model": "fallback"}], models=[primary, Answers("fallback")])
+    assert cache.invoke(healthy, "node", MESSAGES).content == "primary"
+    assert primary.calls == 1
+
+    # Filed under the model that wrote it
+    fallback_first = TieredModel("small", [{"model": "fallback"}], models=[Down()])
+    assert cache.invoke(fallback_first, "node", MESSAGES).content == "fallback"
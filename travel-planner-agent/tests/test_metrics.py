@@ -0,0 +1,33 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from src.utils import metrics
+from src.utils.metrics import node_span, record_serpapi_call
+
+
+class YieldingDict(dict):
+    """Gives up the GIL between the read and the write of `+=`, where updates get lost."""
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        time.sleep(0)
+        return value
+
+
+def test_worker_threads_of_a_node_add_to_its_span():
+    with node_span("search_date_window"):
+        node, values, lock = metrics._current.get()
+        yielding = YieldingDict(values)
+        metrics._current.set((node, yielding, lock))
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for _ in range(8):
+                pool.submit(copy_context().run, lambda: [record_serpapi_call() for _ in range(200)])
+    assert yielding["serpapi_calls"] == 8 * 200
+
+
+def test_calls_outside_a_node_are_not_attributed():
+    record_serpapi_call()
+    with node_span("get_flight_options") as values:
+        pass
+    assert values["serpapi_calls"] == 0
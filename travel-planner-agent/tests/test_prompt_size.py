@@ -0,0 +1,15 @@
+import pytest
+
+from benchmarks.bench_prompt_size import TOKEN_BUDGETS, payloads
+from src.utils.serializers import estimate_tokens
+
+
+@pytest.mark.parametrize("name", sorted(TOKEN_BUDGETS))
+def test_compact_payload_stays_within_budget(name):
+    _, compact = payloads()[name]
+    assert estimate_tokens(compact) <= TOKEN_BUDGETS[name]
+
+
+def test_budgets_are_pinned():
+    # Raising a budget is a deliberate change to the recommendation prompts
+    assert TOKEN_BUDGETS == {"flight_options": 150, "hotel_options": 375}
@@ -0,0 +1,27 @@
+import numpy as np
+
+from src.utils.ranking import pareto_front, rank_flights
+from src.utils.state import FlightOption, FlightRankingWeights
+
+
+def test_pareto_front():
+    costs = np.array([
+        [0.0, 1.0],  # cheapest
+        [1.0, 0.0],  # fastest
+        [0.5, 0.5],  # a trade-off, still on the front
+        [0.6, 0.6],  # dominated by the trade-off
+        [0.5, 0.5],  # ties don't dominate each other
+    ])
+    assert pareto_front(costs).tolist() == [True, True, True, False, True]
+    assert pareto_front(np.zeros((0, 2))).tolist() == []
+
+
+def test_pareto_options_come_before_better_scoring_dominated_ones():
+    options = [
+        FlightOption(price=100, duration_minutes=300, stops=1),
+        FlightOption(price=110, duration_minutes=310, stops=1),
+        FlightOption(price=300, duration_minutes=60, stops=0),
+    ]
+    weights = FlightRankingWeights(price=1.0, duration=0.0, stops=0.0)
+    assert rank_flights(options, weights, top_k=2) == [options[0], options[2]]
+    assert rank_flights(options, weights, top_k=2, pareto=False) == [options[0], options[1]]
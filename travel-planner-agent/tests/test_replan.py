@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from src.utils.replan_keys import changed_inputs, replan_command, rerun_nodes
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+def day(offset: int) -> str:
+    return (TOMORROW + timedelta(days=offset)).isoformat()
+
+
+PLANNED = {
+    "origin": "Bangkok", "destination": "Chiang Mai", "departure_date": day(0), "return_date": day(3),
+    "is_valid_date": True, "itinerary": "Day 1: ...",
+}
+
+
+def test_rerun_starts_at_the_first_node_reading_the_input():
+    assert rerun_nodes([]) == []
+    assert rerun_nodes(["flight_weights"]) == ["get_flight_options"]
+    assert rerun_nodes(["fast_mode"]) == ["get_flight_recommendation", "get_hotel_recommendation"]
+
+
+def test_pipelined_rerun_also_runs_the_other_sources_of_a_join():
+    # draft_itinerary waits for both option nodes, assemble_itinerary for the draft
+    assert rerun_nodes(["hotel_weights"], pipelined=True) == ["get_flight_options", "get_hotel_options"]
+    assert rerun_nodes(["fast_mode"], pipelined=True) == [
+        "draft_itinerary", "get_flight_recommendation", "get_hotel_recommendation"]
+
+
+def test_changed_inputs_compares_after_defaults():
+    assert changed_inputs(PLANNED, {**PLANNED, "top_k": 5}) == {}
+    assert changed_inputs(PLANNED, {**PLANNED, "top_k": 3}) == {"top_k": 3}
+
+
+def test_replan_command():
+    command = replan_command(PLANNED, {"flight_weights": {"price": 1.0, "duration": 0.0, "stops": 0.0}})
+    assert command["goto"] == ["get_flight_options"]
+    assert command["update"]["flight_weights"]["price"] == 1.0
+
+    command = replan_command(PLANNED, {"return_date": day(5)})
+    assert command["goto"] == ["get_flight_options", "get_hotel_options"]
+    assert command["update"]["is_valid_date"]
+
+
+def test_replan_falls_back_to_a_full_plan():
+    assert replan_command(PLANNED, {"destination": "Phuket"}) is None
+    assert replan_command({**PLANNED, "itinerary": None}, {"top_k": 3}) is None
+    assert replan_command({**PLANNED, "is_valid_date": False}, {"top_k": 3}) is None
+    # A rejected date change isn't shown next to the old itinerary
+    assert replan_command(PLANNED, {"return_date": day(-1)}) is None
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+from src.utils.singleflight import SingleFlight
+
+
+def test_sync_caller_on_the_loop_does_not_wait_for_an_async_leader():
+    flight = SingleFlight()
+
+    async def main():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await release.wait()
+            return "async"
+
+        leader = asyncio.create_task(flight.ado("key", slow))
+        await started.wait()
+        # Blocking here would deadlock: the leader needs this loop to finish
+        assert flight.do("key", lambda: "sync") == "sync"
+        release.set()
+        assert await leader == "async"
+
+    done = threading.Event()
+
+    def run():
+        asyncio.run(main())
+        done.set()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert done.wait(5)
+    assert flight.stats()["upstream_calls"] == 2
+
+
+def test_followers_take_over_from_a_cancelled_leader():
+    flight = SingleFlight()
+
+    async def main():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.Event().wait()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return "follower"
+
+        leader = asyncio.create_task(flight.ado("key", hang))
+        await started.wait()
+        followers = [asyncio.create_task(flight.ado("key", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await asyncio.gather(*followers) == ["follower"] * 3
+        assert leader.cancelled()
+
+    asyncio.run(main())
+    # The cancelled leader, then one follower promoted in its place
+    assert flight.stats() == {"calls": 4, "upstream_calls": 2, "coalesced": 3, "in_flight": 0}
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_interrupted_sync_leader_hands_over():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def interrupted():
+        started.set()
+        release.wait()
+        raise Interrupted()
+
+    def leader():
+        try:
+            flight.do("key", interrupted)
+        except Interrupted:
+            pass
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait()
+    results = []
+    follower = threading.Thread(target=lambda: results.append(flight.do("key", lambda: "follower")))
+    follower.start()
+    while flight.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    thread.join(5)
+    follower.join(5)
+    assert results == ["follower"]
+    assert flight.stats()["upstream_calls"] == 2
+
+
+def test_leader_errors_are_shared_with_its_followers():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        release.wait()
+        raise ValueError("upstream down")
+
+    def call(fn):
+        try:
+            flight.do("key", fn)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call, args=(fail,))
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call, args=(lambda: "never called",))
+    follower.start()
+    while flight.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert flight.stats() == {"calls": 2, "upstream_calls": 1, "coalesced": 1, "in_flight": 0}
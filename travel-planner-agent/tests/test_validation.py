@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from src.utils.state import ItineraryAgentState
+from src.utils.validation import validate_request
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+def check(**fields):
+    state = ItineraryAgentState(**{"origin": "Bangkok", "destination": "Chiang Mai", **fields})
+    return validate_request(state)
+
+
+def day(offset: int) -> str:
+    return (TOMORROW + timedelta(days=offset)).isoformat()
+
+
+def test_single_day_window_is_valid():
+    assert check(date_window_start=day(0), date_window_end=day(0), trip_nights=3)["is_valid_date"]
+
+
+def test_window_rules():
+    assert not check(date_window_start=day(5), date_window_end=day(0), trip_nights=2)["is_valid_date"]
+    assert not check(date_window_start=day(-1), date_window_end=day(3), trip_nights=2)["is_valid_date"]
+    assert not check(date_window_start=day(0), trip_nights=2)["is_valid_date"]
+    assert not check(date_window_start=day(0), date_window_end=day(3), trip_nights=0)["is_valid_date"]
+    assert not check(date_window_start="2099/01/01", date_window_end=day(3), trip_nights=2)["is_valid_date"]
+
+
+def test_window_and_fixed_dates_are_exclusive():
+    result = check(date_window_start=day(0), date_window_end=day(3), trip_nights=2,
+                   departure_date=day(1), return_date=day(3))
+    assert not result["is_valid_date"]
+    assert "not both" in result["validation_message"]
+
+
+def test_fixed_dates():
+    assert check(departure_date=day(0), return_date=day(2))["is_valid_date"]
+    assert not check(departure_date=day(2), return_date=day(2))["is_valid_date"]
+    assert not check(departure_date=date.today().isoformat(), return_date=day(2))["is_valid_date"]
+
+
+def test_locations():
+    assert not check(departure_date=day(0), return_date=day(2), destination="bangkok ")["is_valid_date"]
+    assert not check(departure_date=day(0), return_date=day(2), origin="B1")["is_valid_date"]